@@ -0,0 +1,427 @@
+"""
+ archive.py – фоновая архивация старых записей в Opus.
+
+ Записи старше *min_age_days* перекодируются в Opus с низким битрейтом
+ (речь, ~24 кбит/с – в 5 раз меньше mp3 128k).  Кодирование идёт в пуле
+ процессов, ffmpeg – в один поток и с пониженным приоритетом.  Новые
+ задачи не запускаются, пока идёт запись.  Результат проверяется
+ ffprobe (кодек и длительность).  Затем файл атомарно встаёт на место,
+ а каталог ``archive.json`` и сопутствующие файлы (волна, карта тишины)
+ переносятся.  Исходник удаляется последним.
+
+ Если задан бюджет диска, а записи его превышают, архивируются и более
+ свежие файлы – от старых к новым, пока объём не уложится в бюджет.
+ Записи при этом никогда не удаляются: остаток превышения попадает в
+ отчёт.
+
+ Использование::
+
+     archiver = Archiver(ArchivePolicy(min_age_days=30, budget_bytes=20 << 30))
+     report = archiver.run(settings.records(), exclude=[current_recording])
+
+ или из CLI::
+
+     python archive.py ~/Documents/*.mp3 --days 30 --budget_gb 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+from ffmpeg_core import FFMPEG_BINARY, FFPROBE_BINARY
+from resource_scheduler import RECORDING, default_scheduler
+from timemap import TimeMap
+from waveform import WaveformPeaks
+
+__all__ = [
+    "ArchivePolicy",
+    "ArchiveCatalog",
+    "ArchiveReport",
+    "Archiver",
+    "transcode_to_opus",
+    "probe_audio",
+    "DEFAULT_CATALOG",
+]
+
+ARCHIVE_SUFFIX = ".opus"
+
+DEFAULT_CATALOG = Path(
+    os.environ.get("SOUNDDRAFTICO_CACHE", Path.home() / ".cache" / "sounddraftico")
+) / "archive.json"
+
+
+@dataclass
+class ArchivePolicy:
+    """What to archive and how."""
+
+    min_age_days: float = 30.0
+    bitrate: str = "24k"
+    budget_bytes: Optional[int] = None      # None – без ограничения
+    # .mka не трогаем: в Ogg/Opus не помещаются раздельные дорожки
+    extensions: tuple = (".mp3", ".wav", ".m4a", ".flac")
+    # допустимое расхождение длительности, секунд + доля от длины
+    duration_tolerance: float = 0.5
+    duration_ratio: float = 0.01
+
+
+@dataclass
+class ArchiveReport:
+    """Outcome of one :meth:`Archiver.run`."""
+
+    archived: list = field(default_factory=list)     # (исходный путь, архивный путь)
+    failed: list = field(default_factory=list)       # (исходный путь, текст ошибки)
+    bytes_before: int = 0
+    bytes_after: int = 0
+    over_budget: int = 0                             # байт сверх бюджета после архивации
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+# ---------------------------------------------------------------------------
+# Transcoding (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+
+def _low_priority_kwargs() -> dict:
+    if sys.platform.startswith("win"):
+        return {"creationflags": subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+    return {"preexec_fn": lambda: os.nice(10)}
+
+
+def probe_audio(path: Union[str, Path]) -> dict:
+    """``{"codec": str, "duration": float}`` of the first audio stream of *path*."""
+    out = subprocess.run(
+        [
+            FFPROBE_BINARY, "-v", "error", "-select_streams", "a:0",
+            "-show_entries", "stream=codec_name:format=duration", "-of", "json", str(path),
+        ],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True,
+    ).stdout
+    data = json.loads(out)
+    streams = data.get("streams") or [{}]
+    return {
+        "codec": streams[0].get("codec_name"),
+        "duration": float(data.get("format", {}).get("duration") or 0.0),
+    }
+
+
+def transcode_to_opus(
+    src: Union[str, Path],
+    dst: Union[str, Path],
+    *,
+    bitrate: str = "24k",
+    tolerance: float = 0.5,
+    ratio: float = 0.01,
+    low_priority: bool = True,
+) -> dict:
+    """Encode *src* into a temporary file next to *dst* and verify it.
+
+    The verified file is left at ``<dst>.tmp`` – moving it into place is
+    up to the caller, which owns the catalog.
+
+    Returns
+    -------
+    dict
+        ``src``, ``tmp``, ``duration`` and ``bytes`` of the encoded file.
+
+    Raises
+    ------
+    RuntimeError
+        If ffmpeg fails or the result does not match the source.
+    """
+    src, dst = Path(src), Path(dst)
+    tmp = dst.with_name(dst.name + ".tmp")
+    cmd = [
+        FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-threads", "1", "-i", str(src), "-vn", "-map_metadata", "0",
+        "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+        "-threads", "1", "-f", "ogg", str(tmp),
+    ]
+    try:
+        proc = subprocess.run(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            text=True, **(_low_priority_kwargs() if low_priority else {}),
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with {proc.returncode}: {proc.stderr.strip()[-300:]}")
+        source = probe_audio(src)
+        result = probe_audio(tmp)
+        if result["codec"] != "opus":
+            raise RuntimeError(f"unexpected codec {result['codec']!r}")
+        allowed = tolerance + source["duration"] * ratio
+        if abs(result["duration"] - source["duration"]) > allowed:
+            raise RuntimeError(
+                f"duration mismatch: {result['duration']:.2f} s vs {source['duration']:.2f} s"
+            )
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return {"src": str(src), "tmp": str(tmp), "duration": result["duration"], "bytes": tmp.stat().st_size}
+
+
+# ---------------------------------------------------------------------------
+# Catalog
+# ---------------------------------------------------------------------------
+
+
+class ArchiveCatalog:
+    """JSON map of archived recordings, rewritten atomically on every change."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CATALOG) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self.entries = json.loads(self.path.read_text(encoding="utf-8")).get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def resolve(self, path: Union[str, Path]) -> str:
+        """Current location of a recording that may have been archived."""
+        entry = self.entries.get(str(path))
+        return entry["archived"] if entry else str(path)
+
+    def add(self, src: Union[str, Path], dst: Union[str, Path], **info) -> None:
+        with self._lock:
+            self.entries[str(src)] = {"archived": str(dst), "archived_at": time.time(), **info}
+            self.save()
+
+    def save(self) -> Path:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(
+            json.dumps({"version": 1, "entries": self.entries}, ensure_ascii=False, indent=1),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+        return self.path
+
+
+# ---------------------------------------------------------------------------
+# Policy engine
+# ---------------------------------------------------------------------------
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+class Archiver:
+    """Apply an :class:`ArchivePolicy` to a set of recordings.
+
+    Parameters
+    ----------
+    policy : ArchivePolicy
+    catalog : ArchiveCatalog | None
+        Where moves are recorded; :data:`DEFAULT_CATALOG` by default.
+    workers : int, default 1
+        Concurrent encodes.
+    scheduler : ResourceScheduler | None
+        No new encode starts while it reports an active recording.
+    on_moved : Callable[[str, str], None] | None
+        Called (from the calling thread) after a recording is replaced by
+        its archive, e.g. to update the record list.
+    executor_factory : Callable[[int], Executor]
+        Creates the worker pool; a :class:`ProcessPoolExecutor` by default.
+    in_use : Callable[[], Iterable] | None
+        Returns recordings busy right now (being recorded or transcribed).
+        Checked before each encode starts and again before the original is
+        replaced, so a file opened after :meth:`run` began is not deleted.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[ArchivePolicy] = None,
+        *,
+        catalog: Optional[ArchiveCatalog] = None,
+        workers: int = 1,
+        scheduler=None,
+        on_moved: Optional[Callable[[str, str], None]] = None,
+        executor_factory: Callable[[int], Executor] = lambda n: ProcessPoolExecutor(max_workers=n),
+        transcoder: Callable = transcode_to_opus,
+        in_use: Optional[Callable[[], Iterable]] = None,
+    ) -> None:
+        self.policy = policy or ArchivePolicy()
+        self.catalog = catalog or ArchiveCatalog()
+        self.workers = max(1, workers)
+        self.scheduler = scheduler or default_scheduler()
+        self.on_moved = on_moved
+        self.executor_factory = executor_factory
+        self.transcoder = transcoder
+        self.in_use = in_use
+        self._stop = threading.Event()
+
+    def _busy(self, path: Path) -> bool:
+        if self.in_use is None:
+            return False
+        return path in {Path(p).resolve() for p in self.in_use()}
+
+    def stop(self) -> None:
+        """Finish running encodes and do not start new ones."""
+        self._stop.set()
+
+    # -- selection --------------------------------------------------------
+    def select(self, paths: Iterable[Union[str, Path]], exclude: Iterable = (), now: Optional[float] = None):
+        """Split *paths* into ``(due, spare, usage)``.
+
+        *due* are old enough to be archived, *spare* may be archived to meet
+        the budget; both oldest first.  *usage* is the size of all *paths*.
+        """
+        now = time.time() if now is None else now
+        excluded = {Path(p).resolve() for p in exclude}
+        due, spare, usage = [], [], 0
+        for path in {Path(p).resolve() for p in paths}:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            usage += st.st_size
+            if path in excluded or path.suffix.lower() not in self.policy.extensions:
+                continue
+            if path.with_suffix(ARCHIVE_SUFFIX).exists():
+                continue        # уже есть архив (прерванный прошлый запуск)
+            age_days = (now - st.st_mtime) / 86400
+            (due if age_days >= self.policy.min_age_days else spare).append((st.st_mtime, path))
+        return [p for _, p in sorted(due)], [p for _, p in sorted(spare)], usage
+
+    # -- run --------------------------------------------------------------
+    def _wait_idle(self) -> None:
+        while self.scheduler.active(RECORDING) and not self._stop.is_set():
+            time.sleep(0.5)
+
+    def run(self, paths: Iterable[Union[str, Path]], exclude: Iterable = ()) -> ArchiveReport:
+        """Archive what the policy selects from *paths*; blocks until done."""
+        due, spare, usage = self.select(paths, exclude)
+        budget = self.policy.budget_bytes
+        report = ArchiveReport(bytes_before=usage)
+        pending: dict = {}               # future → исходный путь
+        reserved = 0                     # ожидаемая экономия от текущих задач
+        executor = None
+        try:
+            while not self._stop.is_set():
+                while len(pending) < self.workers:
+                    if due:
+                        src = due.pop(0)
+                    elif spare and budget is not None and usage - reserved > budget:
+                        src = spare.pop(0)
+                    else:
+                        break
+                    self._wait_idle()
+                    if self._stop.is_set():
+                        break
+                    if self._busy(src):
+                        continue    # файл сейчас транскрибируется – в следующий раз
+                    if executor is None:
+                        executor = self.executor_factory(self.workers)
+                    future = executor.submit(
+                        self.transcoder,
+                        src,
+                        src.with_suffix(ARCHIVE_SUFFIX),
+                        bitrate=self.policy.bitrate,
+                        tolerance=self.policy.duration_tolerance,
+                        ratio=self.policy.duration_ratio,
+                    )
+                    pending[future] = src
+                    reserved += _size(src)
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    src = pending.pop(future)
+                    reserved -= _size(src)
+                    usage -= self._commit(src, future, report)
+            # остановлены: дожидаемся начатых задач, но новых не берём
+            for future, src in pending.items():
+                self._commit(src, future, report)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        report.bytes_after = usage
+        if budget is not None:
+            report.over_budget = max(0, usage - budget)
+        return report
+
+    def _commit(self, src: Path, future, report: ArchiveReport) -> int:
+        """Move a finished encode into place; returns the bytes saved."""
+        try:
+            result = future.result()
+        except Exception as exc:
+            report.failed.append((str(src), str(exc)))
+            return 0
+        dst = src.with_suffix(ARCHIVE_SUFFIX)
+        before = _size(src)
+        if self._busy(src):
+            # за время кодирования файл открыли – исходник не трогаем
+            Path(result["tmp"]).unlink(missing_ok=True)
+            report.failed.append((str(src), "in use"))
+            return 0
+        try:
+            # Архив получает время исходника: возраст записи не сбрасывается,
+            # а файл волны остаётся актуальным.
+            st = src.stat()
+            os.utime(result["tmp"], (st.st_atime, st.st_mtime))
+            os.replace(result["tmp"], dst)
+            for sidecar in (WaveformPeaks.sidecar_path, TimeMap.sidecar_path):
+                if sidecar(src).exists():
+                    os.replace(sidecar(src), sidecar(dst))
+            self.catalog.add(src, dst, bytes_before=before, bytes_after=result["bytes"])
+            src.unlink()
+        except OSError as exc:
+            report.failed.append((str(src), str(exc)))
+            return 0
+        report.archived.append((str(src), str(dst)))
+        if self.on_moved:
+            self.on_moved(str(src), str(dst))
+        return before - result["bytes"]
+
+
+# ---------------------------------------------------------------------------
+# CLI wrapper
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:  # pragma: no cover – CLI only
+    p = argparse.ArgumentParser(prog="archive", description="Re-encode old recordings to Opus")
+    p.add_argument("inputs", nargs="+", help="Recordings")
+    p.add_argument("--days", type=float, default=30.0, help="Archive recordings older than this")
+    p.add_argument("--bitrate", default="24k", help="Opus bitrate")
+    p.add_argument("--budget_gb", type=float, help="Disk budget for all inputs, GB")
+    p.add_argument("--workers", type=int, default=1, help="Concurrent encodes")
+    p.add_argument("--catalog", default=str(DEFAULT_CATALOG), help="Catalog file")
+    args = p.parse_args()
+    policy = ArchivePolicy(
+        min_age_days=args.days,
+        bitrate=args.bitrate,
+        budget_bytes=int(args.budget_gb * (1 << 30)) if args.budget_gb else None,
+    )
+    archiver = Archiver(
+        policy,
+        catalog=ArchiveCatalog(args.catalog),
+        workers=args.workers,
+        on_moved=lambda src, dst: print(f"{src} → {dst}"),
+    )
+    report = archiver.run(args.inputs)
+    for src, error in report.failed:
+        print(f"Ошибка {src}: {error}")
+    print(
+        f"Архивировано {len(report.archived)}, сэкономлено {report.saved_bytes / (1 << 20):.1f} MB"
+        + (f", сверх бюджета {report.over_budget / (1 << 20):.1f} MB" if report.over_budget else "")
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -17,17 +17,34 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
 from pathlib import Path
-from typing import Callable, Optional, Union
+from types import SimpleNamespace
+from typing import AsyncIterator, Callable, Iterable, Optional, Union
 from tqdm import tqdm
 
+import profiling
+from decoding_presets import get_preset
+from engines import PROGRESS, get_engine, supports
+from resource_scheduler import default_scheduler
+from timemap import TimeMap
+from transcript_writers import MultiWriter, format_segment, format_timestamp, open_writers
+
 # ``TranscriptionProgress`` was introduced in later versions of
 # ``faster_whisper``.  Older releases expose only ``WhisperModel`` and do not
 # provide structured progress callbacks.  To keep compatibility with both the
 # old and the new versions we try to import ``TranscriptionProgress`` and fall
 # back to a tiny dataclass with the same attributes if it is missing.
-from faster_whisper import WhisperModel
-from functools import lru_cache
+# ``faster_whisper`` itself is optional: engines are loaded via :mod:`engines`.
+try:  # pragma: no cover - optional engine
+    from faster_whisper import WhisperModel
+except ImportError:  # pragma: no cover
+    WhisperModel = None
 try:  # pragma: no cover - simply for optional feature
     from faster_whisper import TranscriptionProgress  # type: ignore
 except ImportError:  # pragma: no cover - executed when running with old lib
@@ -42,40 +59,156 @@ except ImportError:  # pragma: no cover - executed when running with old lib
         segments_done: int
         step: int = 1
 
-__all__ = ["transcribe_audio", "load_model"]
+__all__ = [
+    "transcribe_audio",
+    "transcribe_audio_async",
+    "load_model",
+    "model_cache_info",
+    "clear_model_cache",
+    "decoding_options",
+    "format_timestamp",
+    "format_segment",
+    "shift_segment",
+    "remap_segment",
+    "TranscriptionCancelled",
+]
+
+
+class TranscriptionCancelled(Exception):
+    """Raised from a segment handler to abort a running transcription."""
+
+
+# ---------------------------------------------------------------------------
+# Output format helpers
+# ---------------------------------------------------------------------------
+
+def remap_segment(seg, fn: Callable[[float], float]):
+    """Return a copy of *seg* with start/end (and its words' times) passed through *fn*."""
+    words = getattr(seg, "words", None)
+    if words:
+        words = [remap_segment(w, fn) for w in words]
+    if hasattr(seg, "_replace"):  # faster_whisper.Segment / Word – NamedTuple
+        fields = {"start": fn(seg.start), "end": fn(seg.end)}
+        if words is not None and "words" in seg._fields:
+            fields["words"] = words
+        return seg._replace(**fields)
+    mapped = SimpleNamespace(**vars(seg))
+    mapped.start = fn(seg.start)
+    mapped.end = fn(seg.end)
+    if words is not None:
+        mapped.words = words
+    return mapped
+
+
+def shift_segment(seg, offset: float):
+    """Return a copy of *seg* with its (and its words') times moved by *offset*."""
+    return remap_segment(seg, lambda t: t + offset)
 
 
 # ---------------------------------------------------------------------------
 # Model loading helper
 # ---------------------------------------------------------------------------
 
-@lru_cache(maxsize=None)
-def load_model(model_name: str = "large-v3", device: str = "cuda") -> WhisperModel:
-    """Load and cache a :class:`WhisperModel` instance."""
-    print(f"Загружаем модель {model_name} на {device}…")
-    return WhisperModel(
-        model_name,
-        device=device,
-        compute_type="int8_float16" if device == "cuda" else "int8",
-    )
+# Сколько разных моделей держать в памяти (large-v3 – несколько ГБ каждая)
+MODEL_CACHE_SIZE = max(1, int(os.environ.get("SOUNDDRAFTICO_MODEL_CACHE", "2")))
+
+_models: OrderedDict = OrderedDict()     # (engine, name, device, workers) → модель
+_models_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def load_model(
+    model_name: str = "large-v3",
+    device: str = "cuda",
+    cpu_threads: int = 0,
+    num_workers: int = 1,
+    engine: str = "faster-whisper",
+):
+    """Load a model of *engine* (see :mod:`engines`) once and share it.
+
+    The cache key is the model itself – *engine*, *model_name*, *device*
+    and *num_workers* – and at most :data:`MODEL_CACHE_SIZE` models are
+    kept (least recently used are dropped).  The intra-op thread pool is
+    fixed at load time: *cpu_threads* applies only when the model is not
+    cached yet, ``0`` takes the scheduler's budget for one job.  Callers
+    sharing the model are serialised by its *num_workers*, so per-job
+    leases never multiply the threads or the copies of the model.
+
+    Names found in the local :mod:`model_registry` are loaded from disk
+    without any Hugging Face Hub request.
+
+    Raises
+    ------
+    ValueError
+        If *engine* is not registered.
+    """
+    key = (engine, model_name, device, num_workers)
+    with _models_lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            _cache_stats["hits"] += 1
+            return model
+        _cache_stats["misses"] += 1
+        if not cpu_threads and device == "cpu":
+            cpu_threads = default_scheduler().transcription_threads(num_workers)
+        # Загрузка под замком: два потока не грузят одну модель дважды.
+        model = get_engine(engine).load(model_name, device, cpu_threads, num_workers)
+        _models[key] = model
+        while len(_models) > MODEL_CACHE_SIZE:
+            _models.popitem(last=False)
+        return model
+
+
+def model_cache_info() -> dict:
+    """``hits``, ``misses`` and ``size`` of the :func:`load_model` cache."""
+    with _models_lock:
+        return dict(_cache_stats, size=len(_models))
+
+
+def clear_model_cache() -> None:
+    """Drop every cached model (they are freed once no job uses them)."""
+    with _models_lock:
+        _models.clear()
 
 
 # ---------------------------------------------------------------------------
 # Core function
 # ---------------------------------------------------------------------------
 
+def decoding_options(language: str = "ru", beam_size: int = 5, preset=None) -> dict:
+    """Keyword arguments for ``WhisperModel.transcribe`` shared by all entry points."""
+    options = dict(
+        language=None if language == "auto" else language,
+        beam_size=beam_size,
+        vad_filter=True,
+    )
+    if preset is not None:
+        if isinstance(preset, str):
+            preset = get_preset(preset)
+        options.update(preset.transcribe_kwargs())
+    return options
+
+
 def transcribe_audio(
     input_audio: Union[str, Path],
     *,
     model_name: str = "large-v3",
     device: str = "cuda",
-    model: Optional[WhisperModel] = None,
+    model=None,
+    cpu_threads: int = 0,
+    audio=None,
     out_path: Optional[Union[str, Path]] = None,
     beam_size: int = 5,
+    preset=None,
     language: str = "ru",
     logger=None,
     progress_handler: Optional[Callable[[TranscriptionProgress], None]] = None,
-) -> Path:
+    segment_handler: Optional[Callable[[object], None]] = None,
+    formats: Iterable[str] = ("txt",),
+    word_timestamps: bool = False,
+    engine: str = "faster-whisper",
+) -> Optional[Path]:
     """Transcribe *input_audio* and save result to *out_path*.
 
     Parameters
@@ -87,22 +220,53 @@ def transcribe_audio(
     device : {"cuda", "cpu"}, default "cuda"
         Device for inference. If ``cuda`` is selected but not available, an
         exception will be raised by Faster‑Whisper.
-    model : WhisperModel | None, default ``None``
+    model : ASREngine | WhisperModel | None, default ``None``
         Preloaded model instance. If ``None`` a cached model will be loaded
         using :func:`load_model`.
+    cpu_threads : int, default 0
+        Intra-op threads if the model is not cached yet (``0`` – the
+        scheduler's budget), see :func:`load_model`.  Ignored when *model*
+        is given.
+    audio : numpy.ndarray | None, default ``None``
+        Already decoded 16 kHz mono float32 samples of *input_audio*.  When
+        given, the file is not decoded again (see :mod:`batch_pipeline`).
     out_path : str | Path | None, default ``None``
-        Where to save text output. If *None*, ``<input_audio>.txt`` is used.
+        Where to save text output. If *None*, ``<input_audio>.<format>`` is
+        used for the first of *formats*.
     beam_size : int, default 5
         Beam‑search size.
+    preset : str | DecodingPreset | None
+        Speed/quality preset from :mod:`decoding_presets` (``"fast"``,
+        ``"balanced"``, ``"accurate"``).  Overrides *beam_size* and sets
+        ``best_of``, temperature fallback and VAD options.
     language : str, default "ru"
         ISO‑639‑1 language code or "auto" for autodetect.
     progress_handler : Callable[[TranscriptionProgress], None] | None
         Optional callback to receive progress updates from Faster‑Whisper.
+    segment_handler : Callable[[Segment], None] | None
+        Optional callback invoked for every decoded segment right after it is
+        written.  If the recording has a ``.timemap.json`` sidecar (silence
+        was cut during capture), segment times are mapped back to the
+        original recording timeline before writing.  Raising
+        :class:`TranscriptionCancelled` from it stops the inference; the
+        partial output file is kept.
+    formats : Iterable[str], default ("txt",)
+        Output formats from :data:`transcript_writers.WRITERS` (``txt``,
+        ``srt``, ``vtt``, ``json``).  All of them are written in the same
+        pass over the segments: the first one to *out_path*, the others
+        next to it with their own suffix.  Empty – nothing is written, the
+        segments only go to *segment_handler*.
+    word_timestamps : bool, default False
+        Ask the model for per-word timings; they are kept in ``json``.
+    engine : str, default "faster-whisper"
+        :mod:`engines` name used when *model* is not given.
 
     Returns
     -------
-    Path
-        Path to the generated text file.
+    Path | None
+        Path to the file of the first format (``None`` without *formats*).
+
+    Per-stage timings of every call are passed to :mod:`profiling` hooks.
     """
 
     # ---------------------------------------------------------------------
@@ -112,16 +276,23 @@ def transcribe_audio(
     if not audio_path.exists():
         raise FileNotFoundError(audio_path)
 
-    output_path = (
-        Path(out_path).expanduser().resolve() if out_path else audio_path.with_suffix(".txt")
-    )
-
+    formats = list(dict.fromkeys(formats))
+    output_path = None
+    if formats:
+        output_path = (
+            Path(out_path).expanduser().resolve() if out_path else audio_path.with_suffix("." + formats[0])
+        )
 
     # ---------------------------------------------------------------------
     # Загрузка модели
     # ---------------------------------------------------------------------
+    profile = profiling.TranscriptionProfile(str(audio_path), model_name if model is None else None)
     if model is None:
-        model = load_model(model_name, device)
+        hits = model_cache_info()["hits"]
+        t0 = time.perf_counter()
+        model = load_model(model_name, device, cpu_threads, engine=engine)
+        profile.add("model_load", time.perf_counter() - t0)
+        profile.model_cache_hit = model_cache_info()["hits"] > hits
 
     # ---------------------------------------------------------------------
     # Транскрибация с отображением прогресса
@@ -143,41 +314,166 @@ def transcribe_audio(
                 progress_bar.update(percent - last_percent)
                 last_percent = percent
 
-    transcribe_kwargs = dict(
-        language=None if language == "auto" else language,
-        beam_size=beam_size,
-        vad_filter=True,
-    )
+    transcribe_kwargs = decoding_options(language, beam_size, preset)
+    if word_timestamps:
+        transcribe_kwargs["word_timestamps"] = True
 
     # Некоторые версии faster_whisper не поддерживают параметр
-    # ``progress_callback``.  Проверяем его наличие через introspection и
-    # передаём, только если параметр присутствует.
-    import inspect
-
-    if "progress_callback" in inspect.signature(model.transcribe).parameters:
+    # ``progress_callback``.  Передаём его, только если движок это умеет.
+    if supports(model, PROGRESS):
         transcribe_kwargs["progress_callback"] = _internal_progress_cb
 
-    segments, _info = model.transcribe(str(audio_path), **transcribe_kwargs)
-
-    if last_percent < 100:
-        progress_bar.update(100 - last_percent)
-    progress_bar.close()
+    source = str(audio_path) if audio is None else audio
+    # transcribe() сразу декодирует файл и прогоняет VAD, сегменты – лениво.
+    t0 = time.perf_counter()
+    segments, info = model.transcribe(source, **transcribe_kwargs)
+    profile.add("decode_vad", time.perf_counter() - t0)
+    profile.audio_seconds = float(getattr(info, "duration", 0.0) or 0.0)
+    if not profile.audio_seconds and audio is not None:
+        profile.audio_seconds = len(audio) / 16000
+    profile.speech_seconds = getattr(info, "duration_after_vad", None)
 
     # ---------------------------------------------------------------------
     # Save result
     # ---------------------------------------------------------------------
 
-    with open(output_path, "w", encoding="utf-8") as fp:
-        for seg in segments:
-            # [hh:mm:ss.mmm --> hh:mm:ss.mmm] text
-            hh = lambda t: f"{int(t // 3600):02d}:{int((t % 3600) // 60):02d}:{t % 60:06.3f}"
-            line = f"[{hh(seg.start)} --> {hh(seg.end)}] {seg.text.strip()}\n"
-            fp.write(line)
-
-    print(f"Транскрибация завершена. Файл сохранён: {output_path}")
+    time_map = TimeMap.for_audio(audio_path)
+    to_original = time_map.to_original if time_map else None
+
+    write_seconds = 0.0
+    t0 = time.perf_counter()
+    try:
+        # Один проход по сегментам – все форматы пишутся одновременно.
+        with open_writers(output_path, formats) if formats else MultiWriter({}) as out:
+            for seg in segments:
+                t_write = time.perf_counter()
+                if to_original:
+                    seg = remap_segment(seg, to_original)
+                out.write(seg)
+                profile.segments += 1
+                if segment_handler:
+                    segment_handler(seg)
+                write_seconds += time.perf_counter() - t_write
+    finally:
+        profile.add("inference", time.perf_counter() - t0 - write_seconds)
+        profile.add("write", write_seconds)
+        if last_percent < 100:
+            progress_bar.update(100 - last_percent)
+        progress_bar.close()
+    profiling.emit(profile)
+
+    if output_path is not None:
+        print(f"Транскрибация завершена. Файл сохранён: {output_path}")
     return output_path
 
 
+# ---------------------------------------------------------------------------
+# Asyncio counterpart
+# ---------------------------------------------------------------------------
+
+_DONE = object()
+
+
+async def transcribe_audio_async(
+    input_audio: Union[str, Path],
+    *,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    executor=None,
+    max_pending: int = 32,
+    progress_handler: Optional[Callable[[TranscriptionProgress], None]] = None,
+    **kwargs,
+) -> AsyncIterator[object]:
+    """Run :func:`transcribe_audio` in *executor* and yield segments as they arrive.
+
+    The blocking inference runs in a worker thread; segments are handed to
+    the event loop one by one.  Cancelling the consuming task, closing the
+    iterator or hitting the deadline stops inference at the next segment
+    boundary, so the worker thread and the model are released promptly.
+
+    Parameters
+    ----------
+    input_audio : str | Path
+        Path to the source audio file.
+    timeout : float | None
+        Overall time budget in seconds, counted from the call.
+    deadline : float | None
+        Absolute deadline in :func:`time.monotonic` seconds.  The earlier of
+        *timeout* and *deadline* wins.  On expiry :class:`TimeoutError` is
+        raised.
+    executor : concurrent.futures.Executor | None
+        Where to run inference; ``None`` uses the loop's default executor.
+    max_pending : int, default 32
+        Segments buffered for a slow consumer before inference pauses.
+    progress_handler : Callable[[TranscriptionProgress], None] | None
+        Called from the worker thread, as in :func:`transcribe_audio`.
+    **kwargs
+        Forwarded to :func:`transcribe_audio` (``model``, ``out_path``,
+        ``beam_size``, ``language`` …).
+
+    Yields
+    ------
+    Segment
+        Faster‑Whisper segments in decoding order.
+    """
+    loop = asyncio.get_running_loop()
+    if timeout is not None:
+        limit = time.monotonic() + timeout
+        deadline = limit if deadline is None else min(deadline, limit)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    slots = threading.Semaphore(max_pending)
+    stop = threading.Event()
+
+    def on_segment(seg) -> None:
+        # Ждём, пока потребитель разберёт очередь, но регулярно проверяем
+        # флаг остановки, чтобы не зависнуть, если он уже ушёл.
+        while not slots.acquire(timeout=0.1):
+            if stop.is_set():
+                break
+        if stop.is_set():
+            raise TranscriptionCancelled(str(input_audio))
+        loop.call_soon_threadsafe(queue.put_nowait, seg)
+
+    def on_progress(p) -> None:
+        if stop.is_set():
+            raise TranscriptionCancelled(str(input_audio))
+        if progress_handler:
+            progress_handler(p)
+
+    worker = loop.run_in_executor(
+        executor,
+        partial(
+            transcribe_audio,
+            input_audio,
+            progress_handler=on_progress,
+            segment_handler=on_segment,
+            **kwargs,
+        ),
+    )
+    worker.add_done_callback(lambda _f: queue.put_nowait(_DONE))
+
+    try:
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"transcription deadline exceeded: {input_audio}")
+            try:
+                item = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"transcription deadline exceeded: {input_audio}") from None
+            if item is _DONE:
+                break
+            slots.release()
+            yield item
+        await worker
+    finally:
+        stop.set()
+        # Поток завершится на ближайшей границе сегмента; исключение
+        # TranscriptionCancelled из него нам уже не интересно.
+        worker.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
 # ---------------------------------------------------------------------------
 # CLI wrapper
 # ---------------------------------------------------------------------------
@@ -187,24 +483,136 @@ def _parse_cli_args() -> argparse.Namespace:  # pragma: no cover
     p = argparse.ArgumentParser(prog="transcriber", description="Audio transcription helper")
     p.add_argument("input_audio", help="Path to .wav / .mp3 / .m4a …")
     p.add_argument("--model", default="large-v3", help="HF model name or local dir")
+    p.add_argument("--engine", default="faster-whisper", help="ASR engine (faster-whisper, stub)")
     p.add_argument("--device", default="cuda", choices=["cuda", "cpu"], help="Device to run on")
     p.add_argument("--out", help="Where to save text (default: <input>.txt)")
     p.add_argument("--beam_size", type=int, default=5, help="Beam size")
+    p.add_argument("--preset", choices=["fast", "balanced", "accurate"], help="Decoding preset (overrides beam size)")
+    p.add_argument("--cpu_threads", type=int, default=0, help="CPU threads for inference (0 = auto)")
     p.add_argument("--language", default="ru", help="ISO code or auto")
-    return p.parse_args()
+    p.add_argument("--draft_model", help="Small model for a fast draft pass (e.g. tiny, base)")
+    p.add_argument("--stream", action="store_true", help="Decode in windows with constant memory (long files)")
+    p.add_argument("--window", type=float, default=300.0, help="Window length for --stream, seconds")
+    p.add_argument("--multichannel", action="store_true", help="Transcribe each channel/track separately and merge")
+    p.add_argument("--workers", type=int, default=2, help="Channels transcribed in parallel for --multichannel")
+    p.add_argument("--formats", nargs="+", default=["txt"], choices=["txt", "srt", "vtt", "json"],
+                   help="Output formats written in one pass (first goes to --out)")
+    p.add_argument("--word_timestamps", action="store_true", help="Keep per-word timings (json)")
+    p.add_argument("--profile", action="store_true", help="Print per-stage timings")
+    p.add_argument("--profile_out", help="Also write a cProfile dump to this file")
+    p.add_argument("--metrics_file", help="Prometheus textfile to update with counters")
+    args = p.parse_args()
+    modes = [
+        flag
+        for flag, on in (("--draft_model", args.draft_model), ("--stream", args.stream),
+                         ("--multichannel", args.multichannel))
+        if on
+    ]
+    if len(modes) > 1:
+        p.error(f"{' and '.join(modes)} cannot be combined")
+    if args.draft_model and args.formats[0] != "txt":
+        p.error("--draft_model refines the txt transcript in place: list txt first in --formats")
+    return args
 
 
 
 def main() -> None:  # pragma: no cover – CLI only
     args = _parse_cli_args()
+    if args.profile or args.profile_out:
+        profiling.add_hook(profiling.print_profile)
+    if args.metrics_file:
+        import os
+
+        from proc_monitor import ProcessMonitor
+
+        monitor = ProcessMonitor(interval=1.0)
+        monitor.watch(os.getpid(), "transcriber")
+        monitor.start()
+        profiling.add_hook(profiling.PrometheusTextfile(args.metrics_file, extra=monitor.metrics))
+    if args.profile_out:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            _run(args)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(args.profile_out)
+            print(f"cProfile сохранён: {args.profile_out}")
+        return
+    _run(args)
+
+
+def _run(args: argparse.Namespace) -> None:  # pragma: no cover – CLI only
+
+    if args.draft_model:
+        from two_pass import transcribe_two_pass
+
+        job = transcribe_two_pass(
+            args.input_audio,
+            model_name=args.model,
+            device=args.device,
+            cpu_threads=args.cpu_threads,
+            engine=args.engine,
+            draft_model_name=args.draft_model,
+            out_path=args.out,
+            formats=args.formats,
+            beam_size=args.beam_size,
+            preset=args.preset,
+            language=args.language,
+            word_timestamps=args.word_timestamps,
+            on_draft=lambda p: print(f"Черновик готов: {p}"),
+        )
+        job.wait()
+        if job.error:
+            raise job.error
+        return
+
+    if args.multichannel:
+        from multichannel import transcribe_multichannel
+
+        transcribe_multichannel(
+            args.input_audio,
+            model=load_model(args.model, args.device, args.cpu_threads, args.workers, engine=args.engine),
+            workers=args.workers,
+            out_path=args.out,
+            formats=args.formats,
+            beam_size=args.beam_size,
+            preset=args.preset,
+            language=args.language,
+            word_timestamps=args.word_timestamps,
+        )
+        return
+
+    if args.stream:
+        from streaming import transcribe_streaming
+
+        transcribe_streaming(
+            args.input_audio,
+            model=load_model(args.model, args.device, args.cpu_threads, engine=args.engine),
+            out_path=args.out,
+            formats=args.formats,
+            window_seconds=args.window,
+            beam_size=args.beam_size,
+            preset=args.preset,
+            language=args.language,
+            word_timestamps=args.word_timestamps,
+        )
+        return
 
     transcribe_audio(
         args.input_audio,
         model_name=args.model,
         device=args.device,
+        cpu_threads=args.cpu_threads,
         out_path=args.out,
         beam_size=args.beam_size,
+        preset=args.preset,
         language=args.language,
+        formats=args.formats,
+        word_timestamps=args.word_timestamps,
+        engine=args.engine,
     )
 
 
@@ -0,0 +1,215 @@
+"""
+ batch_pipeline.py – пакетная транскрибация с упреждающим декодированием.
+
+ Пока модель распознаёт текущий файл, фоновый поток уже декодирует и
+ ресемплирует следующие *prefetch* файлов в память.  Буфер ограничен и по
+ числу файлов, и по байтам, поэтому длинные записи не съедают всю память.
+
+ Использование::
+
+     runner = PrefetchingBatchRunner(model, prefetch=2)
+     for audio, result in runner.run(paths):
+         print(audio, result)
+
+ или из CLI::
+
+     python batch_pipeline.py a.mp3 b.mp3 c.mp3 --model large-v3 --prefetch 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from audio2text import load_model, transcribe_audio
+
+__all__ = ["PrefetchingBatchRunner", "BatchStats", "decode_file"]
+
+SAMPLE_RATE = 16000
+
+
+def decode_file(path: Union[str, Path]):
+    """Decode *path* to 16 kHz mono float32 with Faster‑Whisper's decoder."""
+    from faster_whisper import decode_audio
+
+    return decode_audio(str(path), sampling_rate=SAMPLE_RATE)
+
+
+@dataclass
+class BatchStats:
+    """Timing of the last :meth:`PrefetchingBatchRunner.run`."""
+
+    files: int = 0
+    decode_seconds: float = 0.0
+    infer_seconds: float = 0.0
+    wait_seconds: float = 0.0        # модель простаивала в ожидании декодера
+    wall_seconds: float = 0.0
+    peak_buffered_bytes: int = 0
+
+    @property
+    def hidden_decode_ratio(self) -> float:
+        """Share of decode time overlapped with inference (1.0 – fully hidden)."""
+        if not self.decode_seconds:
+            return 1.0
+        return max(0.0, 1.0 - self.wait_seconds / self.decode_seconds)
+
+
+class PrefetchingBatchRunner:
+    """Transcribe files one after another while decoding the next ones ahead.
+
+    Parameters
+    ----------
+    model : WhisperModel | None
+        Model to use; loaded through :func:`audio2text.load_model` if ``None``.
+    prefetch : int, default 2
+        Maximum number of decoded files waiting for the model.
+    max_buffer_bytes : int, default 512 MiB
+        The decoder does not start another file while this many bytes of
+        decoded audio are waiting.  A single file larger than the limit is
+        still processed, just without read-ahead.
+    decoder : Callable[[Path], numpy.ndarray]
+        Decoding function; :func:`decode_file` by default.
+    **transcribe_kwargs
+        Passed to :func:`audio2text.transcribe_audio` for every file.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        *,
+        model_name: str = "large-v3",
+        device: str = "cuda",
+        prefetch: int = 2,
+        max_buffer_bytes: int = 512 * 1024 * 1024,
+        decoder: Callable = decode_file,
+        **transcribe_kwargs,
+    ) -> None:
+        self.model = model or load_model(model_name, device)
+        self.prefetch = max(1, prefetch)
+        self.max_buffer_bytes = max_buffer_bytes
+        self.decoder = decoder
+        self.transcribe_kwargs = transcribe_kwargs
+        self.stats = BatchStats()
+        self._buffered = 0
+        self._cond = threading.Condition()
+
+    def run(
+        self,
+        paths: Iterable[Union[str, Path]],
+        out_folder: Optional[Union[str, Path]] = None,
+    ) -> Iterator[tuple]:
+        """Yield ``(audio_path, transcript_path | Exception)`` in input order."""
+        paths = [Path(p).expanduser().resolve() for p in paths]
+        if out_folder:
+            Path(out_folder).mkdir(parents=True, exist_ok=True)
+        self.stats = BatchStats(files=len(paths))
+        ready: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        started = time.perf_counter()
+
+        producer = threading.Thread(target=self._produce, args=(paths, ready, stop), daemon=True)
+        producer.start()
+        try:
+            for _ in paths:
+                t0 = time.perf_counter()
+                path, audio, nbytes = ready.get()
+                self.stats.wait_seconds += time.perf_counter() - t0
+                try:
+                    if isinstance(audio, Exception):
+                        yield path, audio
+                        continue
+                    out_path = Path(out_folder) / (path.stem + ".txt") if out_folder else None
+                    t0 = time.perf_counter()
+                    try:
+                        result = transcribe_audio(
+                            path, model=self.model, audio=audio, out_path=out_path, **self.transcribe_kwargs
+                        )
+                    except Exception as exc:
+                        result = exc
+                    self.stats.infer_seconds += time.perf_counter() - t0
+                finally:
+                    del audio
+                    self._release(nbytes)
+                yield path, result
+        finally:
+            stop.set()
+            with self._cond:
+                self._cond.notify_all()
+            # Разблокируем производителя, если он ждёт места в очереди.
+            while producer.is_alive():
+                try:
+                    ready.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            self._buffered = 0
+            self.stats.wall_seconds = time.perf_counter() - started
+
+    def _produce(self, paths: list, ready: queue.Queue, stop: threading.Event) -> None:
+        for path in paths:
+            with self._cond:
+                self._cond.wait_for(lambda: stop.is_set() or self._buffered < self.max_buffer_bytes)
+            if stop.is_set():
+                return
+            t0 = time.perf_counter()
+            try:
+                audio = self.decoder(path)
+                nbytes = int(getattr(audio, "nbytes", 0))
+            except Exception as exc:
+                audio, nbytes = exc, 0
+            self.stats.decode_seconds += time.perf_counter() - t0
+            with self._cond:
+                self._buffered += nbytes
+                self.stats.peak_buffered_bytes = max(self.stats.peak_buffered_bytes, self._buffered)
+            while not stop.is_set():
+                try:
+                    ready.put((path, audio, nbytes), timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            del audio
+
+    def _release(self, nbytes: int) -> None:
+        with self._cond:
+            self._buffered -= nbytes
+            self._cond.notify_all()
+
+
+# ---------------------------------------------------------------------------
+# CLI wrapper
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:  # pragma: no cover – CLI only
+    p = argparse.ArgumentParser(prog="batch_pipeline", description="Batch transcription with decode-ahead")
+    p.add_argument("inputs", nargs="+", help="Audio files")
+    p.add_argument("--model", default="large-v3", help="HF model name or local dir")
+    p.add_argument("--device", default="cuda", choices=["cuda", "cpu"], help="Device to run on")
+    p.add_argument("--out_dir", help="Folder for transcripts (default: next to audio)")
+    p.add_argument("--prefetch", type=int, default=2, help="Files decoded ahead")
+    p.add_argument("--max_buffer_mb", type=int, default=512, help="Decoded audio kept in memory")
+    p.add_argument("--language", default="ru", help="ISO code or auto")
+    args = p.parse_args()
+
+    runner = PrefetchingBatchRunner(
+        model_name=args.model,
+        device=args.device,
+        prefetch=args.prefetch,
+        max_buffer_bytes=args.max_buffer_mb * 1024 * 1024,
+        language=args.language,
+    )
+    for audio, result in runner.run(args.inputs, args.out_dir):
+        print(f"{audio.name}: {result}")
+    s = runner.stats
+    print(
+        f"decode {s.decode_seconds:.1f}s, inference {s.infer_seconds:.1f}s, "
+        f"model idle {s.wait_seconds:.1f}s, wall {s.wall_seconds:.1f}s"
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,84 @@
+"""
+ bench_concurrency.py – суммарная пропускная способность транскрибации при
+ 1, 2, 4 и 8 параллельных задачах с бюджетами потоков от ResourceScheduler
+ и без них (каждая задача берёт все ядра).
+
+ Запуск::
+
+     python benchmarks/bench_concurrency.py clip.wav --model small --device cpu
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from audio2text import transcribe_audio  # noqa: E402
+from resource_scheduler import ResourceScheduler  # noqa: E402
+
+
+def _audio_seconds(path: str) -> float:
+    from faster_whisper import decode_audio
+
+    return len(decode_audio(path)) / 16000
+
+
+def run(audio: str, model_name: str, device: str, jobs: int, threads: int) -> float:
+    """Run *jobs* concurrent transcriptions and return wall time in seconds."""
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(
+        model_name,
+        device=device,
+        compute_type="int8_float16" if device == "cuda" else "int8",
+        cpu_threads=threads,
+        num_workers=jobs,
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        workers = [
+            threading.Thread(
+                target=transcribe_audio,
+                args=(audio,),
+                kwargs=dict(model=model, out_path=os.path.join(tmp, f"{i}.txt")),
+            )
+            for i in range(jobs)
+        ]
+        started = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("audio", help="Benchmark clip")
+    p.add_argument("--model", default="small")
+    p.add_argument("--device", default="cpu", choices=["cuda", "cpu"])
+    p.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = p.parse_args()
+
+    seconds = _audio_seconds(args.audio)
+    sched = ResourceScheduler()
+    cores = sched.total_cores
+    print(f"cores={cores} clip={seconds:.1f}s model={args.model} device={args.device}")
+    print(f"{'jobs':>4} {'mode':>10} {'threads/job':>11} {'wall, s':>8} {'audio s / s':>11}")
+    for jobs in args.jobs:
+        for mode, threads in (
+            ("scheduled", sched.transcription_threads(jobs)),
+            ("naive", cores),
+        ):
+            wall = run(args.audio, args.model, args.device, jobs, threads)
+            print(f"{jobs:>4} {mode:>10} {threads:>11} {wall:>8.2f} {jobs * seconds / wall:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+ bench_model_load.py – холодная загрузка модели: имя через Hugging Face Hub
+ против каталога из локального реестра (:mod:`model_registry`).
+
+ Каждая загрузка выполняется в новом процессе, чтобы не мешал кэш
+ ``load_model``; страничный кэш ОС при этом остаётся, поэтому первая
+ строка каждой конфигурации – самая «холодная».  Отдельно меряется
+ стоимость :func:`model_registry.resolve_model` на горячем пути.
+
+ Запуск::
+
+     python benchmarks/bench_model_load.py small --device cpu --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from model_registry import default_registry, resolve_model  # noqa: E402
+
+
+def _child(source: str, device: str) -> None:
+    started = time.perf_counter()
+    from faster_whisper import WhisperModel
+
+    imported = time.perf_counter()
+    WhisperModel(source, device=device, compute_type="int8_float16" if device == "cuda" else "int8")
+    loaded = time.perf_counter()
+    print(json.dumps({"import": imported - started, "load": loaded - imported}))
+
+
+def _measure(source: str, device: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", source, "--device", device],
+        stdout=subprocess.PIPE, check=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("model", nargs="?", default="small", help="Model name")
+    p.add_argument("--device", default="cpu", choices=["cuda", "cpu"])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--child", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.child:
+        _child(args.child, args.device)
+        return
+
+    registry = default_registry()
+    local = registry.path(args.model)
+    configs = [("hub", args.model)]
+    if local is not None:
+        configs.append(("registry", str(local)))
+    else:
+        print(f"{args.model} нет в реестре {registry.root} – меряем только загрузку через hub")
+
+    print(f"{'source':<9} {'run':>3} {'import, s':>9} {'load, s':>8}")
+    for label, source in configs:
+        for run in range(1, args.repeat + 1):
+            r = _measure(source, args.device)
+            print(f"{label:<9} {run:>3} {r['import']:9.3f} {r['load']:8.3f}")
+
+    n = 1000
+    started = time.perf_counter()
+    for _ in range(n):
+        resolve_model(args.model, registry, offline=False)
+    print(f"resolve_model: {(time.perf_counter() - started) / n * 1e6:.1f} µs per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+ bench_prefetch.py – насколько упреждающее декодирование прячет время
+ декодирования за инференсом.
+
+ Движок-заглушка (:class:`engines.StubEngine`) «распознаёт» аудио с заданным
+ RTF, декодирование настоящее (Faster‑Whisper / PyAV), так что измеряется
+ только работа конвейера.
+
+ Запуск::
+
+     python benchmarks/bench_prefetch.py a.mp3 b.mp3 c.mp3 --rtf 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from batch_pipeline import PrefetchingBatchRunner  # noqa: E402
+from engines import StubEngine  # noqa: E402
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("inputs", nargs="+", help="Audio files")
+    p.add_argument("--rtf", type=float, default=0.1, help="Simulated inference real-time factor")
+    p.add_argument("--prefetch", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = p.parse_args()
+
+    print(f"{'prefetch':>8} {'decode, s':>9} {'infer, s':>8} {'idle, s':>7} {'wall, s':>7} {'hidden':>6}")
+    for prefetch in args.prefetch:
+        runner = PrefetchingBatchRunner(StubEngine(rtf=args.rtf), prefetch=max(prefetch, 1))
+        with tempfile.TemporaryDirectory() as tmp:
+            if prefetch == 0:
+                # Базовая линия: декодирование и инференс строго по очереди.
+                started = time.perf_counter()
+                decode = infer = 0.0
+                for path in args.inputs:
+                    t0 = time.perf_counter()
+                    audio = runner.decoder(path)
+                    t1 = time.perf_counter()
+                    for _ in runner.model.transcribe(audio)[0]:
+                        pass
+                    decode += t1 - t0
+                    infer += time.perf_counter() - t1
+                wall = time.perf_counter() - started
+                print(f"{0:>8} {decode:>9.2f} {infer:>8.2f} {decode:>7.2f} {wall:>7.2f} {0:>6.0%}")
+                continue
+            for _ in runner.run(args.inputs, tmp):
+                pass
+        s = runner.stats
+        print(
+            f"{prefetch:>8} {s.decode_seconds:>9.2f} {s.infer_seconds:>8.2f} {s.wait_seconds:>7.2f} "
+            f"{s.wall_seconds:>7.2f} {s.hidden_decode_ratio:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
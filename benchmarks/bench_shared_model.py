@@ -0,0 +1,91 @@
+"""
+ bench_shared_model.py – пиковая память против пропускной способности:
+ N одновременных транскрибаций на одной модели (``num_workers=N``) против
+ N отдельных копий модели.
+
+ Каждая конфигурация выполняется в отдельном процессе, чтобы ``ru_maxrss``
+ отражал только её.
+
+ Запуск::
+
+     python benchmarks/bench_shared_model.py clip.wav --model small --device cpu
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _child(audio: str, model_name: str, device: str, workers: int, mode: str) -> None:
+    import os
+    import resource
+    import threading
+
+    from faster_whisper import WhisperModel, decode_audio
+
+    from audio2text import transcribe_audio
+    from resource_scheduler import ResourceScheduler
+    from shared_model import SharedModelExecutor
+
+    threads = ResourceScheduler().transcription_threads(workers)
+    compute_type = "int8_float16" if device == "cuda" else "int8"
+    seconds = len(decode_audio(audio)) / 16000
+    with tempfile.TemporaryDirectory() as tmp:
+        outs = [os.path.join(tmp, f"{i}.txt") for i in range(workers)]
+        started = time.perf_counter()
+        if mode == "shared":
+            model = WhisperModel(model_name, device=device, compute_type=compute_type,
+                                 cpu_threads=threads, num_workers=workers)
+            with SharedModelExecutor(workers=workers, model=model) as pool:
+                for f in [pool.submit(audio, out_path=o) for o in outs]:
+                    f.result()
+        else:
+            models = [WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=threads)
+                      for _ in range(workers)]
+            jobs = [threading.Thread(target=transcribe_audio, args=(audio,), kwargs=dict(model=m, out_path=o))
+                    for m, o in zip(models, outs)]
+            for j in jobs:
+                j.start()
+            for j in jobs:
+                j.join()
+        wall = time.perf_counter() - started
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(json.dumps({"wall": wall, "rss_mb": rss / 1024, "audio_s": seconds * workers}))
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("audio", help="Benchmark clip")
+    p.add_argument("--model", default="small")
+    p.add_argument("--device", default="cpu", choices=["cuda", "cpu"])
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--child", choices=["shared", "copies"], help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.child:
+        _child(args.audio, args.model, args.device, args.workers[0], args.child)
+        return
+
+    print(f"{'workers':>7} {'mode':>7} {'peak RSS, MB':>12} {'wall, s':>8} {'audio s / s':>11}")
+    for workers in args.workers:
+        for mode in ("shared", "copies"):
+            out = subprocess.run(
+                [sys.executable, __file__, args.audio, "--model", args.model, "--device", args.device,
+                 "--workers", str(workers), "--child", mode],
+                check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1]
+            r = json.loads(out)
+            print(f"{workers:>7} {mode:>7} {r['rss_mb']:>12.0f} {r['wall']:>8.2f} {r['audio_s'] / r['wall']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
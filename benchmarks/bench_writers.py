@@ -0,0 +1,82 @@
+"""
+ bench_writers.py – накладные расходы записи транскрипта на сегмент.
+
+ Синтетические сегменты (с пословными метками или без) пишутся каждым
+ форматом отдельно и всеми форматами за один проход.  Для сравнения –
+ старая запись ``fp.write(format_segment(seg))``.
+
+ Запуск::
+
+     python benchmarks/bench_writers.py --segments 100000 --words
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from transcript_writers import WRITERS, open_writers  # noqa: E402
+
+
+def make_segments(count: int, words: bool) -> list:
+    segments = []
+    for i in range(count):
+        start = i * 2.5
+        seg = types.SimpleNamespace(start=start, end=start + 2.0, text=" раз два три четыре пять шесть")
+        if words:
+            seg.words = [
+                types.SimpleNamespace(start=start + k * 0.3, end=start + k * 0.3 + 0.25, word=f" w{k}", probability=0.9)
+                for k in range(6)
+            ]
+        segments.append(seg)
+    return segments
+
+
+def _txt_baseline(path: Path, segments: list) -> None:
+    def ts(t):
+        return f"{int(t // 3600):02d}:{int((t % 3600) // 60):02d}:{t % 60:06.3f}"
+
+    with open(path, "w", encoding="utf-8") as fp:
+        for seg in segments:
+            fp.write(f"[{ts(seg.start)} --> {ts(seg.end)}] {seg.text.strip()}\n")
+
+
+def _write_all(base: Path, segments: list, formats: tuple) -> None:
+    with open_writers(base, formats) as out:
+        for seg in segments:
+            out.write(seg)
+
+
+def _timed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--segments", type=int, default=100_000)
+    p.add_argument("--words", action="store_true", help="Attach 6 word timings to every segment")
+    p.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+    args = p.parse_args()
+
+    segments = make_segments(args.segments, args.words)
+    cases = [(fmt,) for fmt in WRITERS] + [tuple(WRITERS)]
+    print(f"{'formats':<18} {'µs/segment':>10} {'total, s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "bench.txt"
+        baseline = min(_timed(_txt_baseline, base, segments) for _ in range(args.repeat))
+        print(f"{'txt (baseline)':<18} {baseline / len(segments) * 1e6:10.2f} {baseline:8.3f}")
+        for formats in cases:
+            seconds = min(_timed(_write_all, base, segments, formats) for _ in range(args.repeat))
+            print(f"{'+'.join(formats):<18} {seconds / len(segments) * 1e6:10.2f} {seconds:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+ decoding_presets.py – именованные режимы скорость/качество для
+ Faster‑Whisper и адаптивная политика выбора режима по нагрузке.
+
+ ``fast``      – жадное декодирование, без повторов по температуре;
+ ``balanced``  – beam 5, короткая лестница температур;
+ ``accurate``  – широкий beam и полная лестница температур.
+
+ Реальный коэффициент скорости (RTF = время обработки / длительность аудио)
+ зависит от машины, поэтому он измеряется командой::
+
+     python decoding_presets.py calibrate clip.wav --model large-v3 --device cuda
+
+ и сохраняется в ``~/.cache/sounddraftico/preset_rtf.json``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Optional, Union
+
+__all__ = [
+    "DecodingPreset",
+    "PRESETS",
+    "get_preset",
+    "calibrate_presets",
+    "measured_rtf",
+    "AdaptivePresetPolicy",
+]
+
+CALIBRATION_FILE = Path(
+    os.environ.get("SOUNDDRAFTICO_CACHE", Path.home() / ".cache" / "sounddraftico")
+) / "preset_rtf.json"
+
+
+@dataclass(frozen=True)
+class DecodingPreset:
+    """Bundle of decoding options passed to ``WhisperModel.transcribe``."""
+
+    name: str
+    beam_size: int
+    best_of: int
+    temperature: tuple
+    vad_filter: bool = True
+    vad_parameters: Optional[dict] = field(default=None, hash=False)
+    rtf: Optional[float] = None
+
+    def transcribe_kwargs(self) -> dict:
+        kwargs = dict(
+            beam_size=self.beam_size,
+            best_of=self.best_of,
+            temperature=list(self.temperature),
+            vad_filter=self.vad_filter,
+        )
+        if self.vad_parameters:
+            kwargs["vad_parameters"] = dict(self.vad_parameters)
+        return kwargs
+
+
+PRESETS = {
+    "fast": DecodingPreset(
+        "fast",
+        beam_size=1,
+        best_of=1,
+        temperature=(0.0,),
+        # Агрессивнее режем паузы – меньше аудио уходит в декодер.
+        vad_parameters={"min_silence_duration_ms": 500},
+    ),
+    "balanced": DecodingPreset(
+        "balanced",
+        beam_size=5,
+        best_of=5,
+        temperature=(0.0, 0.2, 0.4),
+    ),
+    "accurate": DecodingPreset(
+        "accurate",
+        beam_size=8,
+        best_of=5,
+        temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        vad_parameters={"min_silence_duration_ms": 2000, "speech_pad_ms": 600},
+    ),
+}
+
+
+def _host_key() -> str:
+    return f"{platform.node()}/{os.cpu_count()}"
+
+
+def measured_rtf(model_name: str, path: Union[str, Path, None] = None) -> dict:
+    """Return ``{preset: rtf}`` calibrated on this machine for *model_name*."""
+    path = Path(path or CALIBRATION_FILE)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get(_host_key(), {}).get(model_name, {})
+
+
+def get_preset(name: str, model_name: Optional[str] = None) -> DecodingPreset:
+    """Look up a preset, filling :attr:`DecodingPreset.rtf` if calibrated."""
+    try:
+        preset = PRESETS[name]
+    except KeyError:
+        raise ValueError(f"unknown preset {name!r}; expected one of {sorted(PRESETS)}") from None
+    if model_name:
+        rtf = measured_rtf(model_name).get(name)
+        if rtf is not None:
+            preset = replace(preset, rtf=rtf)
+    return preset
+
+
+def calibrate_presets(
+    model,
+    clip: Union[str, Path],
+    *,
+    model_name: str,
+    language: str = "ru",
+    presets=None,
+    path: Union[str, Path, None] = None,
+) -> dict:
+    """Measure the real-time factor of each preset on *clip* and store it.
+
+    Returns ``{preset: rtf}``; values below 1 mean faster than real time.
+    """
+    results = {}
+    for name in presets or PRESETS:
+        preset = PRESETS[name]
+        started = time.perf_counter()
+        segments, info = model.transcribe(
+            str(clip), language=None if language == "auto" else language, **preset.transcribe_kwargs()
+        )
+        for _ in segments:  # инференс ленивый – прогоняем до конца
+            pass
+        elapsed = time.perf_counter() - started
+        results[name] = elapsed / max(getattr(info, "duration", 0.0) or 0.0, 1e-9)
+
+    path = Path(path or CALIBRATION_FILE)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        data = {}
+    data.setdefault(_host_key(), {})[model_name] = results
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return results
+
+
+class AdaptivePresetPolicy:
+    """Step decoding quality down under load and back up when it drains.
+
+    Each :meth:`choose` call (one per job start) moves at most one step along
+    *ladder*: towards the fastest preset while the queue depth or waiting
+    time is at or above the high thresholds, back towards the first preset
+    once both are at or below the low ones.  The gap between the thresholds
+    prevents flapping.
+    """
+
+    def __init__(
+        self,
+        ladder=("balanced", "fast"),
+        *,
+        queue_high: int = 4,
+        queue_low: int = 1,
+        wait_high: float = 120.0,
+        wait_low: float = 15.0,
+    ) -> None:
+        for name in ladder:
+            get_preset(name)
+        self.ladder = tuple(ladder)
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.wait_high = wait_high
+        self.wait_low = wait_low
+        self.level = 0
+
+    @property
+    def current(self) -> str:
+        return self.ladder[self.level]
+
+    def choose(self, queue_depth: int, waited: float = 0.0) -> str:
+        """Return the preset for the job starting now."""
+        if queue_depth >= self.queue_high or waited >= self.wait_high:
+            self.level = min(self.level + 1, len(self.ladder) - 1)
+        elif queue_depth <= self.queue_low and waited <= self.wait_low:
+            self.level = max(self.level - 1, 0)
+        return self.current
+
+
+# ---------------------------------------------------------------------------
+# CLI wrapper
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:  # pragma: no cover – CLI only
+    p = argparse.ArgumentParser(prog="decoding_presets", description="Decoding preset tools")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    cal = sub.add_parser("calibrate", help="Measure real-time factor of each preset")
+    cal.add_argument("clip", help="Representative audio clip")
+    cal.add_argument("--model", default="large-v3", help="HF model name or local dir")
+    cal.add_argument("--device", default="cuda", choices=["cuda", "cpu"], help="Device to run on")
+    cal.add_argument("--language", default="ru", help="ISO code or auto")
+    sub.add_parser("show", help="Print presets with stored RTF").add_argument("--model", default="large-v3")
+    args = p.parse_args()
+
+    if args.cmd == "calibrate":
+        from audio2text import load_model
+
+        results = calibrate_presets(
+            load_model(args.model, args.device), args.clip, model_name=args.model, language=args.language
+        )
+    else:
+        results = measured_rtf(args.model)
+    for name, preset in PRESETS.items():
+        rtf = results.get(name)
+        rtf_txt = f"{rtf:.3f}" if rtf is not None else "n/a"
+        print(f"{name:>9}  beam={preset.beam_size} best_of={preset.best_of} rtf={rtf_txt}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
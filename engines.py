@@ -0,0 +1,405 @@
+"""
+ engines.py – интерфейс движков распознавания и выбор движка по замеру.
+
+ Движок загружается через :meth:`ASREngine.load` и распознаёт методом
+ :meth:`ASREngine.transcribe` с той же сигнатурой, что у
+ ``WhisperModel.transcribe``: ленивый поток сегментов и ``info``.  Что
+ движок умеет, описывает :attr:`ASREngine.capabilities`.  Есть две
+ реализации:
+
+ * :class:`FasterWhisperEngine` – обёртка над ``faster_whisper`` (пакет
+   импортируется только при загрузке);
+ * :class:`StubEngine` – детерминированная заглушка без зависимостей для
+   тестов и бенчмарков конвейера.
+
+ :func:`select_engine` прогоняет эталонный клип через каждый установленный
+ движок и выбирает самый быстрый, чья ошибка (WER) не выше порога.
+
+ Использование::
+
+     model = get_engine("stub").load()
+     segments, info = model.transcribe("clip.wav", word_timestamps=True)
+
+ или из CLI::
+
+     python engines.py clip.wav reference.txt --model small --device cpu
+"""
+
+from __future__ import annotations
+
+import abc
+import argparse
+import inspect
+import json
+import math
+import re
+import subprocess
+import time
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterable, Optional
+
+from ffmpeg_core import FFPROBE_BINARY
+
+__all__ = [
+    "ASREngine",
+    "FasterWhisperEngine",
+    "StubEngine",
+    "ENGINES",
+    "register_engine",
+    "get_engine",
+    "available_engines",
+    "supports",
+    "word_error_rate",
+    "EngineResult",
+    "benchmark_engine",
+    "select_engine",
+]
+
+SAMPLE_RATE = 16000
+
+# Возможности движков
+PROGRESS = "progress"                    # progress_callback в transcribe()
+WORD_TIMESTAMPS = "word_timestamps"
+VAD = "vad"
+LANGUAGE_DETECT = "language_detect"
+
+
+class ASREngine(abc.ABC):
+    """Base class of speech recognition engines."""
+
+    name = ""
+    capabilities: frozenset = frozenset()
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the engine's dependencies are installed."""
+        return True
+
+    @classmethod
+    @abc.abstractmethod
+    def load(cls, model_name: str = "large-v3", device: str = "cpu", cpu_threads: int = 0, num_workers: int = 1):
+        """Load *model_name* and return a ready engine instance."""
+
+    @abc.abstractmethod
+    def transcribe(self, audio, **options):
+        """Return ``(segments, info)``; *segments* is a lazy iterator."""
+
+
+class FasterWhisperEngine(ASREngine):
+    """``faster_whisper.WhisperModel`` behind the engine interface."""
+
+    name = "faster-whisper"
+
+    def __init__(self, model) -> None:
+        self.model = model
+        params = inspect.signature(model.transcribe).parameters
+        caps = {VAD, LANGUAGE_DETECT}
+        # старые версии faster_whisper не знают progress_callback
+        if "progress_callback" in params:
+            caps.add(PROGRESS)
+        if "word_timestamps" in params or any(p.kind is p.VAR_KEYWORD for p in params.values()):
+            caps.add(WORD_TIMESTAMPS)
+        self.capabilities = frozenset(caps)
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import faster_whisper  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @classmethod
+    def load(cls, model_name: str = "large-v3", device: str = "cpu", cpu_threads: int = 0, num_workers: int = 1):
+        from faster_whisper import WhisperModel
+
+        from model_registry import resolve_model
+
+        path = resolve_model(model_name)
+        source = "" if path == model_name else f" ({path})"
+        print(f"Загружаем модель {model_name} на {device}{source}…")
+        return cls(
+            WhisperModel(
+                path,
+                device=device,
+                compute_type="int8_float16" if device == "cuda" else "int8",
+                cpu_threads=cpu_threads,
+                num_workers=num_workers,
+            )
+        )
+
+    def transcribe(self, audio, **options):
+        return self.model.transcribe(audio, **options)
+
+    def __getattr__(self, item):
+        # остальные атрибуты WhisperModel (feature_extractor, …) – как раньше
+        if item == "model":
+            raise AttributeError(item)
+        return getattr(self.model, item)
+
+
+def _audio_seconds(audio) -> float:
+    """Duration of a PCM array or an audio file.
+
+    PCM wav is read directly; other files are measured with ffprobe.
+
+    Raises
+    ------
+    ValueError
+        If the duration of a non-wav file cannot be probed.
+    """
+    if hasattr(audio, "__len__") and not isinstance(audio, (str, bytes, Path)):
+        return len(audio) / SAMPLE_RATE
+    path = Path(audio)
+    if path.suffix.lower() == ".wav":
+        try:
+            with wave.open(str(path)) as wf:
+                return wf.getnframes() / wf.getframerate()
+        except (wave.Error, EOFError):
+            pass    # не PCM (float, …) – спросим ffprobe
+    try:
+        out = subprocess.run(
+            [FFPROBE_BINARY, "-v", "error", "-show_entries", "format=duration", "-of", "json", str(path)],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True,
+        ).stdout
+        return float(json.loads(out)["format"]["duration"])
+    except (OSError, subprocess.CalledProcessError, ValueError, KeyError, TypeError) as exc:
+        raise ValueError(f"cannot probe the duration of {path} (pass a PCM wav or install ffprobe)") from exc
+
+
+class StubEngine(ASREngine):
+    """Deterministic engine without dependencies.
+
+    Emits one segment per *segment_seconds* of audio with text from
+    *script* (cycled) or ``"сегмент N"``.  With *rtf* > 0 it sleeps to
+    simulate inference speed.
+    """
+
+    name = "stub"
+    capabilities = frozenset({PROGRESS, WORD_TIMESTAMPS})
+
+    def __init__(self, script: Optional[list] = None, *, segment_seconds: float = 2.0, rtf: float = 0.0) -> None:
+        self.script = list(script or [])
+        self.segment_seconds = segment_seconds
+        self.rtf = rtf
+
+    @classmethod
+    def load(cls, model_name: str = "stub", device: str = "cpu", cpu_threads: int = 0, num_workers: int = 1):
+        return cls()
+
+    def transcribe(self, audio, *, language=None, word_timestamps=False, progress_callback=None, **options):
+        duration = _audio_seconds(audio)
+        count = math.ceil(duration / self.segment_seconds) if duration > 0 else 0
+
+        def segments():
+            for i in range(count):
+                start = i * self.segment_seconds
+                end = min(start + self.segment_seconds, duration)
+                if self.rtf:
+                    time.sleep((end - start) * self.rtf)
+                text = self.script[i % len(self.script)] if self.script else f"сегмент {i + 1}"
+                words = None
+                if word_timestamps:
+                    tokens = text.split()
+                    step = (end - start) / max(len(tokens), 1)
+                    words = [
+                        SimpleNamespace(start=start + k * step, end=start + (k + 1) * step, word=" " + w, probability=1.0)
+                        for k, w in enumerate(tokens)
+                    ]
+                if progress_callback:
+                    progress_callback(SimpleNamespace(elapsed=end, total=duration, segments_done=i + 1, step=1))
+                yield SimpleNamespace(start=start, end=end, text=" " + text, words=words)
+
+        info = SimpleNamespace(duration=duration, duration_after_vad=duration, language=language or "ru")
+        return segments(), info
+
+
+ENGINES = {cls.name: cls for cls in (FasterWhisperEngine, StubEngine)}
+
+
+def register_engine(cls: type) -> type:
+    """Add an :class:`ASREngine` subclass to :data:`ENGINES` (usable as decorator).
+
+    Raises
+    ------
+    TypeError
+        If *cls* still has abstract methods.
+    """
+    if inspect.isabstract(cls):
+        missing = ", ".join(sorted(cls.__abstractmethods__))
+        raise TypeError(f"engine {cls.__name__} does not implement {missing}")
+    ENGINES[cls.name] = cls
+    return cls
+
+
+def get_engine(name: str) -> type:
+    """Engine class registered as *name*.
+
+    Raises
+    ------
+    ValueError
+        If no engine has this name.
+    """
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"unknown engine {name!r}; expected one of {sorted(ENGINES)}") from None
+
+
+def available_engines() -> list[str]:
+    return [name for name, cls in ENGINES.items() if cls.available()]
+
+
+def supports(model, capability: str) -> bool:
+    """Whether *model* (an engine or a bare ``WhisperModel``-like object) has *capability*."""
+    caps = getattr(model, "capabilities", None)
+    if caps is not None:
+        return capability in caps
+    if capability == PROGRESS:
+        return "progress_callback" in inspect.signature(model.transcribe).parameters
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Benchmark-driven selection
+# ---------------------------------------------------------------------------
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = _WORD_RE.findall(reference.lower())
+    hyp = _WORD_RE.findall(hypothesis.lower())
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+@dataclass
+class EngineResult:
+    """Measurements of one engine on the benchmark clip."""
+
+    engine: str
+    load_seconds: float = 0.0
+    transcribe_seconds: float = 0.0
+    audio_seconds: float = 0.0
+    wer: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def rtf(self) -> Optional[float]:
+        if not self.audio_seconds or self.error:
+            return None
+        return self.transcribe_seconds / self.audio_seconds
+
+
+def benchmark_engine(
+    name: str, clip, reference: str, *, model_name: str = "large-v3", device: str = "cpu", **options
+) -> EngineResult:
+    """Load engine *name*, transcribe *clip* and score it against *reference*."""
+    result = EngineResult(name)
+    try:
+        t0 = time.perf_counter()
+        model = get_engine(name).load(model_name, device)
+        result.load_seconds = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        segments, info = model.transcribe(str(clip) if isinstance(clip, Path) else clip, **options)
+        text = " ".join(seg.text.strip() for seg in segments)
+        result.transcribe_seconds = time.perf_counter() - t0
+    except Exception as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+        return result
+    result.audio_seconds = float(getattr(info, "duration", 0.0) or 0.0) or _audio_seconds(clip)
+    result.wer = word_error_rate(reference, text)
+    return result
+
+
+def select_engine(
+    clip,
+    reference: str,
+    *,
+    engines: Optional[Iterable[str]] = None,
+    max_wer: float = 0.25,
+    model_name: str = "large-v3",
+    device: str = "cpu",
+    **options,
+) -> tuple[str, list]:
+    """Pick the fastest engine whose WER on *clip* is at most *max_wer*.
+
+    Parameters
+    ----------
+    clip : str | Path | numpy.ndarray
+        Benchmark audio (16 kHz mono samples or a file).
+    reference : str
+        Correct transcript of *clip*.
+    engines : Iterable[str] | None
+        Candidates; all :func:`available_engines` by default.
+
+    Returns
+    -------
+    tuple[str, list[EngineResult]]
+        Chosen engine name and the measurements of all candidates.
+
+    Raises
+    ------
+    LookupError
+        If no engine meets the quality floor.
+    """
+    names = list(engines) if engines is not None else available_engines()
+    results = [
+        benchmark_engine(name, clip, reference, model_name=model_name, device=device, **options)
+        for name in names
+    ]
+    passing = [r for r in results if r.error is None and r.wer is not None and r.wer <= max_wer]
+    if not passing:
+        raise LookupError(f"no engine reaches WER ≤ {max_wer:.2f}: " + ", ".join(
+            f"{r.engine}={r.error or f'{r.wer:.2f}'}" for r in results
+        ))
+    return min(passing, key=lambda r: r.transcribe_seconds).engine, results
+
+
+# ---------------------------------------------------------------------------
+# CLI wrapper
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:  # pragma: no cover – CLI only
+    p = argparse.ArgumentParser(prog="engines", description="Benchmark ASR engines and pick one")
+    p.add_argument("clip", help="Benchmark audio")
+    p.add_argument("reference", help="Text file with the correct transcript")
+    p.add_argument("--engines", nargs="+", help="Candidates (default: all installed)")
+    p.add_argument("--model", default="large-v3")
+    p.add_argument("--device", default="cpu", choices=["cuda", "cpu"])
+    p.add_argument("--max_wer", type=float, default=0.25)
+    p.add_argument("--language", default="ru")
+    args = p.parse_args()
+    reference = Path(args.reference).read_text(encoding="utf-8")
+    try:
+        chosen, results = select_engine(
+            args.clip, reference, engines=args.engines, max_wer=args.max_wer,
+            model_name=args.model, device=args.device, language=args.language,
+        )
+    except LookupError as exc:
+        print(exc)
+        raise SystemExit(1)
+    print(f"{'engine':<16} {'load, s':>8} {'RTF':>6} {'WER':>6}")
+    for r in results:
+        if r.error:
+            print(f"{r.engine:<16} {r.error}")
+        else:
+            print(f"{r.engine:<16} {r.load_seconds:8.2f} {r.rtf or 0:6.3f} {r.wer:6.2f}")
+    print(f"Выбран движок: {chosen}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -4,11 +4,19 @@ import threading
 import os
 import signal
 import time
+from concurrent.futures import Future
+from proc_monitor import ProcessMonitor
+from timemap import TimeMap
+
+# Исполняемый файл ffmpeg; переопределяется переменной окружения
+# (например, для портативной сборки или тестового двойника).
+FFMPEG_BINARY = os.environ.get("SOUNDDRAFTICO_FFMPEG", "ffmpeg")
+FFPROBE_BINARY = os.environ.get("SOUNDDRAFTICO_FFPROBE", "ffprobe")
 
 def get_audio_lines():
     """Получить список доступных аудиоустройств."""
     result = subprocess.run(
-        ['ffmpeg', '-list_devices', 'true', '-f', 'dshow', '-i', 'dummy'],
+        [FFMPEG_BINARY, '-list_devices', 'true', '-f', 'dshow', '-i', 'dummy'],
         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8" 
     )
     output = result.stderr  # ffmpeg пишет устройства в stderr
@@ -21,58 +29,286 @@ def get_audio_lines():
                 audio_devices.append(match.group(1))
     return audio_devices
 
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[\d.]+)")
+# ametadata@srcN печатает отметку времени кадра и уровень источника N
+_SOURCE_TIME_RE = re.compile(r"\[ametadata@src(\d+) @ [^\]]*\]\s*frame:\S+\s+pts:\S+\s+pts_time:(-?[\d.]+)")
+_SOURCE_RMS_RE = re.compile(r"\[ametadata@src(\d+) @ [^\]]*\]\s*lavfi\.astats\.Overall\.RMS_level=(\S+)")
+
+SOURCE_MODES = ("mix", "channels", "tracks")
+# Контейнеры, в которые можно положить несколько аудиодорожек
+MULTITRACK_EXT = (".mka", ".mkv")
+
 class FFmpegProgressWatcher:
-    def __init__(self, device_name, output_file="audio.mp3", bitrate="128k"):
+    """Запись с аудиоустройства через ffmpeg с чтением прогресса.
+
+    ``silence_mode``: ``None`` – писать всё; ``"drop"`` – вырезать тишину
+    длиннее ``min_silence`` секунд; ``"compress"`` – сокращать её до
+    ``keep_silence`` секунд.  В этих режимах рядом с записью сохраняется
+    ``<файл>.timemap.json`` (см. :mod:`timemap`) для пересчёта времени.
+    Тишина, не закончившаяся к остановке, вырезается до конца записи.
+
+    ``level_meter`` (:class:`level_meter.LevelMeter`) получает вторым
+    выходом ffmpeg поток PCM для индикатора уровня – только первого
+    устройства; останавливается он после выхода ffmpeg.
+
+    ``device_name`` может быть списком устройств (например, микрофон и
+    «Stereo Mix»): все они пишутся одним процессом ffmpeg с общими
+    часами.  ``source_mode`` задаёт результат: ``"mix"`` – сведение в
+    одну дорожку, ``"channels"`` – каждый источник в свой канал (не больше
+    двух для mp3), ``"tracks"`` – отдельные дорожки (нужен ``.mka``).
+    Уровень и время каждого источника – в :meth:`get_source_progress`.
+
+    ``resource_monitor`` (:class:`proc_monitor.ProcessMonitor`) снимает
+    CPU, RSS, ввод‑вывод и дескрипторы процесса ffmpeg; по умолчанию
+    создаётся свой монитор, ``False`` отключает замеры.  Сводка – в
+    :meth:`get_resource_stats` и в ``result["resources"]`` у :meth:`stop`.
+    """
+
+    MONITOR_LABEL = "recorder"
+
+    def __init__(self, device_name, output_file="audio.mp3", bitrate="128k", threads=None,
+                 silence_mode=None, silence_threshold_db=-50, min_silence=10.0, keep_silence=1.0,
+                 level_meter=None, source_mode="mix", resource_monitor=None):
+        if silence_mode not in (None, "drop", "compress"):
+            raise ValueError(f"unknown silence_mode: {silence_mode!r}")
+        if source_mode not in SOURCE_MODES:
+            raise ValueError(f"unknown source_mode: {source_mode!r}")
+        self.devices = [device_name] if isinstance(device_name, str) else list(device_name)
+        if not self.devices:
+            raise ValueError("no capture device given")
+        if len(self.devices) > 1:
+            ext = os.path.splitext(output_file)[1].lower()
+            if source_mode == "tracks" and ext not in MULTITRACK_EXT:
+                raise ValueError(f"source_mode='tracks' needs a multi-track container {MULTITRACK_EXT}")
+            if source_mode == "tracks" and silence_mode:
+                raise ValueError("silence_mode cannot be combined with source_mode='tracks'")
+            if source_mode == "channels" and len(self.devices) > 2 and ext == ".mp3":
+                raise ValueError("mp3 holds at most two channels; use 'tracks' or 'mix'")
         self.device_name = device_name
+        self.source_mode = source_mode
         self.output_file = output_file
         self.bitrate = bitrate
+        self.threads = threads          # бюджет потоков от ResourceScheduler
+        self.silence_mode = silence_mode
+        self.silence_threshold_db = silence_threshold_db
+        self.min_silence = min_silence
+        self.keep_silence = keep_silence if silence_mode == "compress" else 0.0
+        self.level_meter = level_meter
+        self._own_monitor = resource_monitor is None
+        self.resource_monitor = ProcessMonitor() if resource_monitor is None else (resource_monitor or None)
         self.process = None
         self.is_recording = False
+        self.finalizing = False
         self._progress_thread = None
+        self._stderr_thread = None
         self.last_progress = {}
+        self.time_map = None
+        self._silence_start = None
+        self._stopped_at = None
+        self.source_progress = [
+            {"device": d, "time": 0.0, "rms_db": None} for d in self.devices
+        ]
         self._lock = threading.Lock()
 
-    def start(self):
-        """Запустить процесс записи."""
-        if self.is_recording:
-            return
-        cmd = [
-            "ffmpeg",
-            "-hide_banner",
-            "-f", "dshow",
-            "-i", f"audio={self.device_name}",
+    def _audio_filters(self):
+        """Цепочка -af: детектор тишины стоит до удаления, поэтому его
+        отметки времени – в исходной шкале записи."""
+        if not self.silence_mode:
+            return []
+        n = f"{self.silence_threshold_db}dB"
+        remove = (
+            f"silenceremove=stop_periods=-1:stop_duration={self.min_silence}:stop_threshold={n}"
+        )
+        if self.keep_silence:
+            remove += f":stop_silence={self.keep_silence}"
+        return [f"silencedetect=n={n}:d={self.min_silence}", remove]
+
+    def _filter_graph(self):
+        """-filter_complex для нескольких источников и метки выходов.
+
+        Каждый вход делится надвое: основная ветка идёт в запись, вторая
+        раз в секунду печатает уровень в stderr под именем ``srcN``."""
+        n = len(self.devices)
+        parts = []
+        for i in range(n):
+            parts.append(
+                f"[{i}:a]asplit=2[rec{i}][mon{i}];"
+                f"[mon{i}]aresample=8000,asetnsamples=n=8000,astats=metadata=1:reset=1,"
+                f"ametadata@src{i}=mode=print:key=lavfi.astats.Overall.RMS_level,anullsink"
+            )
+        inputs = "".join(f"[rec{i}]" for i in range(n))
+        if self.source_mode == "tracks":
+            return ";".join(parts), [f"[rec{i}]" for i in range(n)]
+        if self.source_mode == "mix":
+            parts.append(f"{inputs}amix=inputs={n}:duration=longest[mixed]")
+        else:
+            mono = "".join(f"[rec{i}]aformat=channel_layouts=mono[ch{i}];" for i in range(n))
+            channels = "".join(f"[ch{i}]" for i in range(n))
+            parts.append(f"{mono}{channels}amerge=inputs={n}[mixed]")
+        filters = self._audio_filters()
+        if filters:
+            parts.append(f"[mixed]{','.join(filters)}[out]")
+            return ";".join(parts), ["[out]"]
+        return ";".join(parts), ["[mixed]"]
+
+    def _build_cmd(self):
+        cmd = [FFMPEG_BINARY, "-hide_banner"]
+        for device in self.devices:
+            cmd += ["-f", "dshow", "-i", f"audio={device}"]
+        if len(self.devices) == 1:
+            filters = self._audio_filters()
+            if filters:
+                cmd += ["-af", ",".join(filters)]
+        else:
+            graph, outputs = self._filter_graph()
+            cmd += ["-filter_complex", graph]
+            for i, label in enumerate(outputs):
+                cmd += ["-map", label]
+                if len(outputs) > 1:
+                    cmd += [f"-metadata:s:a:{i}", f"title={self.devices[i]}"]
+        cmd += [
             "-c:a", "libmp3lame",
             "-b:a", self.bitrate,
+        ]
+        if self.threads:
+            cmd += ["-threads", str(self.threads)]
+        cmd += [
             "-y",
             "-progress", "-",    # Прогресс в stdout
             "-nostats",          # Не дублировать старый прогресс в stderr
             self.output_file
         ]
+        if self.level_meter:
+            # Второй выход – до фильтров тишины, чтобы видеть реальный уровень.
+            cmd += self.level_meter.output_args()
+        return cmd
+
+    def start(self):
+        """Запустить процесс записи."""
+        if self.is_recording:
+            return
+        cmd = self._build_cmd()
+        watch_stderr = bool(self.silence_mode) or len(self.devices) > 1
+        if self.silence_mode:
+            self.time_map = TimeMap(started_at=time.time())
+            self._silence_start = None
         # Запускаем ffmpeg как отдельный процесс
         self.process = subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
+            stderr=subprocess.PIPE if watch_stderr else subprocess.DEVNULL,
             stdin=subprocess.PIPE,
             text=True,
             bufsize=1,
         )
         self.is_recording = True
+        if self.level_meter:
+            self.level_meter.start()
+        pid = getattr(self.process, "pid", None)
+        if self.resource_monitor and pid:
+            self.resource_monitor.watch(pid, self.MONITOR_LABEL)
+            if self._own_monitor:
+                self.resource_monitor.start()
         self._progress_thread = threading.Thread(target=self._watch_progress, daemon=True)
         self._progress_thread.start()
+        if watch_stderr:
+            self._stderr_thread = threading.Thread(target=self._watch_stderr, daemon=True)
+            self._stderr_thread.start()
 
     def _watch_progress(self):
-        """Читает вывод ffmpeg и сохраняет статистику."""
-        while self.is_recording and self.process.poll() is None:
-            line = self.process.stdout.readline()
-            if not line:
-                break
+        """Читает вывод ffmpeg и сохраняет статистику.
+
+        Читаем до EOF: после 'q' ffmpeg печатает финальный блок с итоговыми
+        размером и длительностью."""
+        for line in iter(self.process.stdout.readline, ""):
             line = line.strip()
             if "=" in line:
                 key, value = line.split("=", 1)
                 with self._lock:
                     self.last_progress[key] = value
 
+    def _watch_stderr(self):
+        """Читает журнал ffmpeg: отметки silencedetect → карта времени,
+        строки ametadata@srcN → прогресс источников."""
+        for line in iter(self.process.stderr.readline, ""):
+            m = _SOURCE_TIME_RE.search(line)
+            if m:
+                with self._lock:
+                    self.source_progress[int(m.group(1))]["time"] = float(m.group(2))
+                continue
+            m = _SOURCE_RMS_RE.search(line)
+            if m:
+                try:
+                    rms = float(m.group(2))
+                except ValueError:
+                    continue
+                with self._lock:
+                    # -inf от astats – цифровая тишина
+                    self.source_progress[int(m.group(1))]["rms_db"] = max(rms, -96.0)
+                continue
+            if not self.silence_mode:
+                continue
+            m = _SILENCE_START_RE.search(line)
+            if m:
+                self._silence_start = max(0.0, float(m.group(1)))
+                continue
+            m = _SILENCE_END_RE.search(line)
+            if m and self._silence_start is not None:
+                with self._lock:
+                    self.time_map.add_silence(self._silence_start, float(m.group(1)), self.keep_silence)
+                self._silence_start = None
+
+    def time_map_snapshot(self):
+        """Consistent copy of the live :class:`TimeMap` (``None`` without silence cutting).
+
+        The stderr thread adds the two anchors of a silence period in one
+        step under the lock; readers in other threads must use this copy.
+        """
+        with self._lock:
+            return self.time_map.copy() if self.time_map is not None else None
+
+    def _close_open_silence(self):
+        """Тишина, которая шла до самой остановки, не получает silence_end.
+
+        Закрываем её концом записи в исходной шкале: запись с устройства
+        идёт в реальном времени, так что это время от старта до 'q'; но не
+        меньше итогового ``out_time`` плюс уже вырезанное."""
+        if self._silence_start is None:
+            return
+        out_time = self.last_progress.get("out_time", "") or ""
+        try:
+            h, m, sec = out_time.split(":")
+            out_seconds = int(h) * 3600 + int(m) * 60 + float(sec)
+        except ValueError:
+            out_seconds = 0.0
+        tm = self.time_map
+        end = out_seconds + tm.removed_seconds
+        if tm.started_at is not None and self._stopped_at is not None:
+            end = max(end, self._stopped_at - tm.started_at)
+        if end > self._silence_start:
+            tm.add_silence(self._silence_start, end, self.keep_silence)
+        self._silence_start = None
+
+    def _silence_stats(self):
+        """Сохранить карту времени и вернуть сводку по вырезанной тишине."""
+        if self._stderr_thread:
+            self._stderr_thread.join(timeout=1)
+        with self._lock:
+            self._close_open_silence()
+            tm = self.time_map
+            removed = tm.removed_seconds
+            periods = tm.periods
+        sidecar = tm.save(TimeMap.sidecar_path(self.output_file))
+        bitrate = self.bitrate.lower()
+        bps = float(bitrate[:-1]) * 1000 if bitrate.endswith("k") else float(bitrate)
+        return {
+            "periods": periods,
+            "removed_seconds": round(removed, 3),      # столько аудио не придётся распознавать
+            "saved_bytes": int(removed * bps / 8),
+            "timemap": str(sidecar),
+        }
+
     def stop(self):
         """Остановить запись и вернуть статистику."""
         if not self.is_recording:
@@ -91,6 +327,7 @@ class FFmpegProgressWatcher:
             print(f"Ошибка при отправке 'q': {e}")
 
         self.is_recording = False
+        self._stopped_at = time.time()
 
         try:
             # Ждём завершения процесса
@@ -99,6 +336,11 @@ class FFmpegProgressWatcher:
             print("FFmpeg не завершился за 5 секунд, принудительно завершаем...")
             self.process.kill()
             self.process.wait()
+        if self.level_meter:
+            # только после выхода ffmpeg – иначе второй выход получит EPIPE
+            self.level_meter.stop()
+        if self._progress_thread:
+            self._progress_thread.join(timeout=1)
 
         with self._lock:
             out_time = self.last_progress.get("out_time", "00:00:00.00") or "00:00:00.00"
@@ -106,13 +348,65 @@ class FFmpegProgressWatcher:
             speed = self.last_progress.get("speed", "0") or "0"
 
         success = os.path.exists(self.output_file) and os.path.getsize(self.output_file) > 0
-        return {
+        result = {
             "success": success,
             "output_file": self.output_file,
             "duration": out_time,
             "size_bytes": int(size) if str(size).isdigit() else 0,
             "speed": speed
         }
+        if self.silence_mode:
+            result["silence"] = self._silence_stats()
+        if len(self.devices) > 1:
+            if self._stderr_thread:
+                self._stderr_thread.join(timeout=1)
+            result["sources"] = self.get_source_progress()
+        if self.resource_monitor:
+            resources = self.get_resource_stats()
+            if resources:
+                result["resources"] = resources
+            self.resource_monitor.unwatch(self.MONITOR_LABEL)
+            if self._own_monitor:
+                self.resource_monitor.stop()
+        return result
+
+    def stop_async(self, callback=None):
+        """Остановить запись в фоновом потоке, не блокируя вызывающий.
+
+        Возвращает :class:`concurrent.futures.Future` со словарём, как у
+        :meth:`stop`.  *callback* вызывается с этим словарём из фонового
+        потока (в GUI его нужно переслать сигналом).  Пока запись
+        дописывается, :attr:`finalizing` равно ``True``.
+        """
+        future = Future()
+        if callback:
+            future.add_done_callback(lambda f: callback(f.result()))
+        self.finalizing = True
+
+        def run():
+            try:
+                result = self.stop()
+            except Exception as exc:
+                # Ошибку отдаём тем же словарём, что и stop() без записи
+                result = {"success": False, "reason": str(exc), "output_file": self.output_file}
+            self.finalizing = False
+            future.set_result(result)
+
+        threading.Thread(target=run, name="ffmpeg-finalize", daemon=True).start()
+        return future
+
+    def get_source_progress(self):
+        """Время и уровень (RMS, дБ) каждого источника: отставший или
+        молчащий вход виден сразу."""
+        with self._lock:
+            return [dict(p) for p in self.source_progress]
+
+    def get_resource_stats(self):
+        """Сводка потребления ресурсов ffmpeg (CPU, RSS, I/O, дескрипторы)
+        или ``None``, пока замеров нет."""
+        if not self.resource_monitor:
+            return None
+        return self.resource_monitor.summary(self.MONITOR_LABEL)
 
     def get_last_progress(self):
         with self._lock:
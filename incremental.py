@@ -0,0 +1,247 @@
+"""
+ incremental.py – дотранскрибация файла, который ещё пишется.
+
+ Пока идёт запись, mp3 на диске растёт.  :class:`IncrementalTranscriber`
+ помнит, до какого места запись уже стабильно распознана (точка среза и
+ длина «стабильной» части текстового файла), и при каждом вызове
+ :meth:`update` обрабатывает только новый хвост.  Последний сегмент у края
+ записи считается черновым: он дописывается в файл, но при следующем
+ вызове отрезается и распознаётся заново вместе с новым звуком.
+
+ Состояние хранится рядом с транскриптом в ``<transcript>.state.json``, так
+ что повторные «что я пропустил?» работают и между запусками программы.
+
+ Если из записи вырезалась тишина, времена сегментов переводятся в
+ исходные по :class:`timemap.TimeMap`, как в :func:`audio2text.transcribe_audio`:
+ живой карте записи (``FFmpegProgressWatcher.time_map``) или sidecar‑файлу.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from audio2text import decoding_options, load_model, remap_segment, shift_segment
+from streaming import SAMPLE_RATE, iter_pcm_windows, open_pcm_stream
+from timemap import TimeMap
+from transcript_writers import format_segment, parse_segment, write_transcript
+
+__all__ = ["IncrementalTranscriber", "decode_tail", "WINDOW_SECONDS"]
+
+# Аудио, подаваемое модели за раз при дотранскрибации хвоста
+WINDOW_SECONDS = 60.0
+
+
+def decode_tail(path: Union[str, Path], start: float) -> Iterator[np.ndarray]:
+    """Yield *path* from *start* seconds to its current end in windows of
+    :data:`WINDOW_SECONDS`; the whole tail is never held at once."""
+    proc = open_pcm_stream(path, start=start)
+    try:
+        yield from iter_pcm_windows(proc.stdout, int(WINDOW_SECONDS * SAMPLE_RATE))
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+
+
+class IncrementalTranscriber:
+    """Transcribe only the new tail of a growing recording on each call.
+
+    Parameters
+    ----------
+    input_audio : str | Path
+        Recording, possibly still being written.
+    out_path : str | Path | None
+        Transcript; ``<input_audio>.txt`` by default.
+    formats : Iterable[str], default ("txt",)
+        Must start with ``txt``: the text file is the working transcript
+        that is cut and appended to.  Other formats are rewritten from it
+        after every :meth:`update`.
+    guard_seconds : float, default 3
+        Segments ending this close to the current end of the audio are
+        treated as partial and redone on the next call.
+    decoder : Callable[[Path, float], Iterable[numpy.ndarray]]
+        Yields 16 kHz mono float32 windows from the given offset;
+        :func:`decode_tail` by default.
+    time_map : TimeMap | None
+        Map of cut silence of a recording still in progress; the
+        ``.timemap.json`` sidecar of *input_audio* is used if not given.
+
+    Other parameters are as in :func:`audio2text.transcribe_audio`.
+    """
+
+    def __init__(
+        self,
+        input_audio: Union[str, Path],
+        *,
+        out_path: Optional[Union[str, Path]] = None,
+        formats: Iterable[str] = ("txt",),
+        model=None,
+        model_name: str = "large-v3",
+        device: str = "cuda",
+        cpu_threads: int = 0,
+        beam_size: int = 5,
+        preset=None,
+        language: str = "ru",
+        guard_seconds: float = 3.0,
+        decoder: Callable = decode_tail,
+        time_map: Optional[TimeMap] = None,
+    ) -> None:
+        self.formats = list(dict.fromkeys(formats))
+        if self.formats[0] != "txt":
+            raise ValueError(f"incremental transcript must be written as txt first, got {self.formats}")
+        self.audio_path = Path(input_audio).expanduser().resolve()
+        self.out_path = (
+            Path(out_path).expanduser().resolve() if out_path else self.audio_path.with_suffix(".txt")
+        )
+        self.state_path = self.out_path.with_name(self.out_path.name + ".state.json")
+        self._model = model
+        self._model_args = (model_name, device, cpu_threads)
+        self.options = decoding_options(language, beam_size, preset)
+        self.guard_seconds = guard_seconds
+        self.decoder = decoder
+        self.time_map = time_map
+        self.stable_until = 0.0     # секунды аудио, распознанные окончательно
+        self.stable_bytes = 0       # длина стабильной части транскрипта
+        self.last_tail_seconds = 0.0
+        self._load_state()
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = load_model(*self._model_args)
+        return self._model
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> None:
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if state.get("audio") != str(self.audio_path):
+            return
+        # Транскрипт могли удалить или переписать полной транскрибацией.
+        if not self.out_path.exists() or self.out_path.stat().st_size < state.get("stable_bytes", 0):
+            return
+        self.stable_until = float(state.get("stable_until", 0.0))
+        self.stable_bytes = int(state.get("stable_bytes", 0))
+
+    def _save_state(self) -> None:
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp.write_text(
+            json.dumps({
+                "audio": str(self.audio_path),
+                "stable_until": self.stable_until,
+                "stable_bytes": self.stable_bytes,
+            }),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.state_path)
+
+    def reset(self) -> None:
+        """Forget progress; the next :meth:`update` starts from zero."""
+        self.stable_until = 0.0
+        self.stable_bytes = 0
+        if self.state_path.exists():
+            self.state_path.unlink()
+
+    # ------------------------------------------------------------------
+    # Update
+    # ------------------------------------------------------------------
+
+    def update(self, *, final: bool = False) -> Path:
+        """Transcribe audio added since the last stable cut and update the file.
+
+        The tail is fed to the model window by window as the decoder yields
+        it, so memory stays at a couple of windows however late the first
+        call comes.  With ``final=True`` (recording stopped) every segment
+        is stable.  Returns the transcript path.
+        """
+        time_map = self.time_map or TimeMap.for_audio(self.audio_path)
+        offset = self.stable_until
+        if time_map is not None:
+            def to_original(t):
+                return time_map.to_original(t + offset)
+        else:
+            def to_original(t):
+                return t + offset
+
+        def line(seg) -> bytes:
+            return format_segment(remap_segment(seg, to_original)).encode("utf-8")
+
+        partial = []
+        cut = 0.0               # конец стабильной части, с от начала хвоста
+        done = 0.0              # начало текущего буфера, с от начала хвоста
+        tail_seconds = 0.0
+        carry = np.zeros(0, dtype=np.float32)
+        mode = "r+b" if self.out_path.exists() else "w+b"
+        with open(self.out_path, mode) as fp:
+            # Срезаем прошлый черновой хвост; стабильное дописываем по мере готовности.
+            fp.seek(self.stable_bytes)
+            fp.truncate()
+            windows = iter(self.decoder(self.audio_path, self.stable_until))
+            chunk = next(windows, None)
+            while chunk is not None:
+                window = len(chunk)
+                tail_seconds += window / SAMPLE_RATE
+                following = next(windows, None)
+                buffer = np.concatenate((carry, chunk)) if len(carry) else chunk
+                del chunk
+                length = len(buffer) / SAMPLE_RATE
+                segments, _info = self.model.transcribe(buffer, **self.options)
+                if following is None:
+                    # Край записи: последний сегмент черновой, если запись идёт.
+                    limit = length - (0.0 if final else self.guard_seconds)
+                    cut = done + max(0.0, limit)
+                    for seg in segments:
+                        seg = shift_segment(seg, done)
+                        if partial or (not final and seg.end - done > limit):
+                            if not partial:
+                                cut = seg.start
+                            partial.append(seg)
+                        else:
+                            fp.write(line(seg))
+                else:
+                    # Край окна: сегмент у края распознаём заново со следующим окном,
+                    # но перенос не длиннее окна – иначе такой сегмент пишем как есть.
+                    limit = length - self.guard_seconds
+                    edge = None
+                    for seg in segments:
+                        if seg.end > limit:
+                            edge = seg
+                            break
+                        fp.write(line(shift_segment(seg, done)))
+                    keep_from = max(0.0, edge.start if edge is not None else limit)
+                    if edge is not None and length - keep_from > window / SAMPLE_RATE:
+                        fp.write(line(shift_segment(edge, done)))
+                        keep_from = min(edge.end, length)
+                    carry = buffer[int(keep_from * SAMPLE_RATE):].copy()
+                    done += keep_from
+                del buffer
+                chunk = following
+            new_stable_bytes = fp.tell()
+            for seg in partial:
+                fp.write(line(seg))
+
+        self.last_tail_seconds = tail_seconds
+        self.stable_bytes = new_stable_bytes
+        self.stable_until += cut
+        self._save_state()
+        self._write_formats()
+        return self.out_path
+
+    def _write_formats(self) -> None:
+        """Rebuild the non-txt formats from the working text file."""
+        others = self.formats[1:]
+        if not others:
+            return
+        with open(self.out_path, encoding="utf-8") as fp:
+            segments = [seg for seg in map(parse_segment, fp) if seg is not None]
+        write_transcript(self.out_path.with_suffix("." + others[0]), others, segments)
@@ -0,0 +1,231 @@
+"""
+ level_meter.py – индикатор уровня сигнала во время записи.
+
+ ffmpeg, кроме mp3, пишет второй выход: моно PCM 8 кГц в TCP‑сокет на
+ loopback.  :class:`LevelMeter` принимает его в заранее выделенные
+ NumPy‑буферы (``recv_into`` без промежуточных ``bytes``) и для каждого
+ кадра (~33 мс) считает RMS и пик векторно, без новых массивов.  GUI
+ забирает последнее значение таймером с частотой кадров.
+
+ Долгая тишина на входе (мёртвый микрофон, не то устройство) отмечается
+ флагом :attr:`LevelMeter.silent_for` и необязательным колбэком.
+
+ Сокет не закрывается, пока ffmpeg в него пишет: после :meth:`LevelMeter.stop`
+ данные дочитываются и выбрасываются до EOF (выхода ffmpeg).  Иначе
+ ffmpeg получил бы EPIPE на втором выходе и мог бы завершить или
+ застопорить всю запись.  При записи нескольких устройств измеряется
+ только первое (вход 0, см. :meth:`LevelMeter.output_args`).
+
+ Использование::
+
+     meter = LevelMeter(on_silence=lambda s: print(f"тишина {s:.0f} с"))
+     watcher = FFmpegProgressWatcher("Microphone", "out.mp3", level_meter=meter)
+     watcher.start()
+     rms_db, peak_db = meter.level()
+"""
+
+from __future__ import annotations
+
+import math
+import socket
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+__all__ = ["LevelMeter", "SILENCE_FLOOR_DB"]
+
+SILENCE_FLOOR_DB = -96.0        # уровень цифрового нуля для s16
+
+
+def _to_db(value: float) -> float:
+    return 20.0 * math.log10(value / 32768.0) if value > 0 else SILENCE_FLOOR_DB
+
+
+class LevelMeter:
+    """RMS/peak meter fed by an ffmpeg PCM side output.
+
+    Parameters
+    ----------
+    sample_rate : int, default 8000
+        Rate of the side stream; enough for levels, cheap to transfer.
+    frame_ms : int, default 33
+        Measurement frame, about one UI frame at 30 fps.
+    history : int, default 150
+        Number of recent frame peaks kept for :meth:`waveform` (~5 s).
+    silence_db : float, default -60
+        Frames with RMS below this level count as silence.
+    silence_seconds : float, default 5
+        Continuous silence after which *on_silence* fires (once per
+        silent stretch).
+    on_silence : Callable[[float], None] | None
+        Called from the reader thread with the silence length in seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rate: int = 8000,
+        frame_ms: int = 33,
+        history: int = 150,
+        silence_db: float = -60.0,
+        silence_seconds: float = 5.0,
+        on_silence: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.frame_samples = max(1, sample_rate * frame_ms // 1000)
+        self.silence_db = silence_db
+        self.silence_seconds = silence_seconds
+        self.on_silence = on_silence
+
+        # Все буферы выделяются один раз: приём, float32 для RMS, история.
+        self._frame = np.zeros(self.frame_samples, dtype=np.int16)
+        self._view = memoryview(self._frame).cast("B")
+        self._work = np.zeros(self.frame_samples, dtype=np.float32)
+        self._peaks = np.full(history, SILENCE_FLOOR_DB, dtype=np.float32)
+        self._pos = 0
+
+        self._level = (SILENCE_FLOOR_DB, SILENCE_FLOOR_DB)
+        self._silent_samples = 0
+        self._warned = False
+        self.frames = 0
+        self._server: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+    # ------------------------------------------------------------------
+    # ffmpeg side
+    # ------------------------------------------------------------------
+
+    def listen(self) -> str:
+        """Bind a loopback socket and return the URL for ffmpeg's output."""
+        if self._server is None:
+            self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._server.bind(("127.0.0.1", 0))
+            self._server.listen(1)
+            self._server.settimeout(0.2)
+        host, port = self._server.getsockname()
+        return f"tcp://{host}:{port}"
+
+    def output_args(self, input_index: int = 0) -> list:
+        """ffmpeg arguments for the side output (append after the main file).
+
+        Only input *input_index* is metered; with several capture devices
+        the others are not part of the level.
+        """
+        return [
+            "-map", f"{input_index}:a",
+            "-ac", "1",
+            "-ar", str(self.sample_rate),
+            "-f", "s16le",
+            self.listen(),
+        ]
+
+    def start(self) -> None:
+        """Start the reader thread; call after ffmpeg has been spawned."""
+        self.listen()
+        self._closed.clear()
+        self._thread = threading.Thread(target=self._run, name="level-meter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop measuring.
+
+        Call after ffmpeg has exited: until then the reader keeps draining
+        the socket so ffmpeg never sees a closed side output.
+        """
+        self._closed.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self._server:
+            self._server.close()
+            self._server = None
+
+    def _run(self) -> None:
+        conn = None
+        while not self._closed.is_set():
+            try:
+                conn, _addr = self._server.accept()
+                break
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+        if conn is None:
+            return
+        conn.settimeout(0.2)
+        with conn:
+            # Читатель должен успевать всегда: если сокет заполнится,
+            # ffmpeg встанет на записи второго выхода вместе с основным.
+            # Поэтому и после stop() читаем (и выбрасываем) до EOF.
+            while True:
+                try:
+                    if self._closed.is_set():
+                        if not conn.recv_into(self._view):
+                            return
+                    elif not self._read_frame(conn):
+                        return
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return
+
+    def _read_frame(self, conn: socket.socket) -> bool:
+        filled = 0
+        total = len(self._view)
+        while filled < total:
+            try:
+                n = conn.recv_into(self._view[filled:])
+            except socket.timeout:
+                if self._closed.is_set():
+                    return True     # неполный кадр не меряем – дальше только слив
+                continue
+            if not n:
+                return False
+            filled += n
+        self.feed(self._frame)
+        return True
+
+    # ------------------------------------------------------------------
+    # Measurement
+    # ------------------------------------------------------------------
+
+    def feed(self, frame: np.ndarray) -> None:
+        """Measure one frame of int16 samples and update the state."""
+        n = len(frame)
+        if not n:
+            return
+        work = self._work[:n]
+        np.copyto(work, frame, casting="unsafe")
+        rms = math.sqrt(float(np.dot(work, work)) / n)
+        peak = max(int(frame.max()), -int(frame.min()))
+        rms_db, peak_db = _to_db(rms), _to_db(peak)
+        self._level = (rms_db, peak_db)      # присваивание кортежа атомарно
+        self._peaks[self._pos] = peak_db
+        self._pos = (self._pos + 1) % len(self._peaks)
+        self.frames += 1
+
+        if rms_db < self.silence_db:
+            self._silent_samples += n
+            silent = self._silent_samples / self.sample_rate
+            if not self._warned and silent >= self.silence_seconds:
+                self._warned = True
+                if self.on_silence:
+                    self.on_silence(silent)
+        else:
+            self._silent_samples = 0
+            self._warned = False
+
+    def level(self) -> tuple:
+        """Latest ``(rms_db, peak_db)``; -96 dB means digital silence."""
+        return self._level
+
+    @property
+    def silent_for(self) -> float:
+        """Length of the current silent stretch in seconds."""
+        return self._silent_samples / self.sample_rate
+
+    def waveform(self) -> np.ndarray:
+        """Recent frame peaks in dB, oldest first."""
+        return np.concatenate((self._peaks[self._pos:], self._peaks[: self._pos]))
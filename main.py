@@ -8,5 +8,7 @@ if __name__ == "__main__":
     # Инициализируем и отображаем главное окно
     window = MainWindow()
     window.show()
+    # Несохранённые настройки – на диск до выхода
+    app.aboutToQuit.connect(window.left_panel.settings.flush)
     # Запускаем цикл обработки событий
     app.exec()
@@ -0,0 +1,313 @@
+"""
+ model_registry.py – локальный реестр весов Faster‑Whisper без сети.
+
+ Реестр – каталог с уже сконвертированными в CTranslate2 моделями::
+
+     <root>/large-v3/model.bin, config.json, tokenizer.json, …
+     <root>/large-v3/manifest.json      # sha256 и размер каждого файла
+
+ Модель импортируется из каталога (например, снапшота HF, скопированного с
+ другой машины) или из архива ``.tar``/``.tar.gz``/``.zip``.  При импорте
+ файлы копируются и хешируются за один проход, каталог встаёт на место
+ атомарно.  :func:`audio2text.load_model` сначала ищет имя здесь и, если
+ нашёл, передаёт путь к каталогу – обращений к Hugging Face Hub нет вовсе.
+ На горячем пути сверяются только размеры файлов; полная проверка sha256 –
+ :meth:`ModelRegistry.verify`.
+
+ С ``SOUNDDRAFTICO_OFFLINE=1`` модели не из реестра не ищутся в сети, а
+ сразу дают ошибку.
+
+ Использование::
+
+     python model_registry.py import /mnt/usb/faster-whisper-large-v3 --name large-v3
+     python model_registry.py import large-v3.tar.gz
+     python model_registry.py verify large-v3
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Optional, Union
+
+__all__ = ["ModelRegistry", "default_registry", "resolve_model", "REGISTRY_DIR", "MANIFEST"]
+
+REGISTRY_DIR = Path(
+    os.environ.get(
+        "SOUNDDRAFTICO_MODELS",
+        Path(os.environ.get("SOUNDDRAFTICO_CACHE", Path.home() / ".cache" / "sounddraftico")) / "models",
+    )
+)
+MANIFEST = "manifest.json"
+# Без этих файлов каталог не является моделью CTranslate2
+REQUIRED_FILES = ("model.bin", "config.json")
+COPY_CHUNK = 8 << 20
+
+
+def _copy_hashed(src: Path, dst: Path) -> str:
+    """Copy *src* to *dst* and return its sha256, reading the file once."""
+    digest = hashlib.sha256()
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        while chunk := fin.read(COPY_CHUNK):
+            digest.update(chunk)
+            fout.write(chunk)
+    return digest.hexdigest()
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        while chunk := fp.read(COPY_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _model_root(folder: Path) -> Path:
+    """Directory inside *folder* that holds ``model.bin`` (archives often add one level)."""
+    if (folder / "model.bin").exists():
+        return folder
+    candidates = [p.parent for p in folder.rglob("model.bin")]
+    if len(candidates) != 1:
+        raise ValueError(f"{folder} does not contain exactly one CTranslate2 model")
+    return candidates[0]
+
+
+def _safe_extract(archive: Path, dest: Path) -> None:
+    dest = dest.resolve()
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for name in zf.namelist():
+                if not (dest / name).resolve().is_relative_to(dest):
+                    raise ValueError(f"unsafe path in archive: {name}")
+            zf.extractall(dest)
+        return
+    with tarfile.open(archive) as tf:
+        for member in tf.getmembers():
+            if not (member.isfile() or member.isdir()):
+                raise ValueError(f"unsupported archive member: {member.name}")
+            if not (dest / member.name).resolve().is_relative_to(dest):
+                raise ValueError(f"unsafe path in archive: {member.name}")
+        if hasattr(tarfile, "data_filter"):
+            tf.extractall(dest, filter="data")
+        else:  # pragma: no cover - Python < 3.11.4
+            tf.extractall(dest)
+
+
+class ModelRegistry:
+    """Directory of verified CTranslate2 models addressed by name.
+
+    Parameters
+    ----------
+    root : str | Path
+        Registry directory; :data:`REGISTRY_DIR` by default.
+    """
+
+    def __init__(self, root: Union[str, Path] = REGISTRY_DIR) -> None:
+        self.root = Path(root)
+
+    def names(self) -> list[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            p.parent.name for p in self.root.glob(f"*/{MANIFEST}") if not p.parent.name.startswith(".")
+        )
+
+    def manifest(self, name: str) -> Optional[dict]:
+        try:
+            return json.loads((self.root / name / MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def path(self, name: str) -> Optional[Path]:
+        """Model directory of *name*, or ``None`` if missing or incomplete.
+
+        Only file sizes are compared with the manifest – cheap enough to do
+        before every load.
+        """
+        manifest = self.manifest(name)
+        if manifest is None:
+            return None
+        folder = self.root / name
+        for rel, info in manifest["files"].items():
+            try:
+                if (folder / rel).stat().st_size != info["size"]:
+                    return None
+            except OSError:
+                return None
+        return folder
+
+    def verify(self, name: str) -> list[str]:
+        """Compare every file against its sha256; returns the problems found."""
+        manifest = self.manifest(name)
+        if manifest is None:
+            return [f"{name}: no manifest"]
+        problems = []
+        for rel, info in manifest["files"].items():
+            path = self.root / name / rel
+            if not path.exists():
+                problems.append(f"{rel}: missing")
+            elif _sha256(path) != info["sha256"]:
+                problems.append(f"{rel}: checksum mismatch")
+        return problems
+
+    # -- import -----------------------------------------------------------
+    def import_dir(self, source: Union[str, Path], name: Optional[str] = None, *, replace: bool = False) -> Path:
+        """Copy a converted model directory into the registry.
+
+        Raises
+        ------
+        ValueError
+            If *source* is not a CTranslate2 model.
+        FileExistsError
+            If *name* is registered and *replace* is false.
+        """
+        source = _model_root(Path(source).expanduser().resolve())
+        missing = [f for f in REQUIRED_FILES if not (source / f).exists()]
+        if missing:
+            raise ValueError(f"{source} is not a CTranslate2 model: missing {missing}")
+        name = name or source.name.removeprefix("faster-whisper-")
+        target = self.root / name
+        if target.exists() and not replace:
+            raise FileExistsError(target)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".import-{name}-", dir=self.root))
+        try:
+            files = {}
+            for path in sorted(source.rglob("*")):
+                rel = path.relative_to(source)
+                # .cache – служебные файлы huggingface_hub в снапшоте
+                if not path.is_file() or path.name == MANIFEST or ".cache" in rel.parts:
+                    continue
+                (staging / rel).parent.mkdir(parents=True, exist_ok=True)
+                files[rel.as_posix()] = {"sha256": _copy_hashed(path, staging / rel), "size": path.stat().st_size}
+            (staging / MANIFEST).write_text(
+                json.dumps(
+                    {"name": name, "source": str(source), "imported_at": time.time(), "files": files},
+                    indent=1,
+                ),
+                encoding="utf-8",
+            )
+            # Старую версию убираем в сторону и подменяем каталог целиком
+            old = None
+            if target.exists():
+                old = target.with_name(f".old-{name}-{os.getpid()}")
+                os.replace(target, old)
+            os.replace(staging, target)
+            if old is not None:
+                shutil.rmtree(old, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return target
+
+    def import_archive(self, archive: Union[str, Path], name: Optional[str] = None, *, replace: bool = False) -> Path:
+        """Unpack a ``.tar*``/``.zip`` with a converted model and import it."""
+        archive = Path(archive).expanduser().resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix=".unpack-", dir=self.root) as tmp:
+            _safe_extract(archive, Path(tmp))
+            root = _model_root(Path(tmp))
+            if name is None and root == Path(tmp):
+                # файлы модели лежат в корне архива – имя берём из архива
+                name = archive.name.split(".")[0].removeprefix("faster-whisper-")
+            return self.import_dir(root, name, replace=replace)
+
+    def import_path(self, source: Union[str, Path], name: Optional[str] = None, *, replace: bool = False) -> Path:
+        """Import from a directory or an archive."""
+        if Path(source).is_dir():
+            return self.import_dir(source, name, replace=replace)
+        return self.import_archive(source, name, replace=replace)
+
+    def remove(self, name: str) -> None:
+        shutil.rmtree(self.root / name, ignore_errors=True)
+
+
+_default: Optional[ModelRegistry] = None
+
+
+def default_registry() -> ModelRegistry:
+    global _default
+    if _default is None:
+        _default = ModelRegistry()
+    return _default
+
+
+def resolve_model(name: str, registry: Optional[ModelRegistry] = None, *, offline: Optional[bool] = None) -> str:
+    """What to pass to ``WhisperModel`` for *name*.
+
+    An existing directory is used as is, a registered name becomes its
+    registry path.  Anything else is returned unchanged for the hub unless
+    *offline* (default: ``SOUNDDRAFTICO_OFFLINE``) is set.
+
+    Raises
+    ------
+    FileNotFoundError
+        In offline mode, if *name* is neither a directory nor registered.
+    """
+    if os.path.isdir(name):
+        return name
+    path = (registry or default_registry()).path(name)
+    if path is not None:
+        return str(path)
+    if offline is None:
+        offline = os.environ.get("SOUNDDRAFTICO_OFFLINE", "") not in ("", "0")
+    if offline:
+        raise FileNotFoundError(
+            f"model {name!r} is not in the local registry; import it with "
+            f"'python model_registry.py import <dir|archive> --name {name}'"
+        )
+    return name
+
+
+# ---------------------------------------------------------------------------
+# CLI wrapper
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:  # pragma: no cover – CLI only
+    p = argparse.ArgumentParser(prog="model_registry", description="Offline Faster-Whisper model registry")
+    p.add_argument("--root", default=str(REGISTRY_DIR), help="Registry directory")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="Import a model directory or archive")
+    imp.add_argument("source")
+    imp.add_argument("--name")
+    imp.add_argument("--replace", action="store_true")
+    sub.add_parser("list", help="List registered models")
+    ver = sub.add_parser("verify", help="Check sha256 of every file")
+    ver.add_argument("names", nargs="*")
+    rm = sub.add_parser("remove", help="Delete a model")
+    rm.add_argument("name")
+    args = p.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.cmd == "import":
+        started = time.perf_counter()
+        path = registry.import_path(args.source, args.name, replace=args.replace)
+        print(f"Импортировано: {path} ({time.perf_counter() - started:.1f} s)")
+    elif args.cmd == "list":
+        for name in registry.names():
+            files = registry.manifest(name)["files"]
+            size = sum(f["size"] for f in files.values())
+            print(f"{name:<24} {size / (1 << 20):9.1f} MB  {'ok' if registry.path(name) else 'incomplete'}")
+    elif args.cmd == "verify":
+        failed = False
+        for name in args.names or registry.names():
+            problems = registry.verify(name)
+            failed |= bool(problems)
+            print(f"{name}: " + ("ok" if not problems else "; ".join(problems)))
+        raise SystemExit(1 if failed else 0)
+    elif args.cmd == "remove":
+        registry.remove(args.name)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,264 @@
+"""
+ multichannel.py – раздельная транскрибация каналов и дорожек записи.
+
+ Если говорящие разнесены по каналам или дорожкам (локальный микрофон и
+ удалённые участники), каждый канал распознаётся отдельно.  Все каналы
+ идут параллельно на одной модели (:class:`shared_model.SharedModelExecutor`),
+ после чего сегменты сливаются в одну временную шкалу с метками::
+
+     [00:00:01.000 --> 00:00:03.500] Микрофон: добрый день
+     [00:00:02.900 --> 00:00:04.000] Stereo Mix: слышу вас
+
+ Уровень каждого канала считается потоково, без декодирования в память;
+ молчащие каналы (RMS ниже *silence_db*) не декодируются и не идут в модель.
+
+ Использование::
+
+     transcribe_multichannel("meeting.mka", model_name="large-v3", workers=2)
+
+ или из CLI::
+
+     python audio2text.py meeting.mka --multichannel
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from ffmpeg_core import FFPROBE_BINARY
+from shared_model import SharedModelExecutor
+from streaming import SAMPLE_RATE, iter_pcm_windows, open_pcm_stream
+from transcript_writers import open_writers
+
+__all__ = [
+    "Source",
+    "probe_sources",
+    "measure_levels",
+    "decode_sources",
+    "rms_db",
+    "transcribe_multichannel",
+]
+
+# Аудио, читаемое из ffmpeg за раз при замере и декодировании
+WINDOW_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class Source:
+    """One channel of one audio stream."""
+
+    stream: int          # номер аудиодорожки (0:a:N)
+    channel: int         # канал внутри дорожки
+    channels: int        # всего каналов в дорожке
+    label: str
+
+
+def probe_sources(path: Union[str, Path]) -> list[Source]:
+    """List every channel of every audio stream of *path* with ffprobe.
+
+    Tracks are labelled with their ``title`` tag (device names written by
+    :class:`ffmpeg_core.FFmpegProgressWatcher`), channels as ``chN``.
+    """
+    out = subprocess.run(
+        [
+            FFPROBE_BINARY, "-v", "error", "-select_streams", "a",
+            "-show_entries", "stream=channels:stream_tags=title", "-of", "json", str(path),
+        ],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True,
+    ).stdout
+    streams = json.loads(out).get("streams", [])
+    sources = []
+    for i, stream in enumerate(streams):
+        channels = int(stream.get("channels", 1))
+        title = stream.get("tags", {}).get("title")
+        for ch in range(channels):
+            if title and channels == 1:
+                label = title
+            elif len(streams) == 1:
+                label = f"ch{ch + 1}"
+            else:
+                label = f"{title or f'track{i + 1}'}/ch{ch + 1}"
+            sources.append(Source(i, ch, channels, label))
+    return sources
+
+
+def _iter_frames(path: Union[str, Path], stream: int, channels: int) -> Iterator[np.ndarray]:
+    """Yield audio stream *stream* of *path* as ``(frames, channels)`` windows."""
+    proc = open_pcm_stream(path, channels=channels, extra_args=("-map", f"0:a:{stream}"))
+    try:
+        for pcm in iter_pcm_windows(proc.stdout, int(WINDOW_SECONDS * SAMPLE_RATE) * channels):
+            yield pcm[: len(pcm) - len(pcm) % channels].reshape(-1, channels)
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+def _by_stream(sources: list[Source]) -> Iterator[tuple[int, int, list[Source]]]:
+    for stream in sorted({s.stream for s in sources}):
+        group = [s for s in sources if s.stream == stream]
+        yield stream, group[0].channels, group
+
+
+def measure_levels(path: Union[str, Path], sources: list[Source]) -> dict:
+    """RMS level in dBFS of each of *sources*, one streaming pass per stream.
+
+    Only running sums of squares are kept, so nothing is decoded into
+    memory just to find out that a channel is silent.
+    """
+    levels = {}
+    for stream, channels, group in _by_stream(sources):
+        power = np.zeros(channels)
+        frames = 0
+        for window in _iter_frames(path, stream, channels):
+            power += np.einsum("ij,ij->j", window, window, dtype=np.float64)
+            frames += len(window)
+        for s in group:
+            levels[s] = _power_db(power[s.channel] / frames if frames else 0.0)
+    return levels
+
+
+def decode_sources(path: Union[str, Path], sources: list[Source]) -> dict:
+    """Decode *sources* to 16 kHz float32 mono, one ffmpeg pass per stream.
+
+    A multi-channel stream is decoded interleaved once and split window by
+    window; channels not listed in *sources* are not kept.
+    """
+    decoded = {}
+    for stream, channels, group in _by_stream(sources):
+        parts: dict = {s: [] for s in group}
+        for window in _iter_frames(path, stream, channels):
+            for s in group:
+                parts[s].append(window[:, s.channel].copy())
+        for s in group:
+            decoded[s] = np.concatenate(parts.pop(s)) if parts[s] else np.zeros(0, dtype=np.float32)
+    return decoded
+
+
+def _with_label(seg, label: str):
+    """Copy of *seg* whose text starts with the channel *label*."""
+    text = f"{label}: {seg.text.strip()}"
+    if hasattr(seg, "_replace"):  # faster_whisper.Segment – NamedTuple
+        return seg._replace(text=text)
+    labelled = SimpleNamespace(**vars(seg))
+    labelled.text = text
+    return labelled
+
+
+def _power_db(power: float) -> float:
+    return 10.0 * math.log10(power) if power > 0 else float("-inf")
+
+
+def rms_db(samples: np.ndarray) -> float:
+    """RMS level of float samples in dBFS (−inf for silence)."""
+    if not len(samples):
+        return float("-inf")
+    return _power_db(float(np.dot(samples, samples)) / len(samples))
+
+
+def transcribe_multichannel(
+    input_audio: Union[str, Path],
+    *,
+    out_path: Optional[Union[str, Path]] = None,
+    model=None,
+    model_name: str = "large-v3",
+    device: str = "cuda",
+    workers: int = 2,
+    labels: Optional[list] = None,
+    silence_db: float = -55.0,
+    executor: Optional[SharedModelExecutor] = None,
+    prober: Callable = probe_sources,
+    meter: Callable = measure_levels,
+    decoder: Callable = decode_sources,
+    formats: Iterable[str] = ("txt",),
+    **transcribe_kwargs,
+) -> Path:
+    """Transcribe each channel of *input_audio* separately and merge them.
+
+    Parameters
+    ----------
+    input_audio : str | Path
+        Recording with several channels and/or audio tracks.
+    workers : int, default 2
+        Channels transcribed concurrently on one shared model.
+    labels : list[str] | None
+        Override channel labels, in :func:`probe_sources` order.
+    silence_db : float, default -55
+        Channels whose overall RMS is below this level are skipped
+        without decoding them or running the model.
+    executor : SharedModelExecutor | None
+        Existing pool to use instead of creating one.
+    formats : Iterable[str], default ("txt",)
+        Formats of the merged transcript, see
+        :func:`transcript_writers.open_writers`; the label is part of
+        each segment's text in all of them.
+    **transcribe_kwargs
+        Passed to :func:`audio2text.transcribe_audio` (``language``,
+        ``beam_size``, ``preset`` …).
+
+    Returns
+    -------
+    Path
+        Merged transcript, ``<input>.txt`` by default.
+    """
+    audio_path = Path(input_audio).expanduser().resolve()
+    formats = list(dict.fromkeys(formats))
+    output_path = (
+        Path(out_path).expanduser().resolve() if out_path else audio_path.with_suffix("." + formats[0])
+    )
+
+    sources = prober(audio_path)
+    if labels:
+        sources = [
+            Source(s.stream, s.channel, s.channels, label) for s, label in zip(sources, labels)
+        ] + sources[len(labels):]
+    # Уровни считаем на лету, а декодируем только звучащие каналы.
+    levels = meter(audio_path, sources)
+    active = []
+    for source in sources:
+        if levels[source] < silence_db:
+            print(f"Канал {source.label}: тишина ({levels[source]:.0f} dBFS), пропускаем")
+        else:
+            active.append(source)
+    decoded = decoder(audio_path, active) if active else {}
+
+    own_executor = executor is None and bool(active)
+    if own_executor:
+        executor = SharedModelExecutor(model_name, device, workers=max(1, min(workers, len(active))), model=model)
+    per_channel: dict = {s: [] for s in active}
+    try:
+        # Файлы каналов не пишем – сегменты собираем в память.
+        futures = [
+            executor.submit(
+                audio_path,
+                audio=decoded.pop(source),
+                formats=(),
+                segment_handler=per_channel[source].append,
+                **transcribe_kwargs,
+            )
+            for source in active
+        ]
+        for future in futures:
+            future.result()
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    # Сегменты каждого канала уже упорядочены – сливаем без полной сортировки.
+    labelled = [
+        [(seg.start, i, source.label, seg) for seg in per_channel[source]]
+        for i, source in enumerate(active)
+    ]
+    with open_writers(output_path, formats) as out:
+        for _start, _i, label, seg in heapq.merge(*labelled, key=lambda item: (item[0], item[1])):
+            out.write(_with_label(seg, label))
+    print(f"Транскрибация по каналам завершена ({len(active)}/{len(sources)}). Файл сохранён: {output_path}")
+    return output_path
@@ -0,0 +1,302 @@
+"""
+ proc_monitor.py – замеры CPU, памяти, ввода‑вывода и дескрипторов у
+ дочерних процессов (ffmpeg) и потоков транскрибации.
+
+ :class:`ProcessMonitor` раз в *interval* секунд читает ``/proc/<pid>/…``
+ каждого наблюдаемого процесса или потока.  Снимки копятся в кольцевых
+ буферах фиксированной длины, так что память не растёт за день записи.
+ Где ``/proc`` нет (Windows, macOS), используется ``psutil``, если он
+ установлен; иначе монитор просто ничего не собирает.
+
+ Снимки доступны как ряды (:meth:`~ProcessMonitor.series`), сводки
+ (:meth:`~ProcessMonitor.summary`, по всему времени наблюдения – из
+ накопленных счётчиков, а не из обрезанного буфера) и метрики для
+ :class:`profiling.PrometheusTextfile` (:meth:`~ProcessMonitor.metrics`).
+
+ Использование::
+
+     monitor = ProcessMonitor(interval=1.0)
+     monitor.watch(proc.pid, "recorder")
+     monitor.start()
+     …
+     print(monitor.summary("recorder"))
+"""
+
+from __future__ import annotations
+
+import collections
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+try:  # pragma: no cover - optional fallback
+    import psutil
+except ImportError:  # pragma: no cover
+    psutil = None
+
+__all__ = ["ProcSample", "ProcessMonitor", "read_proc", "available"]
+
+PROC = "/proc"
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass(frozen=True)
+class ProcSample:
+    """One measurement of one process (or thread)."""
+
+    t: float                        # time.monotonic()
+    cpu_percent: float              # 100 – одно ядро целиком
+    rss_bytes: int
+    read_bytes: Optional[int]       # накопленные, None – недоступно
+    write_bytes: Optional[int]
+    num_fds: Optional[int]
+
+
+@dataclass
+class _Totals:
+    """Running aggregates of every sample of one process since :meth:`ProcessMonitor.watch`."""
+
+    first_t: float = 0.0
+    count: int = 0
+    cpu_sum: float = 0.0
+    cpu_max: float = 0.0
+    rss_max: int = 0
+    fds_max: Optional[int] = None
+
+    def add(self, sample: ProcSample) -> None:
+        if not self.count:
+            self.first_t = sample.t
+        self.count += 1
+        self.cpu_sum += sample.cpu_percent
+        self.cpu_max = max(self.cpu_max, sample.cpu_percent)
+        self.rss_max = max(self.rss_max, sample.rss_bytes)
+        if sample.num_fds is not None:
+            self.fds_max = sample.num_fds if self.fds_max is None else max(self.fds_max, sample.num_fds)
+
+
+def available() -> bool:
+    """Whether samples can be collected on this system."""
+    return os.path.isdir(os.path.join(PROC, "self")) or psutil is not None
+
+
+def read_proc(pid: int, tid: Optional[int] = None, root: str = PROC) -> dict:
+    """Raw counters of *pid* (CPU of thread *tid* if given) from ``/proc``.
+
+    Returns ``cpu_seconds``, ``rss_bytes``, ``read_bytes``,
+    ``write_bytes`` and ``num_fds``.
+
+    Raises
+    ------
+    OSError
+        If the process does not exist (any more).
+    """
+    base = os.path.join(root, str(pid))
+    stat_path = os.path.join(base, "task", str(tid), "stat") if tid else os.path.join(base, "stat")
+    with open(stat_path, "rb") as fp:
+        stat = fp.read()
+    # Имя процесса в скобках может содержать пробелы – режем по последней ')'
+    fields = stat[stat.rindex(b")") + 2:].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / _CLK_TCK     # utime + stime
+    rss_bytes = int(fields[21]) * _PAGE
+    read_bytes = write_bytes = None
+    try:
+        with open(os.path.join(base, "io"), "rb") as fp:
+            for line in fp:
+                key, _, value = line.partition(b":")
+                if key == b"read_bytes":
+                    read_bytes = int(value)
+                elif key == b"write_bytes":
+                    write_bytes = int(value)
+    except OSError:
+        pass    # /proc/<pid>/io может быть закрыт правами
+    try:
+        num_fds = len(os.listdir(os.path.join(base, "fd")))
+    except OSError:
+        num_fds = None
+    return {
+        "cpu_seconds": cpu_seconds,
+        "rss_bytes": rss_bytes,
+        "read_bytes": read_bytes,
+        "write_bytes": write_bytes,
+        "num_fds": num_fds,
+    }
+
+
+def _read_psutil(pid: int, tid: Optional[int] = None) -> dict:  # pragma: no cover - non-Linux
+    try:
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            if tid:
+                times = next((t for t in proc.threads() if t.id == tid), None)
+                cpu_seconds = times.user_time + times.system_time if times else 0.0
+            else:
+                times = proc.cpu_times()
+                cpu_seconds = times.user + times.system
+            rss = proc.memory_info().rss
+            try:
+                io = proc.io_counters()
+                read_bytes, write_bytes = io.read_bytes, io.write_bytes
+            except (AttributeError, psutil.Error):
+                read_bytes = write_bytes = None
+            if hasattr(proc, "num_fds"):
+                num_fds = proc.num_fds()
+            else:
+                num_fds = proc.num_handles()
+    except psutil.NoSuchProcess as exc:
+        raise ProcessLookupError(pid) from exc
+    return {
+        "cpu_seconds": cpu_seconds,
+        "rss_bytes": rss,
+        "read_bytes": read_bytes,
+        "write_bytes": write_bytes,
+        "num_fds": num_fds,
+    }
+
+
+class ProcessMonitor:
+    """Periodically sample watched processes into bounded time series.
+
+    Parameters
+    ----------
+    interval : float, default 1.0
+        Seconds between samples.
+    maxlen : int, default 600
+        Samples kept per process (10 minutes at 1 s).
+    reader : Callable | None
+        ``reader(pid, tid) -> dict`` as :func:`read_proc`; chosen
+        automatically (``/proc`` or ``psutil``) by default.
+    """
+
+    def __init__(self, interval: float = 1.0, *, maxlen: int = 600, reader=None) -> None:
+        self.interval = interval
+        self.maxlen = maxlen
+        if reader is None:
+            if os.path.isdir(os.path.join(PROC, "self")):
+                reader = read_proc
+            elif psutil is not None:  # pragma: no cover - non-Linux
+                reader = _read_psutil
+        self.reader = reader
+        self._watched: dict = {}        # метка → (pid, tid)
+        self._series: dict = {}         # метка → deque[ProcSample]
+        self._totals: dict = {}         # метка → _Totals за всё время
+        self._last: dict = {}           # метка → (monotonic, cpu_seconds)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- registration -----------------------------------------------------
+    def watch(self, pid: int, label: str, *, tid: Optional[int] = None) -> None:
+        """Sample process *pid* (CPU of its thread *tid*, if given) as *label*."""
+        with self._lock:
+            self._watched[label] = (pid, tid)
+            self._series[label] = collections.deque(maxlen=self.maxlen)
+            self._totals[label] = _Totals()
+            self._last.pop(label, None)
+
+    def unwatch(self, label: str) -> None:
+        """Stop sampling *label*; its series is dropped."""
+        with self._lock:
+            self._watched.pop(label, None)
+            self._series.pop(label, None)
+            self._totals.pop(label, None)
+            self._last.pop(label, None)
+
+    def labels(self) -> list[str]:
+        with self._lock:
+            return list(self._watched)
+
+    # -- sampling ---------------------------------------------------------
+    def sample_once(self) -> None:
+        """Take one sample of every watched process (called by the thread)."""
+        if self.reader is None:
+            return
+        with self._lock:
+            watched = dict(self._watched)
+        for label, (pid, tid) in watched.items():
+            try:
+                raw = self.reader(pid, tid)
+            except (OSError, ValueError, IndexError):
+                continue        # процесс завершился – ряд остаётся до unwatch
+            now = time.monotonic()
+            with self._lock:
+                if label not in self._watched:
+                    continue
+                last = self._last.get(label)
+                self._last[label] = (now, raw["cpu_seconds"])
+                if last is None:
+                    continue    # для процента CPU нужна пара замеров
+                elapsed = now - last[0]
+                cpu = (raw["cpu_seconds"] - last[1]) / elapsed * 100.0 if elapsed > 0 else 0.0
+                sample = ProcSample(now, round(cpu, 1), raw["rss_bytes"], raw["read_bytes"],
+                                    raw["write_bytes"], raw["num_fds"])
+                self._series[label].append(sample)
+                self._totals[label].add(sample)
+
+    def start(self) -> "ProcessMonitor":
+        if self._thread is None and self.reader is not None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="proc-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self) -> None:
+        self.sample_once()
+        while not self._stop.wait(self.interval):
+            self.sample_once()
+
+    # -- results ----------------------------------------------------------
+    def series(self, label: str) -> list:
+        with self._lock:
+            return list(self._series.get(label, ()))
+
+    def latest(self) -> dict:
+        """``{label: ProcSample}`` of the newest sample of each process."""
+        with self._lock:
+            return {label: s[-1] for label, s in self._series.items() if s}
+
+    def summary(self, label: str) -> Optional[dict]:
+        """Average/peak CPU, peak RSS and FDs, I/O totals since :meth:`watch`.
+
+        Computed from running aggregates in O(1), so samples already
+        pushed out of the bounded series still count.
+        """
+        with self._lock:
+            totals = self._totals.get(label)
+            series = self._series.get(label)
+            if not totals or not totals.count:
+                return None
+            last = series[-1]
+            return {
+                "samples": totals.count,
+                "seconds": round(last.t - totals.first_t, 3),
+                "cpu_avg": round(totals.cpu_sum / totals.count, 1),
+                "cpu_max": totals.cpu_max,
+                "rss_max": totals.rss_max,
+                "rss_last": last.rss_bytes,
+                "read_bytes": last.read_bytes,
+                "write_bytes": last.write_bytes,
+                "fds_max": totals.fds_max,
+            }
+
+    def metrics(self) -> dict:
+        """Latest samples as Prometheus gauges (``extra`` of ``PrometheusTextfile``)."""
+        gauges = {}
+        for label, s in self.latest().items():
+            tag = f'{{proc="{label}"}}'
+            gauges[f"process_cpu_percent{tag}"] = s.cpu_percent
+            gauges[f"process_rss_bytes{tag}"] = s.rss_bytes
+            if s.read_bytes is not None:
+                gauges[f"process_read_bytes{tag}"] = s.read_bytes
+                gauges[f"process_write_bytes{tag}"] = s.write_bytes
+            if s.num_fds is not None:
+                gauges[f"process_open_fds{tag}"] = s.num_fds
+        return gauges
@@ -0,0 +1,219 @@
+"""
+ profiling.py – поэтапные замеры транскрибации.
+
+ :func:`audio2text.transcribe_audio` после каждого файла собирает
+ :class:`TranscriptionProfile`.  В нём время этапов (загрузка модели,
+ декодирование + VAD, инференс, запись), длительность аудио, число
+ сегментов, RTF и попадание в кэш моделей.  Профиль передаётся всем
+ зарегистрированным хукам.
+
+ Готовые хуки: :func:`print_profile` (таблица в консоль) и
+ :class:`PrometheusTextfile`.  Последний копит счётчики и атомарно
+ переписывает файл для textfile‑коллектора node_exporter.
+
+ Использование::
+
+     add_hook(PrometheusTextfile("/var/lib/node_exporter/sounddraftico.prom"))
+     transcribe_audio("meeting.mp3")
+
+ или из CLI::
+
+     python audio2text.py meeting.mp3 --profile --profile_out run.prof
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+__all__ = [
+    "STAGES",
+    "TranscriptionProfile",
+    "add_hook",
+    "remove_hook",
+    "emit",
+    "print_profile",
+    "PrometheusTextfile",
+]
+
+# Порядок этапов в отчётах
+STAGES = ("model_load", "decode_vad", "inference", "write")
+
+
+@dataclass
+class TranscriptionProfile:
+    """Timings and counters of one :func:`audio2text.transcribe_audio` call."""
+
+    audio: str
+    model_name: Optional[str] = None
+    stages: dict = field(default_factory=dict)
+    audio_seconds: float = 0.0
+    speech_seconds: Optional[float] = None   # после VAD, если модель сообщает
+    segments: int = 0
+    model_cache_hit: Optional[bool] = None   # None – модель передана извне
+    started: float = field(default_factory=time.time)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.stages.values())
+
+    @property
+    def rtf(self) -> Optional[float]:
+        """Processing time divided by audio duration (below 1 – faster than real time)."""
+        if not self.audio_seconds:
+            return None
+        return self.total_seconds / self.audio_seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "audio": self.audio,
+            "model_name": self.model_name,
+            "stages": dict(self.stages),
+            "total_seconds": self.total_seconds,
+            "audio_seconds": self.audio_seconds,
+            "speech_seconds": self.speech_seconds,
+            "segments": self.segments,
+            "rtf": self.rtf,
+            "model_cache_hit": self.model_cache_hit,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Hooks
+# ---------------------------------------------------------------------------
+
+_hooks: list = []
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook: Callable[[TranscriptionProfile], None]) -> Callable:
+    """Register *hook* to receive every finished profile; returns it."""
+    with _hooks_lock:
+        _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook: Callable) -> None:
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def emit(profile: TranscriptionProfile) -> None:
+    """Pass *profile* to all hooks; a failing hook never breaks transcription."""
+    with _hooks_lock:
+        hooks = list(_hooks)
+    for hook in hooks:
+        try:
+            hook(profile)
+        except Exception as exc:
+            print(f"Ошибка в хуке профилирования {hook!r}: {exc}")
+
+
+def print_profile(profile: TranscriptionProfile) -> None:
+    """Hook that prints a per-stage table to stdout."""
+    total = profile.total_seconds or 1e-9
+    print(f"Профиль {Path(profile.audio).name}:")
+    for stage in STAGES:
+        if stage in profile.stages:
+            seconds = profile.stages[stage]
+            print(f"  {stage:<11} {seconds:9.3f} s  {seconds / total:6.1%}")
+    rtf = f"{profile.rtf:.3f}" if profile.rtf is not None else "n/a"
+    cache = {True: "hit", False: "miss", None: "external"}[profile.model_cache_hit]
+    print(
+        f"  audio {profile.audio_seconds:.1f} s, segments {profile.segments}, "
+        f"RTF {rtf}, model cache {cache}"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Prometheus textfile
+# ---------------------------------------------------------------------------
+
+
+class PrometheusTextfile:
+    """Hook accumulating counters into a Prometheus text-format file.
+
+    The file is rewritten atomically after every transcription so that a
+    textfile collector never reads a half-written file.  *extra* is a
+    callable returning additional ``{metric: value}`` gauges appended to
+    each write (for example :meth:`proc_monitor.ProcessMonitor.metrics`);
+    metric names may carry labels.
+    """
+
+    PREFIX = "sounddraftico"
+
+    def __init__(self, path: Union[str, Path], extra: Optional[Callable[[], dict]] = None) -> None:
+        self.path = Path(path)
+        self.extra = extra
+        self._lock = threading.Lock()
+        self.transcriptions = 0
+        self.audio_seconds = 0.0
+        self.segments = 0
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.last_rtf: Optional[float] = None
+
+    def __call__(self, profile: TranscriptionProfile) -> None:
+        with self._lock:
+            self.transcriptions += 1
+            self.audio_seconds += profile.audio_seconds
+            self.segments += profile.segments
+            for stage, seconds in profile.stages.items():
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+            if profile.model_cache_hit is True:
+                self.cache_hits += 1
+            elif profile.model_cache_hit is False:
+                self.cache_misses += 1
+            if profile.rtf is not None:
+                self.last_rtf = profile.rtf
+            self.write()
+
+    def render(self) -> str:
+        p = self.PREFIX
+        lines = [
+            f"# TYPE {p}_transcriptions_total counter",
+            f"{p}_transcriptions_total {self.transcriptions}",
+            f"# TYPE {p}_audio_seconds_total counter",
+            f"{p}_audio_seconds_total {self.audio_seconds:.3f}",
+            f"# TYPE {p}_segments_total counter",
+            f"{p}_segments_total {self.segments}",
+            f"# TYPE {p}_stage_seconds_total counter",
+        ]
+        lines += [
+            f'{p}_stage_seconds_total{{stage="{stage}"}} {seconds:.6f}'
+            for stage, seconds in self.stage_seconds.items()
+        ]
+        lines += [
+            f"# TYPE {p}_model_cache_hits_total counter",
+            f"{p}_model_cache_hits_total {self.cache_hits}",
+            f"# TYPE {p}_model_cache_misses_total counter",
+            f"{p}_model_cache_misses_total {self.cache_misses}",
+        ]
+        if self.last_rtf is not None:
+            lines += [f"# TYPE {p}_last_rtf gauge", f"{p}_last_rtf {self.last_rtf:.6f}"]
+        if self.extra:
+            typed = set()
+            for name, value in self.extra().items():
+                # name может нести метки: process_rss_bytes{proc="recorder"}
+                base = name.split("{", 1)[0]
+                if base not in typed:
+                    typed.add(base)
+                    lines.append(f"# TYPE {p}_{base} gauge")
+                lines.append(f"{p}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> Path:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, self.path)
+        return self.path
@@ -0,0 +1,180 @@
+"""
+ resource_scheduler.py – распределение ядер CPU между записью (ffmpeg) и
+ транскрибацией (CTranslate2), чтобы параллельные задачи не дрались за ядра.
+
+ Запись всегда в приоритете: её потоки резервируются заранее, даже когда
+ ничего не пишется, поэтому старт записи никогда не приводит к переподписке.
+ Остаток делится между транскрибациями: новая получает свою долю, но не
+ больше ещё не выданных потоков, так что сумма аренд не превышает
+ свободных ядер.  Если выдавать нечего, :meth:`ResourceScheduler.acquire`
+ ждёт, пока кто‑нибудь не вернёт свою аренду.
+
+ Использование::
+
+     sched = default_scheduler()
+     with sched.acquire("transcription") as lease:
+         transcribe_audio(path, cpu_threads=lease.threads)
+ """
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Optional
+
+__all__ = ["ResourceScheduler", "Lease", "default_scheduler", "RECORDING", "TRANSCRIPTION"]
+
+RECORDING = "recording"
+TRANSCRIPTION = "transcription"
+_KINDS = (RECORDING, TRANSCRIPTION)
+
+
+class Lease:
+    """Thread budget handed out by :class:`ResourceScheduler`."""
+
+    def __init__(self, scheduler: "ResourceScheduler", kind: str, threads: int) -> None:
+        self.kind = kind
+        self.threads = threads
+        self._scheduler = scheduler
+        self._released = False
+
+    def release(self) -> None:
+        """Return the budget to the scheduler (idempotent)."""
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self)
+
+    def __enter__(self) -> "Lease":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def __repr__(self) -> str:
+        return f"Lease({self.kind!r}, threads={self.threads})"
+
+
+class ResourceScheduler:
+    """Track active jobs and assign CPU thread budgets to new ones.
+
+    Parameters
+    ----------
+    total_cores : int | None
+        Cores to distribute; defaults to :func:`os.cpu_count`.
+    recording_threads : int, default 2
+        Threads given to each recording (capture + mp3 encoding).
+    max_recordings : int, default 1
+        Recordings whose threads are always held in reserve.
+    """
+
+    def __init__(
+        self,
+        total_cores: Optional[int] = None,
+        recording_threads: int = 2,
+        max_recordings: int = 1,
+    ) -> None:
+        self.total_cores = max(1, total_cores or os.cpu_count() or 1)
+        self.recording_threads = recording_threads
+        self.max_recordings = max_recordings
+        self._active = {kind: 0 for kind in _KINDS}
+        self._granted = 0               # потоков в аренде у транскрибаций
+        self._lock = threading.Lock()
+        self._freed = threading.Condition(self._lock)
+
+    # ------------------------------------------------------------------
+    # Budgets
+    # ------------------------------------------------------------------
+
+    def active(self, kind: str) -> int:
+        """Number of currently held leases of *kind*."""
+        with self._lock:
+            return self._active[kind]
+
+    def _reserved_for_recording(self) -> int:
+        recordings = max(self._active[RECORDING], self.max_recordings)
+        # Хотя бы одно ядро всегда остаётся транскрибации.
+        return min(recordings * self.recording_threads, self.total_cores - 1)
+
+    def _free_cores(self) -> int:
+        return self.total_cores - self._reserved_for_recording()
+
+    def _transcription_threads(self, jobs: int) -> int:
+        # вызывается под self._lock
+        return max(1, self._free_cores() // max(1, jobs))
+
+    def granted(self) -> int:
+        """Threads currently leased to transcriptions."""
+        with self._lock:
+            return self._granted
+
+    def transcription_threads(self, jobs: int) -> int:
+        """Threads per job when *jobs* transcriptions run side by side."""
+        with self._lock:
+            return self._transcription_threads(jobs)
+
+    def _thread_budget(self, kind: str) -> int:
+        # вызывается под self._lock
+        if kind == RECORDING:
+            return self.recording_threads
+        if kind == TRANSCRIPTION:
+            left = self._free_cores() - self._granted
+            if left <= 0:
+                return 0
+            return min(left, self._transcription_threads(self._active[TRANSCRIPTION] + 1))
+        raise ValueError(f"unknown job kind: {kind!r}")
+
+    def thread_budget(self, kind: str) -> int:
+        """Budget a new job of *kind* would receive right now (0 – it would wait)."""
+        with self._lock:
+            return self._thread_budget(kind)
+
+    # ------------------------------------------------------------------
+    # Leases
+    # ------------------------------------------------------------------
+
+    def acquire(self, kind: str, timeout: Optional[float] = None) -> Lease:
+        """Register a new job of *kind* and return its :class:`Lease`.
+
+        Budgets are fixed at acquisition time: CTranslate2 and ffmpeg cannot
+        resize their thread pools on the fly, so running jobs keep what they
+        got and only new jobs see the changed load.  A transcription never
+        gets more than the threads not yet leased; when none are left it
+        waits for a release.  Recordings never wait.
+
+        Raises
+        ------
+        TimeoutError
+            If no threads were freed within *timeout* seconds.
+        ValueError
+            If *kind* is unknown.
+        """
+        # Бюджет и счётчик – под одной блокировкой, иначе два одновременных
+        # acquire видят одну и ту же нагрузку и оба получают всё.
+        with self._lock:
+            threads = self._freed.wait_for(lambda: self._thread_budget(kind), timeout)
+            if not threads:
+                raise TimeoutError(f"no CPU threads freed for a {kind} job within {timeout} s")
+            self._active[kind] += 1
+            if kind == TRANSCRIPTION:
+                self._granted += threads
+        return Lease(self, kind, threads)
+
+    def _release(self, lease: Lease) -> None:
+        with self._lock:
+            self._active[lease.kind] = max(0, self._active[lease.kind] - 1)
+            if lease.kind == TRANSCRIPTION:
+                self._granted = max(0, self._granted - lease.threads)
+            self._freed.notify_all()
+
+
+_default: Optional[ResourceScheduler] = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler() -> ResourceScheduler:
+    """Process-wide scheduler shared by the GUI, the server and background jobs."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResourceScheduler()
+        return _default
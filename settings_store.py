@@ -0,0 +1,267 @@
+"""
+ settings_store.py – настройки в памяти с отложенной атомарной записью.
+
+ Чтение идёт из словаря в памяти.  Запись меняет словарь, уведомляет
+ подписчиков и откладывает сохранение на *debounce* секунд.  Серия
+ изменений (например, «Сохранить» в панели настроек) даёт одну запись
+ файла.  Файл пишется через временный файл и ``os.replace``, поэтому
+ другой процесс никогда не увидит его наполовину записанным.  Перед
+ записью файл перечитывается под файлом‑замком, и поверх кладутся только
+ ключи, изменённые здесь: два окна или процесса не затирают чужие
+ настройки.  Несохранённое сбрасывается при выходе (``atexit``, в Qt –
+ ещё и ``aboutToQuit``).
+
+ Файл по умолчанию лежит в папке настроек пользователя: ``%APPDATA%`` в
+ Windows, ``~/Library/Application Support`` в macOS, ``$XDG_CONFIG_HOME``
+ (``~/.config``) в Linux; ``SOUNDDRAFTICO_SETTINGS`` задаёт путь явно.
+
+ Использование::
+
+     store = SettingsStore("settings.json")
+     store.subscribe(lambda key, value: print(key, "→", value))
+     store.set("audio/device", "Микрофон")
+     store.get("audio/device")
+     store.flush()
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+__all__ = ["SettingsStore", "default_store", "DEFAULT_PATH"]
+
+
+def _config_dir() -> Path:
+    """Per-user config folder of the platform (as ``QStandardPaths.AppConfigLocation``)."""
+    if os.name == "nt":
+        base = os.environ.get("APPDATA") or Path.home() / "AppData" / "Roaming"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Application Support"
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config"
+    return Path(base) / "sounddraftico"
+
+
+DEFAULT_PATH = Path(os.environ.get("SOUNDDRAFTICO_SETTINGS") or _config_dir() / "settings.json")
+_MISSING = object()
+
+
+class SettingsStore:
+    """Cached key/value settings persisted to a JSON file.
+
+    Parameters
+    ----------
+    path : str | Path
+        Settings file; :data:`DEFAULT_PATH` by default.
+    debounce : float, default 0.5
+        Seconds of quiet after the last change before the file is written.
+    lock_timeout : float, default 2.0
+        How long :meth:`flush` waits for another process holding the lock.
+    """
+
+    def __init__(
+        self, path: Union[str, Path] = DEFAULT_PATH, *, debounce: float = 0.5, lock_timeout: float = 2.0
+    ) -> None:
+        self.path = Path(path)
+        self.debounce = debounce
+        self.lock_timeout = lock_timeout
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()   # один flush за раз; get/set его не ждут
+        self._data: dict = {}
+        self._dirty: set = set()
+        self._listeners: list = []
+        self._timer: Optional[threading.Timer] = None
+        self.writes = 0                  # сколько раз файл был записан
+        self.is_new = not self.path.exists()
+        self._data = self._read_file()
+        atexit.register(self.flush)
+
+    # -- reading ----------------------------------------------------------
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._data
+
+    # -- writing ----------------------------------------------------------
+    def set(self, key: str, value: Any) -> None:
+        """Change *key* in memory, notify subscribers and schedule a flush."""
+        with self._lock:
+            if self._data.get(key, _MISSING) == value:
+                return
+            self._data[key] = value
+            self._dirty.add(key)
+            self._schedule()
+        self._notify(key, value)
+
+    def update(self, values: dict) -> None:
+        for key, value in values.items():
+            self.set(key, value)
+
+    def import_legacy(self, loader: Callable[[], dict]) -> bool:
+        """Fill a store created without a file from *loader* (old QSettings).
+
+        Returns ``True`` if anything was imported.  Existing keys win.
+        """
+        with self._lock:
+            if not self.is_new:
+                return False
+            self.is_new = False
+            values = {k: v for k, v in loader().items() if k not in self._data}
+            if not values:
+                return False
+            self._data.update(values)
+            self._dirty.update(values)
+        self.flush()
+        return True
+
+    # -- notifications ----------------------------------------------------
+    def subscribe(self, callback: Callable[[str, Any], None]) -> Callable:
+        """Call ``callback(key, value)`` after every change; returns it."""
+        with self._lock:
+            self._listeners.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self, key: str, value: Any) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(key, value)
+            except Exception as exc:
+                print(f"Ошибка в подписчике настроек {callback!r}: {exc}")
+
+    # -- persistence ------------------------------------------------------
+    def _schedule(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.debounce, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _read_file(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data.get("values", {}) if isinstance(data, dict) else {}
+
+    def _acquire_file_lock(self) -> Optional[Path]:
+        """Create ``<file>.lock`` exclusively; a lock older than 10 s is stale."""
+        lock = self.path.with_name(self.path.name + ".lock")
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return lock
+            except FileExistsError:
+                try:
+                    if time.time() - lock.stat().st_mtime > 10:
+                        lock.unlink()
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    return None   # пишем без замка: os.replace всё равно атомарен
+                time.sleep(0.01)
+
+    def flush(self) -> bool:
+        """Write pending changes now; returns ``True`` if the file was written.
+
+        Only the snapshot of changed keys is taken under the store lock;
+        the file lock, read and write happen outside it, so :meth:`get`
+        and :meth:`set` never wait for the disk.
+
+        Raises
+        ------
+        OSError
+            If the file cannot be written; the changes stay pending.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return False
+                pending = {key: self._data[key] for key in self._dirty if key in self._data}
+                self._dirty.clear()
+            try:
+                merged = self._write_file(pending)
+            except BaseException:
+                with self._lock:
+                    self._dirty.update(pending)
+                raise
+            with self._lock:
+                # Ключи, изменённые во время записи, остаются нашими и ждут следующего flush
+                changed = {
+                    k: v for k, v in merged.items()
+                    if k not in self._dirty and self._data.get(k, _MISSING) != v
+                }
+                self._data = {**merged, **{k: self._data[k] for k in self._dirty if k in self._data}}
+                self.writes += 1
+        for key, value in changed.items():
+            self._notify(key, value)
+        return True
+
+    def _write_file(self, pending: dict) -> dict:
+        """Merge *pending* over the file on disk under the file lock; returns the result."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock = self._acquire_file_lock()
+        try:
+            # Чужие изменения с диска + наши изменённые ключи поверх
+            merged = self._read_file()
+            merged.update(pending)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(
+                json.dumps({"version": 1, "values": merged}, ensure_ascii=False, indent=1),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.path)
+        finally:
+            if lock is not None:
+                lock.unlink(missing_ok=True)
+        return merged
+
+    def reload(self) -> dict:
+        """Pick up changes written by other processes; returns the changed keys.
+
+        Keys changed here and not yet flushed are kept.
+        """
+        with self._lock:
+            disk = self._read_file()
+            changed = {
+                k: v for k, v in disk.items()
+                if k not in self._dirty and self._data.get(k, _MISSING) != v
+            }
+            self._data.update(changed)
+        for key, value in changed.items():
+            self._notify(key, value)
+        return changed
+
+
+_default: Optional[SettingsStore] = None
+_default_lock = threading.Lock()
+
+
+def default_store() -> SettingsStore:
+    """Process-wide store at :data:`DEFAULT_PATH`."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = SettingsStore()
+        return _default
@@ -0,0 +1,145 @@
+"""
+ shared_model.py – несколько одновременных транскрибаций на одной
+ загруженной модели.
+
+ CTranslate2 умеет обслуживать ``num_workers`` запросов к одному экземпляру
+ ``WhisperModel`` параллельно, разделяя веса в памяти.  Исполнитель ниже
+ загружает модель под N воркеров (потоки CPU делит
+ :class:`resource_scheduler.ResourceScheduler`) и раздаёт файлы пулу потоков.
+
+ Использование::
+
+     with SharedModelExecutor("large-v3", device="cuda", workers=2) as pool:
+         futures = [pool.submit(p) for p in paths]
+         outputs = [f.result() for f in futures]
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from audio2text import load_model, transcribe_audio
+from resource_scheduler import default_scheduler
+
+__all__ = ["SharedModelExecutor"]
+
+
+class SharedModelExecutor:
+    """Run up to *workers* :func:`transcribe_audio` calls against one model.
+
+    Parameters
+    ----------
+    model_name, device
+        Model to load through :func:`audio2text.load_model`.
+    workers : int, default 2
+        Concurrent requests; the model is loaded with ``num_workers=workers``.
+    model : WhisperModel | None
+        Preloaded model; it must have been created with enough workers.
+    scheduler : ResourceScheduler | None
+        Source of the per-worker CPU thread budget.
+    monitor : ProcessMonitor | None
+        Each worker thread is registered there as
+        ``transcription-worker-N`` (per-thread CPU, process RSS/I/O).
+    """
+
+    def __init__(
+        self,
+        model_name: str = "large-v3",
+        device: str = "cuda",
+        *,
+        workers: int = 2,
+        model=None,
+        scheduler=None,
+        monitor=None,
+    ) -> None:
+        self.workers = workers
+        scheduler = scheduler or default_scheduler()
+        self.cpu_threads = scheduler.transcription_threads(workers)
+        self.model = model or load_model(model_name, device, self.cpu_threads, workers)
+        self.monitor = monitor
+        self._monitor_labels: list[str] = []
+        self._worker_ids = itertools.count(1)
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="shared-model",
+            initializer=self._register_worker if monitor else None,
+        )
+        self._outputs: set[Path] = set()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        input_audio: Union[str, Path],
+        *,
+        out_path: Optional[Union[str, Path]] = None,
+        progress_handler: Optional[Callable] = None,
+        segment_handler: Optional[Callable] = None,
+        **kwargs,
+    ) -> "Future[Path]":
+        """Queue *input_audio*; the future resolves to the transcript path.
+
+        Callbacks are bound to this request only and run in its worker
+        thread.  Two in-flight requests may not write the same *out_path*;
+        requests with ``formats=()`` write nothing, reserve no path and
+        resolve to ``None``.
+        """
+        audio_path = Path(input_audio).expanduser().resolve()
+        output = Path(out_path).expanduser().resolve() if out_path else audio_path.with_suffix(".txt")
+        if "formats" in kwargs:
+            kwargs["formats"] = tuple(kwargs["formats"])
+        if kwargs.get("formats", True):
+            with self._lock:
+                if output in self._outputs:
+                    raise ValueError(f"output already being written by another request: {output}")
+                self._outputs.add(output)
+        else:
+            output = None
+        try:
+            future = self._pool.submit(
+                transcribe_audio,
+                audio_path,
+                model=self.model,
+                out_path=output,
+                progress_handler=progress_handler,
+                segment_handler=segment_handler,
+                **kwargs,
+            )
+        except BaseException:
+            self._release(output)
+            raise
+        future.add_done_callback(lambda _f: self._release(output))
+        return future
+
+    def _release(self, output: Optional[Path]) -> None:
+        if output is None:
+            return
+        with self._lock:
+            self._outputs.discard(output)
+
+    def map(self, paths, **kwargs) -> list[Path]:
+        """Transcribe all *paths* and return transcript paths in order."""
+        return [f.result() for f in [self.submit(p, **kwargs) for p in paths]]
+
+    def _register_worker(self) -> None:
+        # Выполняется в самом потоке воркера при его создании
+        label = f"transcription-worker-{next(self._worker_ids)}"
+        self.monitor.watch(os.getpid(), label, tid=threading.get_native_id())
+        with self._lock:
+            self._monitor_labels.append(label)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+        if self.monitor:
+            for label in self._monitor_labels:
+                self.monitor.unwatch(label)
+
+    def __enter__(self) -> "SharedModelExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
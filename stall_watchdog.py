@@ -0,0 +1,150 @@
+"""
+ stall_watchdog.py – поиск зависаний GUI‑потока.
+
+ GUI‑поток вызывает :meth:`StallWatchdog.tick` по таймеру (в Qt –
+ ``QTimer`` на 50 мс).  Отдельный поток следит за последним «тиком».  Если
+ его не было дольше *threshold_ms*, поток снимает Python‑стек GUI‑потока
+ через :func:`sys._current_frames`, пока зависание длится.  Когда цикл
+ событий оживает, зависание записывается событием: длительность, стеки и
+ время.  События пишутся в JSON‑lines журнал и считаются в
+ :attr:`StallWatchdog.count`.
+
+ Модуль не зависит от Qt и тестируется без GUI.
+
+ Использование::
+
+     dog = StallWatchdog(threshold_ms=250)
+     timer = QTimer(); timer.timeout.connect(dog.tick); timer.start(50)
+     dog.start()
+"""
+
+from __future__ import annotations
+
+import collections
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+__all__ = ["StallEvent", "StallWatchdog", "DEFAULT_LOG"]
+
+DEFAULT_LOG = Path(
+    os.environ.get("SOUNDDRAFTICO_CACHE", Path.home() / ".cache" / "sounddraftico")
+) / "stalls.jsonl"
+
+
+@dataclass
+class StallEvent:
+    """One period in which the watched thread did not tick."""
+
+    started: float                 # epoch-секунды последнего тика перед зависанием
+    duration_ms: float
+    stacks: list = field(default_factory=list)   # уникальные снимки стека, по порядку
+
+    @property
+    def location(self) -> str:
+        """Innermost frame of the first stack sample, ``file:line in func``."""
+        if not self.stacks or not self.stacks[0]:
+            return "?"
+        return self.stacks[0][-1].strip().splitlines()[0]
+
+
+class StallWatchdog:
+    """Detect and record stalls of one thread's event loop.
+
+    Parameters
+    ----------
+    threshold_ms : float, default 250
+        A gap between ticks longer than this is a stall.
+    thread_id : int | None
+        Thread whose stack is sampled; defaults to the thread creating
+        the watchdog (the GUI thread).
+    log_path : str | Path | None
+        JSON-lines file for events; :data:`DEFAULT_LOG` by default,
+        ``False`` disables the log.
+    max_samples : int, default 5
+        Distinct stack samples kept per stall.
+    on_stall : Callable[[StallEvent], None] | None
+        Called from the watchdog thread after each stall.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 250.0,
+        *,
+        thread_id: Optional[int] = None,
+        log_path: Union[str, Path, None, bool] = None,
+        max_samples: int = 5,
+        max_events: int = 100,
+        on_stall: Optional[Callable[[StallEvent], None]] = None,
+    ) -> None:
+        self.threshold = threshold_ms / 1000.0
+        self.thread_id = thread_id or threading.get_ident()
+        self.log_path = None if log_path is False else Path(log_path or DEFAULT_LOG)
+        self.max_samples = max_samples
+        self.on_stall = on_stall
+        self.events: collections.deque = collections.deque(maxlen=max_events)
+        self.count = 0
+        self._last = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def tick(self) -> None:
+        """Mark the watched loop as alive; cheap enough for a 50 ms timer."""
+        self._last = time.monotonic()
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self.tick()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # ------------------------------------------------------------------
+
+    def _sample_stack(self) -> list:
+        frame = sys._current_frames().get(self.thread_id)
+        return traceback.format_stack(frame) if frame is not None else []
+
+    def _run(self) -> None:
+        poll = self.threshold / 4
+        while not self._stop.wait(poll):
+            last = self._last
+            if time.monotonic() - last <= self.threshold:
+                continue
+            # Зависание: снимаем стеки, пока поток не тикнет снова.
+            started_wall = time.time() - (time.monotonic() - last)
+            stacks: list = []
+            while self._last == last and not self._stop.is_set():
+                stack = self._sample_stack()
+                if stack and stack not in stacks and len(stacks) < self.max_samples:
+                    stacks.append(stack)
+                self._stop.wait(poll)
+            if self._last == last:      # остановлены во время зависания
+                return
+            self._record(StallEvent(started_wall, (self._last - last) * 1000.0, stacks))
+
+    def _record(self, event: StallEvent) -> None:
+        self.events.append(event)
+        self.count += 1
+        if self.log_path:
+            try:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as fp:
+                    fp.write(json.dumps(asdict(event), ensure_ascii=False) + "\n")
+            except OSError as exc:
+                print(f"Не удалось записать журнал зависаний: {exc}")
+        if self.on_stall:
+            self.on_stall(event)
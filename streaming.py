@@ -0,0 +1,222 @@
+"""
+ streaming.py – транскрибация длинных записей с постоянным расходом памяти.
+
+ Faster‑Whisper сначала декодирует весь файл в один массив float32: шесть
+ часов 16 кГц моно – это ~1.4 ГБ поверх модели.  Здесь ffmpeg отдаёт PCM
+ через pipe, а модель получает его окнами фиксированной длины.  Пиковая
+ память определяется окном, а не длительностью файла.
+
+ Чтобы не резать слова на границе окна, сегменты, заканчивающиеся ближе
+ *guard_seconds* к концу окна, откладываются: их звук переносится в начало
+ следующего окна и распознаётся заново.
+
+ Использование::
+
+     transcribe_streaming("conference.mp3", model=load_model(), window_seconds=300)
+
+ или из CLI::
+
+     python audio2text.py conference.mp3 --stream
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from audio2text import decoding_options, load_model, remap_segment, shift_segment
+from ffmpeg_core import FFMPEG_BINARY
+from timemap import TimeMap
+from transcript_writers import open_writers
+
+__all__ = ["open_pcm_stream", "iter_pcm_windows", "transcribe_streaming", "SAMPLE_RATE"]
+
+SAMPLE_RATE = 16000
+
+
+def open_pcm_stream(
+    path: Union[str, Path],
+    *,
+    start: float = 0.0,
+    sample_rate: int = SAMPLE_RATE,
+    channels: int = 1,
+    extra_args=(),
+    low_priority: bool = False,
+) -> subprocess.Popen:
+    """Spawn ffmpeg decoding *path* to signed 16-bit little-endian PCM on stdout.
+
+    With ``low_priority=True`` the decoder runs single-threaded at below
+    normal OS priority (background indexing).
+    """
+    cmd = [FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if low_priority:
+        cmd += ["-threads", "1"]
+    if start > 0:
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += ["-i", str(path), *extra_args, "-ac", str(channels), "-ar", str(sample_rate), "-f", "s16le", "-"]
+    kwargs = {}
+    if low_priority:
+        if sys.platform.startswith("win"):
+            kwargs["creationflags"] = subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        else:
+            kwargs["preexec_fn"] = lambda: os.nice(10)
+    return subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL, **kwargs
+    )
+
+
+def iter_pcm_windows(source: BinaryIO, window_samples: int) -> Iterator[np.ndarray]:
+    """Read s16le mono PCM from *source* and yield float32 windows.
+
+    Raw bytes go into one reusable buffer via ``readinto``; only the float32
+    copy handed to the model is allocated per window.  The last window may
+    be shorter.
+    """
+    raw = np.empty(window_samples, dtype=np.int16)
+    view = memoryview(raw).cast("B")
+    while True:
+        filled = 0
+        while filled < len(view):
+            n = source.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        samples = filled // 2
+        if samples:
+            window = raw[:samples].astype(np.float32)
+            window *= 1.0 / 32768.0
+            yield window
+        if filled < len(view):
+            return
+
+
+def transcribe_streaming(
+    input_audio: Union[str, Path],
+    *,
+    model=None,
+    model_name: str = "large-v3",
+    device: str = "cuda",
+    out_path: Optional[Union[str, Path]] = None,
+    window_seconds: float = 300.0,
+    guard_seconds: float = 5.0,
+    beam_size: int = 5,
+    preset=None,
+    language: str = "ru",
+    segment_handler: Optional[Callable[[object], None]] = None,
+    pcm_source: Optional[BinaryIO] = None,
+    formats: Iterable[str] = ("txt",),
+    word_timestamps: bool = False,
+    engine: str = "faster-whisper",
+) -> Path:
+    """Transcribe *input_audio* window by window with bounded memory.
+
+    Parameters
+    ----------
+    input_audio : str | Path
+        Source file; decoded by an ffmpeg subprocess unless *pcm_source*
+        is given.
+    window_seconds : float, default 300
+        Audio fed to the model per call.  Peak memory is about two windows
+        of float32 samples regardless of the file length.
+    guard_seconds : float, default 5
+        Segments ending this close to the window edge are re-decoded with
+        the next window instead of being cut.
+    pcm_source : BinaryIO | None
+        Ready 16 kHz s16le mono stream (used by tests and callers that
+        already have PCM).
+    segment_handler : Callable[[Segment], None] | None
+        Called for every final segment with absolute timestamps.
+    formats : Iterable[str], default ("txt",)
+        Output formats written as the windows finish; the first one goes
+        to *out_path*, see :func:`transcript_writers.open_writers`.
+
+    Other parameters are as in :func:`audio2text.transcribe_audio`.
+
+    Returns
+    -------
+    Path
+        Path to the generated text file.
+    """
+    audio_path = Path(input_audio).expanduser().resolve()
+    formats = list(dict.fromkeys(formats))
+    output_path = (
+        Path(out_path).expanduser().resolve() if out_path else audio_path.with_suffix("." + formats[0])
+    )
+    if model is None:
+        model = load_model(model_name, device, engine=engine)
+    options = decoding_options(language, beam_size, preset)
+    if word_timestamps:
+        options["word_timestamps"] = True
+
+    proc = None
+    if pcm_source is None:
+        if not audio_path.exists():
+            raise FileNotFoundError(audio_path)
+        proc = open_pcm_stream(audio_path)
+        pcm_source = proc.stdout
+
+    time_map = TimeMap.for_audio(audio_path)
+    window_samples = int(window_seconds * SAMPLE_RATE)
+    carry = np.zeros(0, dtype=np.float32)
+    offset = 0.0          # абсолютное время начала буфера, с
+
+    print(f"Начинаем потоковую транскрибацию {audio_path.name}…")
+
+    def process(buffer: np.ndarray, final: bool, out) -> np.ndarray:
+        """Transcribe *buffer*, write finished segments, return the carry-over."""
+        nonlocal offset
+        segments, _info = model.transcribe(buffer, **options)
+        length = len(buffer) / SAMPLE_RATE
+        limit = length - (0 if final else guard_seconds)
+        cut = limit
+
+        def emit(seg) -> None:
+            seg = shift_segment(seg, offset)
+            if time_map:
+                seg = remap_segment(seg, time_map.to_original)
+            out.write(seg)
+            if segment_handler:
+                segment_handler(seg)
+
+        for seg in segments:
+            if not final and seg.end > limit:
+                # Сегмент у края окна: распознаем заново вместе со следующим.
+                cut = seg.start
+                # Перенос не должен превышать окно – иначе память росла бы.
+                # Тогда сегмент пишем как есть и режем по его концу, ничего не теряя.
+                if (len(buffer) - int(max(0.0, cut) * SAMPLE_RATE)) > window_samples:
+                    emit(seg)
+                    cut = min(seg.end, length)
+                break
+            emit(seg)
+        out.flush()
+        if final:
+            return np.zeros(0, dtype=np.float32)
+        cut_samples = max(0, int(cut * SAMPLE_RATE))
+        offset += cut_samples / SAMPLE_RATE
+        return buffer[cut_samples:].copy()
+
+    try:
+        with open_writers(output_path, formats) as out:
+            final = False
+            for chunk in iter_pcm_windows(pcm_source, window_samples):
+                final = len(chunk) < window_samples
+                buffer = np.concatenate((carry, chunk)) if len(carry) else chunk
+                del chunk
+                carry = process(buffer, final, out)
+                del buffer
+            if not final and len(carry):
+                process(carry, True, out)
+    finally:
+        if proc is not None:
+            proc.stdout.close()
+            proc.kill()
+            proc.wait()
+
+    print(f"Транскрибация завершена. Файл сохранён: {output_path}")
+    return output_path
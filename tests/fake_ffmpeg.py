@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+ fake_ffmpeg.py – детерминированная замена ffmpeg для тестов записи.
+
+ Понимает ровно то, что передаёт :class:`ffmpeg_core.FFmpegProgressWatcher`:
+ берёт выходной файл (после ``-nostats``) и битрейт (``-b:a``), пишет в
+ stdout блоки ``-progress`` в формате ffmpeg, растит выходной файл и
+ останавливается по ``q`` из stdin.  Поведение задаётся переменными
+ окружения ``FAKE_FFMPEG_*`` (см. :data:`DEFAULTS`):
+
+ ``RATE``          блоков в секунду реального времени (0 – без пауз);
+ ``MEDIA_STEP``    секунд записи на блок (60 – час за 60 блоков);
+ ``BLOCKS``        после стольких блоков только ждать ``q`` (0 – без предела);
+ ``CHUNK``         писать блок кусками по столько байт (медленная труба);
+ ``CHUNK_DELAY``   пауза между кусками, с;
+ ``WRITE_RATIO``   доля «закодированных» байт, реально записываемых в файл;
+ ``QUIT_DELAY``    сколько «дописывать» файл после ``q``, с;
+ ``ON_QUIT``       ``exit`` – финальный блок и код 0, ``fail`` – пустой
+                   файл и код 1, ``ignore`` – не реагировать (ждать kill);
+ ``CRASH_AFTER``   упасть с кодом 1 после стольких блоков (0 – никогда).
+
+ Использование::
+
+     ffmpeg_core.FFMPEG_BINARY = str(fake_ffmpeg.install(tmp_path, RATE=0, BLOCKS=14400))
+
+ или из CLI::
+
+     FAKE_FFMPEG_BLOCKS=3 python tests/fake_ffmpeg.py -b:a 128k -nostats out.mp3
+"""
+
+from __future__ import annotations
+
+import os
+import shlex
+import sys
+import threading
+import time
+from pathlib import Path
+
+DEFAULTS = {
+    "RATE": 2.0,
+    "MEDIA_STEP": 0.5,
+    "BLOCKS": 0,
+    "CHUNK": 0,
+    "CHUNK_DELAY": 0.0,
+    "WRITE_RATIO": 1.0,
+    "QUIT_DELAY": 0.0,
+    "ON_QUIT": "exit",
+    "CRASH_AFTER": 0,
+}
+
+
+def install(directory, **config) -> Path:
+    """Write an executable ``ffmpeg`` wrapper with *config* baked in; returns its path.
+
+    Raises
+    ------
+    KeyError
+        If a setting is not one of :data:`DEFAULTS`.
+    """
+    lines = ["#!/bin/sh"]
+    for key, value in config.items():
+        if key not in DEFAULTS:
+            raise KeyError(f"unknown fake ffmpeg setting {key!r}")
+        lines.append(f"export FAKE_FFMPEG_{key}={shlex.quote(str(value))}")
+    lines.append(f'exec {shlex.quote(sys.executable)} {shlex.quote(str(Path(__file__).resolve()))} "$@"')
+    path = Path(directory) / "ffmpeg"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    path.chmod(0o755)
+    return path
+
+
+def progress_block(media_seconds: float, total_size: int, speed: float, end: bool = False) -> str:
+    """One ``-progress`` block as ffmpeg prints it for an audio-only output."""
+    us = int(media_seconds * 1_000_000)
+    if us:
+        bitrate = f"{total_size * 8 / media_seconds / 1000:6.1f}kbits/s"
+        speed_text = f"{speed:.3g}x"
+    else:
+        bitrate = speed_text = "N/A"
+    h, rest = divmod(us, 3_600_000_000)
+    m, rest = divmod(rest, 60_000_000)
+    return (
+        f"bitrate={bitrate}\n"
+        f"total_size={total_size}\n"
+        f"out_time_us={us}\n"
+        f"out_time_ms={us}\n"
+        f"out_time={h:02d}:{m:02d}:{rest / 1_000_000:09.6f}\n"
+        "dup_frames=0\n"
+        "drop_frames=0\n"
+        f"speed={speed_text}\n"
+        f"progress={'end' if end else 'continue'}\n"
+    )
+
+
+def _config() -> dict:
+    cfg = {}
+    for key, default in DEFAULTS.items():
+        raw = os.environ.get(f"FAKE_FFMPEG_{key}")
+        cfg[key] = default if raw is None else type(default)(raw)
+    return cfg
+
+
+def _parse_args(argv: list[str]) -> tuple[str, int]:
+    output = argv[argv.index("-nostats") + 1] if "-nostats" in argv else argv[-1]
+    bitrate = argv[argv.index("-b:a") + 1] if "-b:a" in argv else "128k"
+    bps = float(bitrate[:-1]) * 1000 if bitrate.lower().endswith("k") else float(bitrate)
+    return output, int(bps)
+
+
+def main(argv: list[str]) -> int:
+    cfg = _config()
+    output, bps = _parse_args(argv)
+    quit_requested = threading.Event()
+
+    def read_stdin():
+        for line in sys.stdin:
+            if line.strip() == "q":
+                quit_requested.set()
+
+    threading.Thread(target=read_stdin, daemon=True).start()
+    out = sys.stdout.buffer
+
+    def emit(text: str) -> None:
+        data = text.encode()
+        step = cfg["CHUNK"] or len(data)
+        for i in range(0, len(data), step):
+            out.write(data[i:i + step])
+            out.flush()
+            if cfg["CHUNK_DELAY"]:
+                time.sleep(cfg["CHUNK_DELAY"])
+
+    interval = 1.0 / cfg["RATE"] if cfg["RATE"] > 0 else 0.0
+    bytes_per_block = int(bps / 8 * cfg["MEDIA_STEP"])
+    padding = b"\xff" * int(bytes_per_block * cfg["WRITE_RATIO"])
+    blocks = 0
+    total_size = 0
+    started = time.monotonic()
+    try:
+        with open(output, "wb") as fp:
+            while not quit_requested.is_set():
+                if cfg["BLOCKS"] and blocks >= cfg["BLOCKS"]:
+                    quit_requested.wait()
+                    break
+                if cfg["CRASH_AFTER"] and blocks >= cfg["CRASH_AFTER"]:
+                    sys.stderr.write("audio=Microphone: I/O error\n")
+                    sys.stderr.flush()
+                    return 1
+                media = blocks * cfg["MEDIA_STEP"]
+                elapsed = time.monotonic() - started
+                emit(progress_block(media, total_size, media / elapsed if elapsed > 0 else 0.0))
+                fp.write(padding)
+                fp.flush()
+                total_size += bytes_per_block
+                blocks += 1
+                if interval:
+                    quit_requested.wait(interval)
+
+            if cfg["ON_QUIT"] == "ignore":
+                while True:
+                    time.sleep(3600)
+            time.sleep(cfg["QUIT_DELAY"])
+            if cfg["ON_QUIT"] == "fail":
+                fp.truncate(0)
+                sys.stderr.write("Error writing trailer of output: Invalid argument\n")
+                sys.stderr.flush()
+                return 1
+        media = blocks * cfg["MEDIA_STEP"]
+        emit(progress_block(media, total_size, media / max(time.monotonic() - started, 1e-9), end=True))
+    except BrokenPipeError:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,153 @@
+import json
+import os
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def archive(monkeypatch):
+    # waveform → streaming → audio2text тянет faster_whisper
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=object))
+    import importlib
+
+    for name in ("audio2text", "streaming", "waveform", "archive"):
+        module = importlib.import_module(name)
+        importlib.reload(module)
+    return sys.modules["archive"]
+
+
+class IdleScheduler:
+    def __init__(self, busy=0):
+        self.busy = busy
+
+    def active(self, kind):
+        if self.busy:
+            self.busy -= 1
+            return 1
+        return 0
+
+
+def fake_transcoder(src, dst, **kw):
+    tmp = Path(str(dst) + ".tmp")
+    tmp.write_bytes(b"o" * (Path(src).stat().st_size // 5))
+    return {"src": str(src), "tmp": str(tmp), "duration": 1.0, "bytes": tmp.stat().st_size}
+
+
+def _recording(folder, name, days_old, size=1000):
+    path = folder / name
+    path.write_bytes(b"m" * size)
+    mtime = time.time() - days_old * 86400
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _archiver(archive, tmp_path, policy, **kw):
+    kw.setdefault("scheduler", IdleScheduler())
+    return archive.Archiver(
+        policy,
+        catalog=archive.ArchiveCatalog(tmp_path / "catalog.json"),
+        executor_factory=lambda n: ThreadPoolExecutor(n),
+        transcoder=fake_transcoder,
+        **kw,
+    )
+
+
+def test_archives_old_recordings_and_moves_sidecars(archive, tmp_path):
+    old = _recording(tmp_path, "old.mp3", 40)
+    new = _recording(tmp_path, "new.mp3", 1)
+    live = _recording(tmp_path, "live.mp3", 60)
+    Path(str(old) + ".peaks.npz").write_bytes(b"p")
+    moved = []
+    archiver = _archiver(
+        archive, tmp_path, archive.ArchivePolicy(min_age_days=30), on_moved=lambda s, d: moved.append((s, d)),
+        scheduler=IdleScheduler(busy=1),
+    )
+    report = archiver.run([old, new, live, tmp_path / "missing.mp3"], exclude=[live])
+
+    dst = str(old.resolve().with_suffix(".opus"))
+    assert moved == report.archived == [(str(old.resolve()), dst)]
+    assert not old.exists() and new.exists() and live.exists()
+    assert Path(dst + ".peaks.npz").exists()
+    assert abs(Path(dst).stat().st_mtime - (time.time() - 40 * 86400)) < 5
+    assert report.saved_bytes == 800
+    catalog = json.loads((tmp_path / "catalog.json").read_text(encoding="utf-8"))
+    assert catalog["entries"][str(old.resolve())]["archived"] == dst
+    assert archive.ArchiveCatalog(tmp_path / "catalog.json").resolve(old.resolve()) == dst
+
+
+def test_budget_archives_newer_files_oldest_first(archive, tmp_path):
+    a = _recording(tmp_path, "a.wav", 5)
+    b = _recording(tmp_path, "b.wav", 3)
+    c = _recording(tmp_path, "c.wav", 1)
+    policy = archive.ArchivePolicy(min_age_days=30, budget_bytes=2500)
+    report = _archiver(archive, tmp_path, policy).run([a, b, c])
+    assert [Path(s).name for s, _ in report.archived] == ["a.wav"]
+    assert report.bytes_after == 2200 and report.over_budget == 0
+
+    policy.budget_bytes = 100
+    report = _archiver(archive, tmp_path, policy).run([a.with_suffix(".opus"), b, c])
+    assert sorted(Path(s).name for s, _ in report.archived) == ["b.wav", "c.wav"]
+    assert report.over_budget == 600 - 100
+
+
+def test_failed_encode_keeps_original(archive, tmp_path):
+    old = _recording(tmp_path, "old.mp3", 40)
+
+    def broken(src, dst, **kw):
+        raise RuntimeError("duration mismatch")
+
+    archiver = _archiver(archive, tmp_path, archive.ArchivePolicy())
+    archiver.transcoder = broken
+    report = archiver.run([old])
+    assert old.exists() and report.failed == [(str(old.resolve()), "duration mismatch")]
+    assert not (tmp_path / "catalog.json").exists()
+
+
+def test_transcode_verifies_duration(archive, tmp_path, monkeypatch):
+    src = tmp_path / "a.mp3"
+    src.write_bytes(b"m")
+    durations = {str(src): "60.0"}
+
+    def fake_run(cmd, **kw):
+        if cmd[0] == archive.FFMPEG_BINARY:
+            Path(cmd[-1]).write_bytes(b"opus")
+            return types.SimpleNamespace(returncode=0, stderr="")
+        path = cmd[-1]
+        data = {"streams": [{"codec_name": "opus" if path.endswith(".tmp") else "mp3"}],
+                "format": {"duration": durations.get(path, "59.8")}}
+        return types.SimpleNamespace(stdout=json.dumps(data))
+
+    monkeypatch.setattr(archive.subprocess, "run", fake_run)
+    result = archive.transcode_to_opus(src, src.with_suffix(".opus"), low_priority=False)
+    assert result["bytes"] == 4 and Path(result["tmp"]).exists()
+
+    durations[result["tmp"]] = "30.0"
+    with pytest.raises(RuntimeError, match="duration mismatch"):
+        archive.transcode_to_opus(src, src.with_suffix(".opus"), low_priority=False)
+    assert not Path(result["tmp"]).exists()
+
+
+def test_recordings_in_use_are_not_replaced(archive, tmp_path):
+    first = _recording(tmp_path, "first.mp3", 50)
+    second = _recording(tmp_path, "second.mp3", 40)
+    busy = {str(first)}
+
+    def transcoder(src, dst, **kw):
+        # пока кодируется вторая запись, её открыла транскрибация
+        busy.add(str(second))
+        return fake_transcoder(src, dst, **kw)
+
+    archiver = _archiver(archive, tmp_path, archive.ArchivePolicy(), in_use=lambda: busy)
+    archiver.transcoder = transcoder
+    report = archiver.run([first, second])
+    assert report.archived == []
+    assert report.failed == [(str(second.resolve()), "in use")]
+    assert first.exists() and second.exists()
+    assert not list(tmp_path.glob("*.opus*"))
@@ -3,8 +3,15 @@ import logging
 from pathlib import Path
 import types
 import tempfile
-import importlib
 import sys
+import wave
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import audio2text
+import engines
+from engines import StubEngine
 
 class DummyProgress:
     def __init__(self, elapsed, total, segments_done, step=1):
@@ -39,70 +46,158 @@ class DummyWhisperModelNoCb:
         return [segment], {}
 
 
-def test_model_caching(monkeypatch, tmp_path):
-    """ensure that load_model caches WhisperModel instances"""
-
-    dummy_module = types.SimpleNamespace(WhisperModel=DummyWhisperModel, TranscriptionProgress=DummyProgress)
-    monkeypatch.setitem(sys.modules, "faster_whisper", dummy_module)
-    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-    import importlib
-    audio2text = importlib.import_module("audio2text")
-    audio2text = importlib.reload(audio2text)
-    monkeypatch.setattr(audio2text, "WhisperModel", DummyWhisperModel)
-
-    DummyWhisperModel.init_count = 0
-    m1 = audio2text.load_model()
-    m2 = audio2text.load_model()
-    assert m1 is m2
-    assert DummyWhisperModel.init_count == 1
-
-    temp_file = tmp_path / "dummy3.wav"
-    temp_file.write_bytes(b"dummy")
+def _wav(path: Path, seconds: float) -> Path:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * int(16000 * seconds))
+    return path
 
-    out = audio2text.transcribe_audio(temp_file, model=m1)
-    assert Path(out).exists()
-    assert DummyWhisperModel.init_count == 1
-
-def test_transcribe_progress(monkeypatch, tmp_path):
-    # Prepare stub for faster_whisper before importing module
-    dummy_module = types.SimpleNamespace(WhisperModel=DummyWhisperModel, TranscriptionProgress=DummyProgress)
-    monkeypatch.setitem(sys.modules, "faster_whisper", dummy_module)
-    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-    import importlib
-    audio2text = importlib.import_module("audio2text")
-    audio2text = importlib.reload(audio2text)
-    monkeypatch.setattr(audio2text, "WhisperModel", DummyWhisperModel)
 
+def test_model_caching(monkeypatch, tmp_path):
+    """ensure that load_model caches engine instances"""
+
+    class CountingEngine(StubEngine):
+        name = "counting"
+        init_count = 0
+
+        @classmethod
+        def load(cls, *args, **kwargs):
+            cls.init_count += 1
+            return cls()
+
+    monkeypatch.setattr(engines, "ENGINES", dict(engines.ENGINES))
+    engines.register_engine(CountingEngine)
+    audio2text.clear_model_cache()
+    try:
+        m1 = audio2text.load_model(engine="counting")
+        m2 = audio2text.load_model(engine="counting")
+        assert m1 is m2
+        assert CountingEngine.init_count == 1
+
+        out = audio2text.transcribe_audio(_wav(tmp_path / "dummy3.wav", 1), model=m1)
+        assert Path(out).exists()
+        assert CountingEngine.init_count == 1
+    finally:
+        audio2text.clear_model_cache()
+
+def test_transcribe_progress(tmp_path):
     progress = []
     def handler(p):
         if p.total:
             progress.append(int(p.elapsed / p.total * 100))
     logger = logging.getLogger("test")
     logger.setLevel(logging.INFO)
-    temp_file = tmp_path / "dummy.wav"
-    temp_file.write_bytes(b"dummy")
+    temp_file = _wav(tmp_path / "dummy.wav", 5)
 
-    out = audio2text.transcribe_audio(temp_file, logger=logger, progress_handler=handler)
+    try:
+        out = audio2text.transcribe_audio(
+            temp_file, model_name="stub", device="cpu", engine="stub", logger=logger, progress_handler=handler
+        )
+    finally:
+        audio2text.clear_model_cache()
 
     assert Path(out).exists()
     assert progress[-1] == 100
 
 
-def test_transcribe_wo_progress_arg(monkeypatch, tmp_path):
+def test_transcribe_wo_progress_arg(tmp_path):
     """Проверяем работу с моделью, где нет параметра progress_callback."""
 
-    dummy_module = types.SimpleNamespace(WhisperModel=DummyWhisperModelNoCb, TranscriptionProgress=DummyProgress)
-    monkeypatch.setitem(sys.modules, "faster_whisper", dummy_module)
-    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-    import importlib
-    audio2text = importlib.import_module("audio2text")
-    audio2text = importlib.reload(audio2text)
-    monkeypatch.setattr(audio2text, "WhisperModel", DummyWhisperModelNoCb)
-
     temp_file = tmp_path / "dummy2.wav"
     temp_file.write_bytes(b"dummy")
 
-    out = audio2text.transcribe_audio(temp_file)
+    out = audio2text.transcribe_audio(temp_file, model=DummyWhisperModelNoCb())
 
     assert Path(out).exists()
 
+
+
+class SlowWhisperModel:
+    """Модель, выдающая много сегментов с паузой между ними."""
+
+    def __init__(self, *args, **kwargs):
+        self.produced = 0
+
+    def transcribe(self, path, language=None, beam_size=5, vad_filter=True):
+        import time
+
+        def gen():
+            for i in range(1000):
+                time.sleep(0.01)
+                self.produced += 1
+                yield types.SimpleNamespace(start=float(i), end=i + 1.0, text=f"seg {i}")
+        return gen(), {}
+
+
+def test_transcribe_async_cancel_and_deadline(tmp_path):
+    import asyncio
+
+
+    temp_file = tmp_path / "long.wav"
+    temp_file.write_bytes(b"dummy")
+
+    async def first_three(model):
+        got = []
+        async for seg in audio2text.transcribe_audio_async(temp_file, model=model):
+            got.append(seg.text)
+            if len(got) == 3:
+                break
+        return got
+
+    async def with_deadline(model):
+        with pytest.raises(TimeoutError):
+            async for _ in audio2text.transcribe_audio_async(temp_file, model=model, timeout=0.1):
+                pass
+
+    model = SlowWhisperModel()
+    assert asyncio.run(first_three(model)) == ["seg 0", "seg 1", "seg 2"]
+    model = SlowWhisperModel()
+    asyncio.run(with_deadline(model))
+    # Инференс останавливается на границе сегмента вскоре после отмены
+    import time
+    time.sleep(0.1)
+    stopped_at = model.produced
+    time.sleep(0.1)
+    assert model.produced == stopped_at < 1000
+
+
+def test_transcribe_applies_timemap(tmp_path):
+    """Время сегментов пересчитывается по карте тишины рядом с записью."""
+
+    from timemap import TimeMap
+
+    temp_file = tmp_path / "rec.mp3"
+    temp_file.write_bytes(b"dummy")
+    tm = TimeMap()
+    tm.add_silence(0.5, 30.5)
+    tm.save(TimeMap.sidecar_path(temp_file))
+
+    out = audio2text.transcribe_audio(temp_file, model=DummyWhisperModelNoCb())
+    assert Path(out).read_text(encoding="utf-8") == "[00:00:00.000 --> 00:00:31.000] hello\n"
+
+
+def test_transcribe_multiple_formats(tmp_path):
+
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"0")
+    out = audio2text.transcribe_audio(audio, model=DummyWhisperModel(), formats=("srt", "txt"))
+    assert out == audio.with_suffix(".srt").resolve()
+    assert out.read_text(encoding="utf-8").startswith("1\n00:00:00,000 --> 00:00:01,000\nhello")
+    assert (tmp_path / "a.txt").read_text(encoding="utf-8") == "[00:00:00.000 --> 00:00:01.000] hello\n"
+
+
+def test_lease_threads_share_one_bounded_model_cache(monkeypatch):
+    monkeypatch.setattr(audio2text, "MODEL_CACHE_SIZE", 2)
+    audio2text.clear_model_cache()
+    try:
+        # разные бюджеты аренды – одна и та же модель, а не копия на каждый
+        models = {id(audio2text.load_model("a", "cpu", threads, engine="stub")) for threads in (14, 7, 4, 3)}
+        assert len(models) == 1
+        audio2text.load_model("b", "cpu", engine="stub")
+        audio2text.load_model("c", "cpu", engine="stub")
+        info = audio2text.model_cache_info()
+        assert info["size"] == 2 and info["hits"] >= 3
+    finally:
+        audio2text.clear_model_cache()
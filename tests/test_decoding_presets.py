@@ -0,0 +1,53 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from decoding_presets import AdaptivePresetPolicy, calibrate_presets, get_preset, measured_rtf
+
+
+class RecordingModel:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, path, **kwargs):
+        self.calls.append(kwargs)
+        seg = types.SimpleNamespace(start=0.0, end=1.0, text="hello")
+        return iter([seg]), types.SimpleNamespace(duration=10.0)
+
+
+def test_policy_steps_down_under_load_and_back_up():
+    policy = AdaptivePresetPolicy(("accurate", "balanced", "fast"), queue_high=4, queue_low=1, wait_high=60)
+    assert policy.choose(0) == "accurate"
+    assert policy.choose(5) == "balanced"
+    assert policy.choose(5) == "fast"
+    assert policy.choose(5) == "fast"
+    # между порогами уровень не меняется
+    assert policy.choose(2) == "fast"
+    assert policy.choose(0, waited=120) == "fast"
+    assert policy.choose(0) == "balanced"
+    assert policy.choose(1) == "accurate"
+
+
+def test_preset_overrides_decoding_kwargs(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=object))
+    audio2text = importlib.reload(importlib.import_module("audio2text"))
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"dummy")
+    model = RecordingModel()
+
+    audio2text.transcribe_audio(audio, model=model, preset="fast")
+    audio2text.transcribe_audio(audio, model=model)
+
+    assert model.calls[0]["beam_size"] == 1
+    assert model.calls[0]["temperature"] == [0.0]
+    assert "best_of" not in model.calls[1]
+
+
+def test_calibration_is_stored_per_machine(tmp_path):
+    store = tmp_path / "rtf.json"
+    results = calibrate_presets(RecordingModel(), "clip.wav", model_name="stub", path=store)
+    assert set(results) == {"fast", "balanced", "accurate"}
+    assert measured_rtf("stub", store) == results
+    assert get_preset("fast").rtf is None
@@ -0,0 +1,124 @@
+import importlib
+import json
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import engines
+from engines import StubEngine, select_engine, word_error_rate
+
+
+def _wav(path: Path, seconds: float) -> Path:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * int(16000 * seconds))
+    return path
+
+
+def test_stub_engine_is_deterministic():
+    model = StubEngine(["раз два", "три"], segment_seconds=2.0)
+    progress = []
+    segments, info = model.transcribe(
+        np.zeros(16000 * 5, dtype=np.float32), word_timestamps=True, progress_callback=progress.append
+    )
+    segments = list(segments)
+    assert [(s.start, s.end, s.text) for s in segments] == [
+        (0.0, 2.0, " раз два"), (2.0, 4.0, " три"), (4.0, 5.0, " раз два"),
+    ]
+    assert [(w.start, w.word) for w in segments[0].words] == [(0.0, " раз"), (1.0, " два")]
+    assert info.duration == 5.0 and progress[-1].elapsed == progress[-1].total
+
+
+def test_transcribe_audio_with_stub_engine(tmp_path):
+    audio2text = importlib.import_module("audio2text")
+    assert isinstance(engines.get_engine("stub").load(), StubEngine)
+    try:
+        audio = _wav(tmp_path / "a.wav", 5)
+        out = audio2text.transcribe_audio(
+            audio, model_name="stub", device="cpu", engine="stub", formats=("txt", "json"), word_timestamps=True
+        )
+        assert out.read_text(encoding="utf-8").splitlines()[-1] == "[00:00:04.000 --> 00:00:05.000] сегмент 3"
+        data = json.loads(out.with_suffix(".json").read_text(encoding="utf-8"))
+        assert data[2]["words"][1]["word"] == " 3"
+        with pytest.raises(ValueError):
+            audio2text.load_model("x", "cpu", engine="nope")
+    finally:
+        audio2text.clear_model_cache()
+
+
+def test_audio_duration_is_probed_not_guessed(tmp_path):
+    assert engines._audio_seconds(_wav(tmp_path / "a.wav", 2.5)) == 2.5
+    clip = tmp_path / "a.mp3"
+    clip.write_bytes(b"\x00" * 16000)      # по старой оценке – ровно 1 с
+    # мусор ffprobe не разберёт, а без ffprobe длительность не угадывается
+    with pytest.raises(ValueError, match="cannot probe"):
+        engines._audio_seconds(clip)
+
+
+def test_engine_interface_is_abstract():
+    class NoTranscribe(engines.ASREngine):
+        name = "half"
+
+        @classmethod
+        def load(cls, model_name="x", device="cpu", cpu_threads=0, num_workers=1):
+            return cls()
+
+    with pytest.raises(TypeError):
+        engines.ASREngine()
+    with pytest.raises(TypeError):
+        NoTranscribe.load()
+    with pytest.raises(TypeError, match="transcribe"):
+        engines.register_engine(NoTranscribe)
+    assert "half" not in engines.ENGINES
+
+
+def test_word_error_rate():
+    assert word_error_rate("Привет, мир!", "привет мир") == 0.0
+    assert word_error_rate("a b c d", "a x c") == 0.5
+    assert word_error_rate("", "") == 0.0
+
+
+def test_select_engine_respects_quality_floor(monkeypatch, tmp_path):
+    reference = "добрый день коллеги"
+
+    class Accurate(StubEngine):
+        name = "accurate"
+
+        @classmethod
+        def load(cls, *args, **kwargs):
+            return cls([reference], segment_seconds=10.0, rtf=0.02)
+
+    class Slower(Accurate):
+        name = "slower"
+
+        @classmethod
+        def load(cls, *args, **kwargs):
+            return cls([reference], segment_seconds=10.0, rtf=0.1)
+
+    class Broken(StubEngine):
+        name = "broken"
+
+        @classmethod
+        def load(cls, *args, **kwargs):
+            raise RuntimeError("no GPU")
+
+    monkeypatch.setattr(engines, "ENGINES", dict(engines.ENGINES))
+    for cls in (Accurate, Slower, Broken):
+        engines.register_engine(cls)
+    clip = _wav(tmp_path / "clip.wav", 1)
+
+    chosen, results = select_engine(clip, reference, engines=["stub", "slower", "accurate", "broken"])
+    assert chosen == "accurate"
+    by_name = {r.engine: r for r in results}
+    assert by_name["stub"].wer == 1.0
+    assert by_name["broken"].error == "RuntimeError: no GPU" and by_name["broken"].rtf is None
+    assert by_name["accurate"].rtf < by_name["slower"].rtf
+
+    with pytest.raises(LookupError):
+        select_engine(clip, reference, engines=["stub"])
@@ -3,6 +3,8 @@ import sys
 import time
 from pathlib import Path
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 import ffmpeg_core
 
@@ -38,3 +40,191 @@ def test_stop_finishes(monkeypatch, tmp_path):
     result = watcher.stop()
     assert result["success"]
     assert result["output_file"] == str(out_file)
+
+
+def test_threads_budget_in_command(monkeypatch, tmp_path):
+    calls = []
+
+    def dummy_popen(cmd, *args, **kwargs):
+        calls.append(cmd)
+        return DummyProcess()
+
+    monkeypatch.setattr(ffmpeg_core.subprocess, "Popen", dummy_popen)
+    watcher = ffmpeg_core.FFmpegProgressWatcher("dummy", output_file=str(tmp_path / "o.mp3"), threads=2)
+    watcher.start()
+    watcher.stop()
+    cmd = calls[0]
+    assert cmd[cmd.index("-threads") + 1] == "2"
+
+
+def test_silence_compress_writes_timemap(monkeypatch, tmp_path):
+    calls = []
+
+    def dummy_popen(cmd, *args, **kwargs):
+        calls.append(cmd)
+        proc = DummyProcess()
+        proc.stderr = io.StringIO(
+            "[silencedetect @ 0x1] silence_start: 10\n"
+            "[silencedetect @ 0x1] silence_end: 40 | silence_duration: 30\n"
+        )
+        return proc
+
+    monkeypatch.setattr(ffmpeg_core.subprocess, "Popen", dummy_popen)
+    out_file = tmp_path / "out.mp3"
+    out_file.write_bytes(b"data")
+    watcher = ffmpeg_core.FFmpegProgressWatcher(
+        "dummy", output_file=str(out_file), silence_mode="compress", keep_silence=1.0
+    )
+    watcher.start()
+    time.sleep(0.05)
+    result = watcher.stop()
+
+    cmd = calls[0]
+    assert "silenceremove" in cmd[cmd.index("-af") + 1]
+    assert result["silence"]["periods"] == 1
+    assert result["silence"]["removed_seconds"] == 29.0
+    assert result["silence"]["saved_bytes"] == 29 * 128000 // 8
+
+    tm = ffmpeg_core.TimeMap.for_audio(out_file)
+    assert tm.to_original(5.0) == 5.0
+    assert tm.to_original(10.5) == 10.5
+    assert tm.to_original(12.0) == 41.0
+
+
+def test_level_meter_side_output(monkeypatch, tmp_path):
+    from level_meter import LevelMeter
+
+    calls = []
+
+    def dummy_popen(cmd, *args, **kwargs):
+        calls.append(cmd)
+        return DummyProcess()
+
+    monkeypatch.setattr(ffmpeg_core.subprocess, "Popen", dummy_popen)
+    out_file = str(tmp_path / "o.mp3")
+    meter = LevelMeter()
+    watcher = ffmpeg_core.FFmpegProgressWatcher("dummy", output_file=out_file, level_meter=meter)
+    watcher.start()
+    watcher.stop()
+    cmd = calls[0]
+    assert cmd[-1].startswith("tcp://127.0.0.1:")
+    assert cmd.index(out_file) < cmd.index("s16le")
+    assert meter._server is None
+
+
+def test_multi_source_graph_and_progress(monkeypatch, tmp_path):
+    import pytest
+
+    calls = []
+
+    def dummy_popen(cmd, *args, **kwargs):
+        calls.append(cmd)
+        proc = DummyProcess()
+        proc.stderr = io.StringIO(
+            "[ametadata@src0 @ 0x1] frame:3    pts:3000    pts_time:3\n"
+            "[ametadata@src0 @ 0x1] lavfi.astats.Overall.RMS_level=-23.5\n"
+            "[ametadata@src1 @ 0x2] frame:2    pts:2000    pts_time:2\n"
+            "[ametadata@src1 @ 0x2] lavfi.astats.Overall.RMS_level=-inf\n"
+        )
+        return proc
+
+    monkeypatch.setattr(ffmpeg_core.subprocess, "Popen", dummy_popen)
+    out_file = tmp_path / "out.mka"
+    out_file.write_bytes(b"data")
+    devices = ["Microphone", "Stereo Mix"]
+    watcher = ffmpeg_core.FFmpegProgressWatcher(devices, output_file=str(out_file), source_mode="tracks")
+    watcher.start()
+    time.sleep(0.05)
+    result = watcher.stop()
+
+    cmd = calls[0]
+    assert cmd.count("-i") == 2
+    assert [cmd[i + 1] for i, a in enumerate(cmd) if a == "-map"] == ["[rec0]", "[rec1]"]
+    assert "ametadata@src1" in cmd[cmd.index("-filter_complex") + 1]
+    assert result["sources"] == [
+        {"device": "Microphone", "time": 3.0, "rms_db": -23.5},
+        {"device": "Stereo Mix", "time": 2.0, "rms_db": -96.0},
+    ]
+
+    with pytest.raises(ValueError):
+        ffmpeg_core.FFmpegProgressWatcher(devices, output_file="x.mp3", source_mode="tracks")
+    mixed = ffmpeg_core.FFmpegProgressWatcher(devices, output_file="x.mp3", silence_mode="drop")
+    graph = mixed._build_cmd()[mixed._build_cmd().index("-filter_complex") + 1]
+    assert "amix=inputs=2" in graph and graph.endswith("[out]")
+
+
+def test_stop_async_does_not_block(monkeypatch, tmp_path):
+    import threading
+
+    release = threading.Event()
+
+    class SlowProcess(DummyProcess):
+        def wait(self, timeout=None):
+            release.wait(5)          # ffmpeg долго дописывает файл
+            return super().wait(timeout)
+
+    monkeypatch.setattr(ffmpeg_core.subprocess, "Popen", lambda *a, **k: SlowProcess())
+    out_file = tmp_path / "out.mp3"
+    out_file.write_bytes(b"data")
+    watcher = ffmpeg_core.FFmpegProgressWatcher("dummy", output_file=str(out_file))
+    watcher.start()
+    results = []
+    called = threading.Event()
+
+    started = time.monotonic()
+    future = watcher.stop_async(lambda r: (results.append(r), called.set()))
+    assert time.monotonic() - started < 0.1
+    assert watcher.finalizing and not future.done()
+
+    release.set()
+    result = future.result(timeout=2)
+    assert called.wait(1)
+    assert result["success"] and results == [result]
+    assert not watcher.finalizing
+
+
+def test_trailing_silence_closed_on_stop(monkeypatch, tmp_path):
+    def dummy_popen(cmd, *args, **kwargs):
+        proc = DummyProcess()
+        proc.stdout = io.StringIO("out_time=00:00:10.00\ntotal_size=100\n")
+        # тишина началась на 10-й секунде и шла до остановки – silence_end нет
+        proc.stderr = io.StringIO("[silencedetect @ 0x1] silence_start: 10\n")
+        return proc
+
+    monkeypatch.setattr(ffmpeg_core.subprocess, "Popen", dummy_popen)
+    out_file = tmp_path / "out.mp3"
+    out_file.write_bytes(b"data")
+    watcher = ffmpeg_core.FFmpegProgressWatcher("dummy", output_file=str(out_file), silence_mode="drop")
+    watcher.start()
+    watcher.time_map.started_at -= 40          # запись шла 40 с
+    time.sleep(0.05)
+    result = watcher.stop()
+
+    assert result["silence"]["periods"] == 1
+    assert result["silence"]["removed_seconds"] == pytest.approx(30, abs=0.5)
+    tm = ffmpeg_core.TimeMap.for_audio(out_file)
+    assert tm.to_original(5.0) == 5.0
+    assert tm.to_original(10.0) == pytest.approx(40, abs=0.5)
+
+
+def test_time_map_snapshot_is_independent(monkeypatch, tmp_path):
+    def dummy_popen(cmd, *args, **kwargs):
+        proc = DummyProcess()
+        proc.stdout = io.StringIO("")
+        proc.stderr = io.StringIO(
+            "[silencedetect @ 0x1] silence_start: 5\n[silencedetect @ 0x1] silence_end: 15\n"
+        )
+        return proc
+
+    monkeypatch.setattr(ffmpeg_core.subprocess, "Popen", dummy_popen)
+    out_file = tmp_path / "out.mp3"
+    out_file.write_bytes(b"data")
+    watcher = ffmpeg_core.FFmpegProgressWatcher("dummy", output_file=str(out_file), silence_mode="drop")
+    assert watcher.time_map_snapshot() is None
+    watcher.start()
+    watcher._stderr_thread.join(1)
+    snapshot = watcher.time_map_snapshot()
+    watcher.time_map.add_silence(20.0, 30.0)       # поток stderr продолжает дописывать карту
+    assert snapshot.periods == 1 and len(snapshot.anchors) == 3
+    assert snapshot.to_original(6.0) == 16.0
+    watcher.stop()
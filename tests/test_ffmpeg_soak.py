@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import ffmpeg_core
+import fake_ffmpeg
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="fake ffmpeg wrapper is a shell script")
+
+LINES_PER_BLOCK = fake_ffmpeg.progress_block(1.0, 1, 1.0).count("\n")
+
+
+def start_watcher(tmp_path, monkeypatch, **config):
+    monkeypatch.setattr(ffmpeg_core, "FFMPEG_BINARY", str(fake_ffmpeg.install(tmp_path, **config)))
+    out_file = tmp_path / "session.mp3"
+    watcher = ffmpeg_core.FFmpegProgressWatcher("Microphone", output_file=str(out_file), resource_monitor=False)
+    watcher.start()
+    return watcher, out_file
+
+
+def wait_for_progress(watcher, key, value, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with watcher._lock:
+            if watcher.last_progress.get(key) == value:
+                return True
+        time.sleep(0.005)
+    return False
+
+
+def test_fake_ffmpeg_block_format():
+    block = fake_ffmpeg.progress_block(3725.5, 59_608_000, 1.0)
+    assert "out_time=01:02:05.500000\n" in block
+    assert "out_time_us=3725500000\n" in block and block.endswith("progress=continue\n")
+    assert "bitrate=N/A" in fake_ffmpeg.progress_block(0, 0, 0)
+
+
+def run_session(tmp_path, monkeypatch, blocks):
+    """Record *blocks* seconds as fast as the fake ffmpeg can print them."""
+    tracemalloc.start()
+    try:
+        watcher, out_file = start_watcher(
+            tmp_path, monkeypatch, RATE=0, MEDIA_STEP=1.0, BLOCKS=blocks, WRITE_RATIO=0.001
+        )
+        started = time.perf_counter()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        assert wait_for_progress(watcher, "out_time_us", str((blocks - 1) * 1_000_000), timeout=blocks / 100 + 30)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = watcher.stop()
+    assert len(watcher.last_progress) == LINES_PER_BLOCK
+    assert result["success"]
+    assert result["size_bytes"] == blocks * 16000
+    assert out_file.stat().st_size == blocks * 16
+    return result, peak - baseline, elapsed
+
+
+def test_session_parses_with_bounded_memory(tmp_path, monkeypatch):
+    blocks = 3600                       # час записи, ~600 КБ прогресса
+    result, grown, _elapsed = run_session(tmp_path, monkeypatch, blocks)
+    # память парсера не зависит от объёма разобранного прогресса
+    assert grown < 512 * 1024 < blocks * len(fake_ffmpeg.progress_block(3600.0, 10**8, 1.0))
+    assert result["duration"] == "01:00:00.000000"               # финальный блок после 'q'
+
+
+@pytest.mark.skipif(
+    os.environ.get("SOUNDDRAFTICO_SOAK", "") in ("", "0"),
+    reason="4-hour soak with a throughput floor; set SOUNDDRAFTICO_SOAK=1",
+)
+def test_four_hour_session_bounded_memory_and_throughput(tmp_path, monkeypatch):
+    blocks = 4 * 3600                   # 4 часа по блоку на секунду записи
+    result, grown, elapsed = run_session(tmp_path, monkeypatch, blocks)
+    # Разобрано ~3 МБ прогресса, а память парсера не растёт с длиной сессии
+    assert grown < 512 * 1024 < blocks * len(fake_ffmpeg.progress_block(3600.0, 10**8, 1.0))
+    assert blocks * LINES_PER_BLOCK / elapsed > 20_000          # строк в секунду
+    assert result["duration"] == "04:00:00.000000"
+
+
+def test_stop_latency_follows_trailer_delay(tmp_path, monkeypatch):
+    watcher, _ = start_watcher(tmp_path, monkeypatch, RATE=50, MEDIA_STEP=0.5, QUIT_DELAY=0.3)
+    assert wait_for_progress(watcher, "out_time", "00:00:02.000000", timeout=5)
+    started = time.monotonic()
+    result = watcher.stop()
+    latency = time.monotonic() - started
+    assert 0.3 <= latency < 2.0
+    assert result["success"]
+    assert watcher.last_progress["progress"] == "end"
+
+
+def test_slow_pipe_split_lines(tmp_path, monkeypatch):
+    watcher, _ = start_watcher(
+        tmp_path, monkeypatch, RATE=0, MEDIA_STEP=0.5, BLOCKS=40, CHUNK=7, CHUNK_DELAY=0.0005
+    )
+    seen = set()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        with watcher._lock:
+            speed = watcher.last_progress.get("speed")
+            done = watcher.last_progress.get("out_time_us") == str(39 * 500_000)
+        if speed:
+            seen.add(speed)
+        if done:
+            break
+        time.sleep(0.001)
+    result = watcher.stop()
+    # куски по 7 байт не дают обрезанных значений
+    assert seen and all(s == "N/A" or s.endswith("x") for s in seen)
+    assert result["duration"] == "00:00:20.000000"
+
+
+def test_failure_on_quit_reports_unsuccessful(tmp_path, monkeypatch):
+    watcher, out_file = start_watcher(tmp_path, monkeypatch, RATE=100, ON_QUIT="fail")
+    assert wait_for_progress(watcher, "out_time", "00:00:01.000000", timeout=5)
+    result = watcher.stop()
+    assert watcher.process.returncode == 1
+    assert not result["success"] and out_file.stat().st_size == 0
+
+
+def test_crash_mid_session_stops_quickly(tmp_path, monkeypatch):
+    watcher, _ = start_watcher(tmp_path, monkeypatch, RATE=0, CRASH_AFTER=10)
+    deadline = time.monotonic() + 5
+    while watcher.process.poll() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    started = time.monotonic()
+    result = watcher.stop()
+    assert time.monotonic() - started < 1.0
+    assert watcher.process.returncode == 1
+    assert result["duration"] == "00:00:04.500000"
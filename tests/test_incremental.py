@@ -0,0 +1,161 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+SR = 16000
+
+
+class SecondModel:
+    """Один сегмент на каждую полную секунду буфера; считает обработанное аудио."""
+
+    def __init__(self):
+        self.seconds_seen = 0.0
+
+    def transcribe(self, audio, language=None, beam_size=5, vad_filter=True):
+        self.seconds_seen += len(audio) / SR
+        n = len(audio) // SR
+        return (types.SimpleNamespace(start=float(k), end=k + 1.0, text=f"s{k}") for k in range(n)), {}
+
+
+class GrowingRecording:
+    """Декодер-заглушка: «файл» длиной ``seconds`` секунд, окнами по ``window`` секунд."""
+
+    def __init__(self, window=None):
+        self.seconds = 0
+        self.window = window
+
+    def __call__(self, path, start):
+        total = int((self.seconds - start) * SR)
+        step = int(self.window * SR) if self.window else max(total, 1)
+        for i in range(0, total, step):
+            yield np.zeros(min(step, total - i), dtype=np.float32)
+
+
+@pytest.fixture
+def incremental(monkeypatch):
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=object))
+    importlib.reload(importlib.import_module("audio2text"))
+    importlib.reload(importlib.import_module("streaming"))
+    return importlib.reload(importlib.import_module("incremental"))
+
+
+def test_only_new_tail_is_transcribed(incremental, tmp_path):
+    audio = tmp_path / "rec.mp3"
+    audio.write_bytes(b"growing")
+    model = SecondModel()
+    rec = GrowingRecording()
+
+    def make():
+        return incremental.IncrementalTranscriber(audio, model=model, guard_seconds=2, decoder=rec)
+
+    rec.seconds = 20
+    out = make().update()
+    # последние сегменты у края записи – черновые, но уже в файле
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 20
+
+    rec.seconds = 30
+    make().update()          # новый объект – состояние берётся из sidecar
+    rec.seconds = 35
+    make().update(final=True)
+
+    lines = out.read_text(encoding="utf-8").splitlines()
+    from audio2text import format_timestamp
+    assert [l[1:13] for l in lines] == [format_timestamp(k) for k in range(35)]
+    # 20 + (30 - 18) + (35 - 28) секунд, а не 20 + 30 + 35
+    assert model.seconds_seen == pytest.approx(39)
+
+
+def test_segments_mapped_through_time_map(incremental, tmp_path):
+    from timemap import TimeMap
+
+    audio = tmp_path / "rec.mp3"
+    audio.write_bytes(b"growing")
+    rec = GrowingRecording()
+    live = TimeMap()
+    live.add_silence(5.0, 15.0)          # 10 с тишины вырезано на 5-й секунде записи
+    inc = incremental.IncrementalTranscriber(audio, model=SecondModel(), guard_seconds=0, decoder=rec,
+                                             time_map=live)
+    rec.seconds = 4
+    inc.update()
+    rec.seconds = 8
+    out = inc.update(final=True)
+
+    from audio2text import format_timestamp
+    starts = [l[1:13] for l in out.read_text(encoding="utf-8").splitlines()]
+    assert starts == [format_timestamp(t) for t in (0, 1, 2, 3, 4, 15, 16, 17)]
+
+    # после остановки карта берётся из sidecar
+    live.save(TimeMap.sidecar_path(audio))
+    inc = incremental.IncrementalTranscriber(audio, model=SecondModel(), decoder=rec)
+    inc.reset()
+    again = [l[1:13] for l in inc.update(final=True).read_text(encoding="utf-8").splitlines()]
+    assert again == starts
+
+
+def test_other_formats_follow_working_text(incremental, tmp_path):
+    audio = tmp_path / "rec.mp3"
+    audio.write_bytes(b"growing")
+    rec = GrowingRecording()
+    inc = incremental.IncrementalTranscriber(audio, model=SecondModel(), guard_seconds=2, decoder=rec,
+                                             formats=("txt", "srt"))
+    rec.seconds = 5
+    inc.update()
+    rec.seconds = 8
+    inc.update(final=True)
+
+    srt = (tmp_path / "rec.srt").read_text(encoding="utf-8")
+    assert srt.count(" --> ") == 8 and "8\n00:00:07,000 --> 00:00:08,000\ns4\n" in srt
+    with pytest.raises(ValueError):
+        incremental.IncrementalTranscriber(audio, model=SecondModel(), formats=("srt",))
+
+
+def test_long_tail_is_fed_window_by_window(incremental, tmp_path):
+    audio = tmp_path / "rec.mp3"
+    audio.write_bytes(b"growing")
+
+    class Recorder(SecondModel):
+        def __init__(self):
+            super().__init__()
+            self.longest = 0.0
+
+        def transcribe(self, audio, **kwargs):
+            self.longest = max(self.longest, len(audio) / SR)
+            return super().transcribe(audio, **kwargs)
+
+    model = Recorder()
+    inc = incremental.IncrementalTranscriber(audio, model=model, guard_seconds=2,
+                                             decoder=GrowingRecording(window=10))
+    inc.decoder.seconds = 95
+    inc.update()
+    lines = inc.out_path.read_text(encoding="utf-8").splitlines()
+    # все 95 секунд по порядку, без пропусков и повторов на краях окон
+    from audio2text import format_timestamp
+    assert [l[1:13] for l in lines] == [format_timestamp(k) for k in range(95)]
+    assert model.longest <= 20          # не больше двух окон за раз
+    assert inc.stable_until == 93 and inc.last_tail_seconds == 95
+
+
+def test_long_edge_segment_is_written_not_skipped(incremental, tmp_path):
+    audio = tmp_path / "rec.mp3"
+    audio.write_bytes(b"growing")
+
+    class OneLongSegment:
+        """Одна фраза почти на всё окно – перенос превысил бы окно."""
+
+        def transcribe(self, audio, **kwargs):
+            n = len(audio) / SR
+            return iter([types.SimpleNamespace(start=0.5, end=n - 0.5, text="long")]), {}
+
+    inc = incremental.IncrementalTranscriber(audio, model=OneLongSegment(), guard_seconds=1,
+                                             decoder=GrowingRecording(window=10))
+    inc.decoder.seconds = 30
+    inc.update(final=True)
+    lines = inc.out_path.read_text(encoding="utf-8").splitlines()
+    # второе окно переносило бы 19 с – фраза записана, следующая идёт с её конца
+    assert lines == ["[00:00:01.000 --> 00:00:19.500] long", "[00:00:20.000 --> 00:00:29.500] long"]
@@ -0,0 +1,72 @@
+import socket
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from level_meter import SILENCE_FLOOR_DB, LevelMeter
+
+
+def _tone(seconds, amplitude, rate=8000):
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+
+def test_levels_and_silence_warning():
+    warnings = []
+    meter = LevelMeter(silence_seconds=1.0, on_silence=warnings.append)
+    frame = _tone(0.033, 16384)[: meter.frame_samples]
+    meter.feed(frame)
+    rms_db, peak_db = meter.level()
+    assert abs(peak_db - (-6.02)) < 0.1
+    assert abs(rms_db - (-9.03)) < 0.2      # синус: RMS на 3 дБ ниже пика
+
+    silence = np.zeros(meter.frame_samples, dtype=np.int16)
+    for _ in range(40):
+        meter.feed(silence)
+    assert meter.level()[0] == SILENCE_FLOOR_DB
+    assert len(warnings) == 1 and warnings[0] >= 1.0
+
+    meter.feed(frame)
+    assert meter.silent_for == 0
+    assert meter.waveform()[-1] == meter.level()[1]
+
+
+def test_reads_side_stream_from_socket():
+    meter = LevelMeter()
+    url = meter.listen()
+    meter.start()
+    host, port = url[len("tcp://"):].split(":")
+    try:
+        with socket.create_connection((host, int(port))) as conn:
+            conn.sendall(_tone(1.0, 8000).tobytes())
+        deadline = time.monotonic() + 2
+        while meter.frames < 30 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        meter.stop()
+    assert meter.frames == 8000 // meter.frame_samples
+    assert -16 < meter.level()[1] < -12
+
+
+def test_keeps_draining_after_stop():
+    meter = LevelMeter()
+    url = meter.listen()
+    meter.start()
+    host, port = url[len("tcp://"):].split(":")
+    conn = socket.create_connection((host, int(port)))
+    try:
+        conn.sendall(_tone(0.5, 8000).tobytes())
+        deadline = time.monotonic() + 2
+        while meter.frames < 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        meter.stop()
+        frames = meter.frames
+        # ffmpeg ещё пишет после stop(): больше буферов сокета, без EPIPE
+        conn.settimeout(5)
+        conn.sendall(bytes(8 << 20))
+    finally:
+        conn.close()
+    assert meter.frames == frames
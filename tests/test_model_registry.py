@@ -0,0 +1,107 @@
+import io
+import json
+import sys
+import tarfile
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from model_registry import ModelRegistry, resolve_model
+
+
+def _model_dir(folder: Path) -> Path:
+    folder.mkdir(parents=True)
+    (folder / "model.bin").write_bytes(b"\x00" * 1000)
+    (folder / "config.json").write_text("{}")
+    (folder / "tokenizer.json").write_text('{"t": 1}')
+    (folder / ".cache").mkdir()
+    (folder / ".cache" / "lock").write_text("x")
+    return folder
+
+
+def test_import_dir_and_verify(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    source = _model_dir(tmp_path / "faster-whisper-small")
+    path = registry.import_dir(source)
+    assert path == tmp_path / "registry" / "small"
+    assert registry.names() == ["small"]
+    manifest = json.loads((path / "manifest.json").read_text())
+    assert sorted(manifest["files"]) == ["config.json", "model.bin", "tokenizer.json"]
+    assert registry.verify("small") == []
+    assert registry.path("small") == path
+
+    with pytest.raises(FileExistsError):
+        registry.import_dir(source, "small")
+    (source / "model.bin").write_bytes(b"\x01" * 1000)
+    registry.import_dir(source, "small", replace=True)
+    assert (path / "model.bin").read_bytes() == b"\x01" * 1000
+    assert [p.name for p in registry.root.iterdir()] == ["small"]   # ни staging, ни старой копии
+
+    # та же длина, другое содержимое – ловит только полная проверка
+    (path / "model.bin").write_bytes(b"\x02" * 1000)
+    assert registry.path("small") == path
+    assert registry.verify("small") == ["model.bin: checksum mismatch"]
+    (path / "tokenizer.json").write_text("")
+    assert registry.path("small") is None
+
+
+def test_import_archive(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    source = _model_dir(tmp_path / "src" / "faster-whisper-tiny")
+    archive = tmp_path / "tiny.tar.gz"
+    with tarfile.open(archive, "w:gz") as tf:
+        tf.add(source, arcname="faster-whisper-tiny")
+    assert registry.import_path(archive) == registry.root / "tiny"
+    assert registry.verify("tiny") == []
+
+    evil = tmp_path / "evil.tar"
+    with tarfile.open(evil, "w") as tf:
+        data = b"x"
+        info = tarfile.TarInfo("../outside.bin")
+        info.size = len(data)
+        tf.addfile(info, io.BytesIO(data))
+    with pytest.raises(ValueError):
+        registry.import_archive(evil, "evil")
+    assert not (tmp_path / "outside.bin").exists()
+
+    (tmp_path / "empty").mkdir()
+    with pytest.raises(ValueError):
+        registry.import_dir(tmp_path / "empty")   # нет model.bin → не модель
+    (tmp_path / "empty" / "model.bin").write_bytes(b"\x00")
+    with pytest.raises(ValueError):
+        registry.import_dir(tmp_path / "empty")   # нет config.json
+
+
+def test_resolve_model(tmp_path):
+    registry = ModelRegistry(tmp_path / "registry")
+    registry.import_dir(_model_dir(tmp_path / "base"))
+    assert resolve_model("base", registry) == str(registry.root / "base")
+    assert resolve_model(str(tmp_path / "base"), registry) == str(tmp_path / "base")
+    assert resolve_model("large-v3", registry, offline=False) == "large-v3"
+    with pytest.raises(FileNotFoundError):
+        resolve_model("large-v3", registry, offline=True)
+
+
+def test_load_model_uses_registry(tmp_path, monkeypatch):
+    created = []
+
+    class Model:
+        def __init__(self, path, **kwargs):
+            created.append(path)
+
+        def transcribe(self, audio, **kwargs):
+            return [], None
+
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=Model))
+    import importlib
+
+    import model_registry
+
+    registry = ModelRegistry(tmp_path / "registry")
+    registry.import_dir(_model_dir(tmp_path / "medium"))
+    monkeypatch.setattr(model_registry, "_default", registry)
+    audio2text = importlib.reload(importlib.import_module("audio2text"))
+    audio2text.load_model("medium", "cpu")
+    assert created == [str(registry.root / "medium")]
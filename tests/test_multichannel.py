@@ -0,0 +1,127 @@
+import importlib
+import sys
+import threading
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+SR = 16000
+
+
+class LoudnessModel:
+    """Сегмент на каждую секунду с сигналом; текст – номер секунды и уровень."""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio, language=None, beam_size=5, vad_filter=True):
+        with self.lock:
+            self.calls += 1
+        seconds = len(audio) // SR
+        segs = []
+        for i in range(seconds):
+            chunk = audio[i * SR:(i + 1) * SR]
+            if np.abs(chunk).max() > 0.01:
+                segs.append(types.SimpleNamespace(start=i + 0.0, end=i + 1.0, text=f" sec{i}"))
+        return iter(segs), types.SimpleNamespace(duration=seconds)
+
+
+@pytest.fixture
+def multichannel(monkeypatch):
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=object))
+    importlib.reload(importlib.import_module("audio2text"))
+    importlib.reload(importlib.import_module("streaming"))
+    importlib.reload(importlib.import_module("shared_model"))
+    return importlib.reload(importlib.import_module("multichannel"))
+
+
+def test_channels_are_merged_and_silent_ones_skipped(multichannel, tmp_path):
+    audio = tmp_path / "meeting.mka"
+    audio.write_bytes(b"dummy")
+    Source = multichannel.Source
+    sources = [Source(0, 0, 1, "Mic"), Source(1, 0, 2, "Remote/ch1"), Source(1, 1, 2, "Remote/ch2")]
+
+    def tone(active_seconds, total=4):
+        x = np.zeros(total * SR, dtype=np.float32)
+        for s in active_seconds:
+            x[s * SR:(s + 1) * SR] = 0.5
+        return x
+
+    pcm = {sources[0]: tone([0, 2]), sources[1]: tone([1, 2]), sources[2]: np.zeros(4 * SR, np.float32)}
+    decoded = []
+
+    def decoder(path, srcs):
+        decoded.extend(srcs)
+        return {s: pcm[s] for s in srcs}
+
+    model = LoudnessModel()
+    out = multichannel.transcribe_multichannel(
+        audio,
+        model=model,
+        workers=2,
+        prober=lambda p: sources,
+        meter=lambda p, srcs: {s: multichannel.rms_db(pcm[s]) for s in srcs},
+        decoder=decoder,
+        formats=("txt", "srt"),
+    )
+
+    assert decoded == sources[:2]    # третий канал молчит – его не декодировали
+    assert model.calls == 2          # и модель его не видела
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["meeting.mka", "meeting.srt", "meeting.txt"]
+    assert Path(out).read_text(encoding="utf-8").splitlines() == [
+        "[00:00:00.000 --> 00:00:01.000] Mic: sec0",
+        "[00:00:01.000 --> 00:00:02.000] Remote/ch1: sec1",
+        "[00:00:02.000 --> 00:00:03.000] Mic: sec2",
+        "[00:00:02.000 --> 00:00:03.000] Remote/ch1: sec2",
+    ]
+    srt = (tmp_path / "meeting.srt").read_text(encoding="utf-8")
+    assert "00:00:01,000 --> 00:00:02,000\nRemote/ch1: sec1\n" in srt
+
+
+def test_decode_splits_interleaved_channels(multichannel, monkeypatch):
+    import io
+
+    left = np.arange(0, 3000, dtype=np.int16)
+    right = -left
+    interleaved = np.stack([left, right], axis=1).ravel().tobytes()
+    calls = []
+
+    def fake_stream(path, channels, extra_args):
+        calls.append((channels, extra_args))
+        return types.SimpleNamespace(stdout=io.BytesIO(interleaved), wait=lambda: 0)
+
+    monkeypatch.setattr(multichannel, "open_pcm_stream", fake_stream)
+    Source = multichannel.Source
+    sources = [Source(1, 0, 2, "a"), Source(1, 1, 2, "b")]
+    decoded = multichannel.decode_sources("x.mka", sources)
+
+    assert calls == [(2, ("-map", "0:a:1"))]          # один проход на дорожку
+    assert np.allclose(decoded[sources[0]] * 32768, left)
+    assert np.allclose(decoded[sources[1]] * 32768, right)
+
+    # только второй канал – первый не сохраняется
+    assert list(multichannel.decode_sources("x.mka", sources[1:])) == [sources[1]]
+
+
+def test_levels_are_measured_window_by_window(multichannel, monkeypatch):
+    import io
+
+    loud = np.full(2500, 16384, dtype=np.int16)              # −6 dBFS
+    silent = np.zeros(2500, dtype=np.int16)
+    interleaved = np.stack([loud, silent], axis=1).ravel().tobytes()
+    monkeypatch.setattr(multichannel, "WINDOW_SECONDS", 0.01)   # 160 кадров за окно
+    monkeypatch.setattr(
+        multichannel, "open_pcm_stream",
+        lambda path, channels, extra_args: types.SimpleNamespace(stdout=io.BytesIO(interleaved), wait=lambda: 0),
+    )
+    Source = multichannel.Source
+    sources = [Source(0, 0, 2, "a"), Source(0, 1, 2, "b")]
+    levels = multichannel.measure_levels("x.mka", sources)
+
+    assert levels[sources[0]] == pytest.approx(-6.02, abs=0.01)
+    assert levels[sources[1]] == float("-inf")
@@ -0,0 +1,110 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import proc_monitor
+from proc_monitor import ProcessMonitor, read_proc
+from profiling import PrometheusTextfile
+
+
+class FakeReader:
+    """Процесс, который тратит 0,5 с CPU за каждый замер."""
+
+    def __init__(self):
+        self.cpu = 0.0
+        self.dead = set()
+
+    def __call__(self, pid, tid=None):
+        if pid in self.dead:
+            raise ProcessLookupError(pid)
+        self.cpu += 0.5
+        return {"cpu_seconds": self.cpu, "rss_bytes": 1000 * pid, "read_bytes": 10,
+                "write_bytes": 20, "num_fds": 5}
+
+
+def test_read_proc_from_fake_root(tmp_path):
+    base = tmp_path / "42"
+    (base / "fd").mkdir(parents=True)
+    for fd in ("0", "1", "2"):
+        (base / "fd" / fd).write_text("")
+    fields = ["S"] + ["0"] * 10 + ["300", "100"] + ["0"] * 8 + ["25"]
+    (base / "stat").write_text("42 (ffmpeg (rec) x) " + " ".join(fields))
+    (base / "io").write_text("rchar: 1\nread_bytes: 4096\nwrite_bytes: 8192\n")
+    raw = read_proc(42, root=str(tmp_path))
+    assert raw["cpu_seconds"] == pytest.approx(400 / proc_monitor._CLK_TCK)
+    assert raw["rss_bytes"] == 25 * proc_monitor._PAGE
+    assert (raw["read_bytes"], raw["write_bytes"], raw["num_fds"]) == (4096, 8192, 3)
+    with pytest.raises(OSError):
+        read_proc(43, root=str(tmp_path))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="needs /proc")
+def test_read_proc_self():
+    raw = read_proc(os.getpid())
+    assert raw["rss_bytes"] > 0 and raw["num_fds"] > 0
+
+
+def test_bounded_series_summary_and_metrics(tmp_path):
+    reader = FakeReader()
+    monitor = ProcessMonitor(maxlen=3, reader=reader)
+    monitor.watch(7, "recorder")
+    for _ in range(6):
+        monitor.sample_once()
+    samples = monitor.series("recorder")
+    assert len(samples) == 3            # первый замер – только база для CPU
+    assert all(s.cpu_percent > 0 for s in samples)
+    summary = monitor.summary("recorder")
+    assert summary["rss_max"] == 7000 and summary["fds_max"] == 5
+    assert summary["samples"] == 5      # сводка за всё время, а не только по буферу
+
+    reader.dead.add(7)
+    monitor.sample_once()               # завершившийся процесс не ломает замер
+    assert len(monitor.series("recorder")) == 3
+
+    metrics = PrometheusTextfile(tmp_path / "m.prom", extra=monitor.metrics).render()
+    assert metrics.count("# TYPE sounddraftico_process_rss_bytes gauge") == 1
+    assert 'sounddraftico_process_rss_bytes{proc="recorder"} 7000' in metrics
+    monitor.unwatch("recorder")
+    assert monitor.summary("recorder") is None and monitor.metrics() == {}
+
+
+def test_watcher_reports_resources(monkeypatch, tmp_path):
+    import ffmpeg_core
+    from test_ffmpeg_core import DummyProcess
+
+    process = DummyProcess()
+    process.pid = 9
+    monkeypatch.setattr(ffmpeg_core.subprocess, "Popen", lambda *a, **k: process)
+    out = tmp_path / "out.mp3"
+    out.write_bytes(b"data")
+    monitor = ProcessMonitor(reader=FakeReader())
+    watcher = ffmpeg_core.FFmpegProgressWatcher("dummy", output_file=str(out), resource_monitor=monitor)
+    watcher.start()
+    assert watcher.get_resource_stats() is None
+    monitor.sample_once()
+    monitor.sample_once()
+    assert watcher.get_resource_stats()["rss_max"] == 9000
+    result = watcher.stop()
+    assert result["resources"]["cpu_max"] > 0
+    assert monitor.labels() == []
+
+
+def test_summary_keeps_peaks_pushed_out_of_series():
+    class SpikyReader(FakeReader):
+        def __call__(self, pid, tid=None):
+            raw = super().__call__(pid, tid)
+            if self.cpu == 1.0:
+                raw["rss_bytes"], raw["num_fds"] = 10**9, 50     # пик во втором замере
+            return raw
+
+    monitor = ProcessMonitor(maxlen=2, reader=SpikyReader())
+    monitor.watch(7, "recorder")
+    for _ in range(10):
+        monitor.sample_once()
+    assert max(s.rss_bytes for s in monitor.series("recorder")) == 7000
+    summary = monitor.summary("recorder")
+    assert summary["samples"] == 9 and summary["rss_max"] == 10**9 and summary["fds_max"] == 50
+    assert summary["rss_last"] == 7000
@@ -0,0 +1,69 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class TimedModel:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def transcribe(self, path, language=None, beam_size=5, vad_filter=True):
+        segs = [types.SimpleNamespace(start=float(i), end=i + 1.0, text=f" s{i}") for i in range(3)]
+        return iter(segs), types.SimpleNamespace(duration=30.0, duration_after_vad=12.0)
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=TimedModel))
+    profiling = importlib.reload(importlib.import_module("profiling"))
+    audio2text = importlib.reload(importlib.import_module("audio2text"))
+    yield audio2text, profiling
+    audio2text.clear_model_cache()
+
+
+def test_profile_hook_and_textfile(modules, tmp_path):
+    audio2text, profiling = modules
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"dummy")
+    profiles = []
+    hook = profiling.add_hook(profiles.append)
+    metrics = profiling.add_hook(profiling.PrometheusTextfile(tmp_path / "m.prom"))
+    try:
+        audio2text.transcribe_audio(audio, model_name="tiny", device="cpu")
+        audio2text.transcribe_audio(audio, model_name="tiny", device="cpu")
+    finally:
+        profiling.remove_hook(hook)
+        profiling.remove_hook(metrics)
+
+    first, second = profiles
+    assert set(first.stages) == set(profiling.STAGES)
+    assert first.segments == 3 and first.audio_seconds == 30.0 and first.speech_seconds == 12.0
+    assert first.rtf == pytest.approx(first.total_seconds / 30.0)
+    assert (first.model_cache_hit, second.model_cache_hit) == (False, True)
+
+    text = (tmp_path / "m.prom").read_text()
+    assert "sounddraftico_transcriptions_total 2\n" in text
+    assert "sounddraftico_segments_total 6\n" in text
+    assert "sounddraftico_model_cache_misses_total 1\n" in text
+    assert 'sounddraftico_stage_seconds_total{stage="inference"}' in text
+
+
+def test_failing_hook_does_not_break_transcription(modules, tmp_path):
+    audio2text, profiling = modules
+    audio = tmp_path / "b.wav"
+    audio.write_bytes(b"dummy")
+
+    def broken(profile):
+        raise RuntimeError("boom")
+
+    profiling.add_hook(broken)
+    try:
+        out = audio2text.transcribe_audio(audio, model=TimedModel())
+    finally:
+        profiling.remove_hook(broken)
+    assert Path(out).read_text(encoding="utf-8").count("\n") == 3
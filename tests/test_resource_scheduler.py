@@ -0,0 +1,97 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from resource_scheduler import RECORDING, TRANSCRIPTION, ResourceScheduler
+
+
+def test_recording_is_reserved_and_transcriptions_share_rest():
+    sched = ResourceScheduler(total_cores=16, recording_threads=2, max_recordings=1)
+    # Резерв под запись держится, даже когда запись не идёт
+    assert sched.thread_budget(TRANSCRIPTION) == 14
+    assert [sched.transcription_threads(n) for n in (1, 2, 4, 8)] == [14, 7, 3, 1]
+
+    first = sched.acquire(TRANSCRIPTION)
+    assert first.threads == 14 and sched.granted() == 14
+    # всё роздано – следующая транскрибация ждёт
+    assert sched.thread_budget(TRANSCRIPTION) == 0
+    with pytest.raises(TimeoutError):
+        sched.acquire(TRANSCRIPTION, timeout=0.01)
+
+    with sched.acquire(RECORDING) as rec:
+        assert rec.threads == 2             # запись не ждёт никогда
+        with sched.acquire(RECORDING):
+            assert sched.active(RECORDING) == 2
+    assert sched.active(RECORDING) == 0
+
+    first.release()
+    first.release()
+    assert sched.active(TRANSCRIPTION) == 0 and sched.granted() == 0
+
+
+def test_new_job_gets_at_most_the_unleased_threads():
+    sched = ResourceScheduler(total_cores=16, recording_threads=2, max_recordings=1)
+    recordings = [sched.acquire(RECORDING), sched.acquire(RECORDING)]
+    first = sched.acquire(TRANSCRIPTION)
+    assert first.threads == 12                  # две записи держат 4 ядра
+    for rec in recordings:
+        rec.release()
+    # освободились 2 ядра: доля была бы 14 // 2 = 7, но выдать можно только 2
+    second = sched.acquire(TRANSCRIPTION)
+    assert second.threads == 2
+    assert first.threads + second.threads <= 14
+
+
+def test_single_core_never_starves_transcription():
+    sched = ResourceScheduler(total_cores=1)
+    assert sched.thread_budget(TRANSCRIPTION) == 1
+
+
+def test_waiting_job_starts_when_a_lease_is_released():
+    sched = ResourceScheduler(total_cores=16, recording_threads=2)
+    first = sched.acquire(TRANSCRIPTION)
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(sched.acquire(TRANSCRIPTION, timeout=5)))
+    waiter.start()
+    time.sleep(0.05)
+    assert not got
+    first.release()
+    waiter.join(5)
+    assert got[0].threads == 14
+
+
+def test_concurrent_leases_never_exceed_free_cores():
+    class SlowScheduler(ResourceScheduler):
+        def _reserved_for_recording(self):
+            time.sleep(0.001)    # расширяем окно гонки между расчётом и учётом
+            return super()._reserved_for_recording()
+
+    sched = SlowScheduler(total_cores=16, recording_threads=2)
+    free = 14
+    held, peaks = [], []
+    guard = threading.Lock()
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        for _ in range(5):
+            with sched.acquire(TRANSCRIPTION, timeout=10) as lease:
+                with guard:
+                    held.append(lease)
+                    peaks.append(sum(l.threads for l in held))
+                time.sleep(0.002)
+                with guard:
+                    held.remove(lease)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(peaks) == 40
+    assert max(peaks) <= free
+    assert sched.active(TRANSCRIPTION) == 0 and sched.granted() == 0
@@ -0,0 +1,116 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from settings_store import SettingsStore
+
+
+def test_reads_from_cache_and_coalesces_writes(tmp_path):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(path, debounce=0.05)
+    for i in range(20):
+        store.set("audio/device", f"mic {i}")
+    store.set("records/list", ["a.wav"])
+    assert store.get("audio/device") == "mic 19"
+    assert not path.exists()            # записи ещё нет – только кэш
+    deadline = time.monotonic() + 2
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert store.writes == 1
+    data = json.loads(path.read_text(encoding="utf-8"))["values"]
+    assert data == {"audio/device": "mic 19", "records/list": ["a.wav"]}
+    assert not list(tmp_path.glob("*.tmp")) and not list(tmp_path.glob("*.lock"))
+
+
+def test_flush_and_reload_round_trip(tmp_path):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(path, debounce=60)
+    store.set("archive/days", 30)
+    assert store.flush() is True
+    assert store.flush() is False       # нечего писать
+    assert SettingsStore(path).get("archive/days") == 30
+
+
+def test_subscribers_notified_once_per_change(tmp_path):
+    store = SettingsStore(tmp_path / "settings.json", debounce=60)
+    seen = []
+    handle = store.subscribe(lambda key, value: seen.append((key, value)))
+    store.set("ui/default_language", "ru")
+    store.set("ui/default_language", "ru")      # без изменений – без уведомления
+    store.unsubscribe(handle)
+    store.set("ui/default_language", "en")
+    assert seen == [("ui/default_language", "ru")]
+
+
+def test_two_writers_keep_each_others_keys(tmp_path):
+    path = tmp_path / "settings.json"
+    a = SettingsStore(path, debounce=60)
+    b = SettingsStore(path, debounce=60)
+    a.set("audio/device", "mic")
+    b.set("audio/folder", "/rec")
+    a.flush()
+    b.flush()
+    values = json.loads(path.read_text(encoding="utf-8"))["values"]
+    assert values == {"audio/device": "mic", "audio/folder": "/rec"}
+    assert b.get("audio/device") == "mic"       # подхвачено при записи
+
+    seen = []
+    a.subscribe(lambda key, value: seen.append(key))
+    assert a.reload() == {"audio/folder": "/rec"}
+    assert seen == ["audio/folder"]
+
+
+def test_import_legacy_only_for_new_file(tmp_path):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(path, debounce=60)
+    assert store.import_legacy(lambda: {"audio/device": "old mic"}) is True
+    assert path.exists() and store.get("audio/device") == "old mic"
+    assert store.import_legacy(lambda: {"audio/device": "other"}) is False
+
+    again = SettingsStore(path)
+    assert again.import_legacy(lambda: {"audio/folder": "/x"}) is False
+    assert "audio/folder" not in again
+
+
+def test_corrupt_file_starts_empty(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text("{not json", encoding="utf-8")
+    store = SettingsStore(path, debounce=60)
+    assert store.get("audio/device", "default") == "default"
+    store.set("audio/device", "mic")
+    store.flush()
+    assert json.loads(path.read_text(encoding="utf-8"))["values"] == {"audio/device": "mic"}
+
+
+def test_flush_does_disk_io_outside_the_lock(tmp_path):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(path, debounce=60)
+    store.set("audio/device", "mic")
+    writing, release = threading.Event(), threading.Event()
+    real_write = store._write_file
+
+    def slow_write(pending):
+        writing.set()
+        release.wait(5)
+        return real_write(pending)
+
+    store._write_file = slow_write
+    flusher = threading.Thread(target=store.flush)
+    flusher.start()
+    assert writing.wait(5)
+    started = time.monotonic()
+    store.set("audio/device", "other mic")       # пока идёт запись
+    assert store.get("audio/device") == "other mic"
+    assert time.monotonic() - started < 0.5
+    release.set()
+    flusher.join(5)
+
+    assert json.loads(path.read_text(encoding="utf-8"))["values"] == {"audio/device": "mic"}
+    assert store.get("audio/device") == "other mic"     # не затёрто снимком
+    store._write_file = real_write
+    assert store.flush() is True
+    assert SettingsStore(path).get("audio/device") == "other mic"
@@ -0,0 +1,68 @@
+import importlib
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class ConcurrentStubModel:
+    """Два запроса должны одновременно оказаться внутри ``transcribe``."""
+
+    def __init__(self, *args, **kwargs):
+        self.kwargs = kwargs
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    def transcribe(self, path, language=None, beam_size=5, vad_filter=True, progress_callback=None):
+        self.barrier.wait()
+        name = Path(path).stem
+        progress_callback(types.SimpleNamespace(elapsed=1, total=1, segments_done=1, step=1))
+        return [types.SimpleNamespace(start=0.0, end=1.0, text=name)], {}
+
+
+@pytest.fixture
+def shared_model(monkeypatch):
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=ConcurrentStubModel))
+    audio2text = importlib.reload(importlib.import_module("audio2text"))
+    audio2text.clear_model_cache()
+    return importlib.reload(importlib.import_module("shared_model"))
+
+
+def test_requests_run_concurrently_and_stay_isolated(shared_model, tmp_path):
+    from resource_scheduler import ResourceScheduler
+
+    files = []
+    for name in ("a", "b"):
+        f = tmp_path / f"{name}.wav"
+        f.write_bytes(b"dummy")
+        files.append(f)
+
+    seen = {"a": [], "b": []}
+    with shared_model.SharedModelExecutor(
+        "stub", "cpu", workers=2, scheduler=ResourceScheduler(total_cores=8)
+    ) as pool:
+        assert pool.model.kwargs["num_workers"] == 2
+        assert pool.model.kwargs["cpu_threads"] == 3
+        futures = [
+            pool.submit(f, progress_handler=lambda p, n=f.stem: seen[n].append(n)) for f in files
+        ]
+        outs = [fut.result(timeout=5) for fut in futures]
+
+    assert [o.read_text(encoding="utf-8").split("] ")[1].strip() for o in outs] == ["a", "b"]
+    assert seen == {"a": ["a"], "b": ["b"]}
+
+
+def test_same_output_path_is_rejected(shared_model, tmp_path):
+    audio = tmp_path / "c.wav"
+    audio.write_bytes(b"dummy")
+    pool = shared_model.SharedModelExecutor(workers=2, model=ConcurrentStubModel())
+    try:
+        pool.submit(audio)
+        with pytest.raises(ValueError):
+            pool.submit(audio)
+    finally:
+        pool.model.barrier.abort()
+        pool.shutdown()
@@ -0,0 +1,45 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from stall_watchdog import StallWatchdog
+
+
+def blocking_handler():
+    time.sleep(0.4)
+
+
+def test_stall_is_detected_with_stack(tmp_path):
+    log = tmp_path / "stalls.jsonl"
+    seen = []
+    ready = threading.Event()
+    holder = {}
+
+    def gui_loop():
+        # «Цикл событий»: тики каждые 10 мс и один долгий обработчик
+        holder["dog"] = dog = StallWatchdog(threshold_ms=100, log_path=log, on_stall=seen.append)
+        dog.start()
+        ready.set()
+        for i in range(40):
+            dog.tick()
+            if i == 10:
+                blocking_handler()
+            time.sleep(0.01)
+        dog.stop()
+
+    thread = threading.Thread(target=gui_loop)
+    thread.start()
+    ready.wait(1)
+    thread.join(5)
+
+    dog = holder["dog"]
+    assert dog.count == 1 and seen == list(dog.events)
+    event = seen[0]
+    assert 350 <= event.duration_ms < 1000
+    assert "blocking_handler" in "".join(event.stacks[0])
+    assert event.location.endswith("in blocking_handler")
+    record = json.loads(log.read_text(encoding="utf-8"))
+    assert record["duration_ms"] == event.duration_ms
@@ -0,0 +1,105 @@
+import importlib
+import subprocess
+import sys
+import textwrap
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+SR = 16000
+
+
+class SilentPCM:
+    """Источник PCM заданной длительности без выделения памяти под весь файл."""
+
+    def __init__(self, seconds):
+        self.left = int(seconds * SR) * 2
+
+    def readinto(self, view):
+        n = min(len(view), self.left)
+        view[:n] = bytes(n)
+        self.left -= n
+        return n
+
+
+class SecondModel:
+    """Один сегмент на каждую полную секунду переданного буфера."""
+
+    def transcribe(self, audio, language=None, beam_size=5, vad_filter=True):
+        n = len(audio) // SR
+        return (types.SimpleNamespace(start=float(k), end=k + 1.0, text=f"s{k}") for k in range(n)), {}
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=object))
+    importlib.reload(importlib.import_module("audio2text"))
+    return importlib.reload(importlib.import_module("streaming"))
+
+
+def test_windows_are_stitched_without_gaps_or_duplicates(streaming, tmp_path):
+    seen = []
+    out = streaming.transcribe_streaming(
+        tmp_path / "a.mp3",
+        model=SecondModel(),
+        out_path=tmp_path / "a.txt",
+        window_seconds=10,
+        guard_seconds=2,
+        pcm_source=SilentPCM(25),
+        segment_handler=seen.append,
+    )
+    assert [(s.start, s.end) for s in seen] == [(float(k), k + 1.0) for k in range(25)]
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 25
+
+
+def test_long_edge_segment_is_written_instead_of_dropping_audio(streaming, tmp_path):
+    class LongPhrase:
+        """Фраза с 0.5 с почти до конца буфера – перенос превысил бы окно."""
+
+        def transcribe(self, audio, **kwargs):
+            n = len(audio) / SR
+            return iter([types.SimpleNamespace(start=0.5, end=n - 0.5, text="long")]), {}
+
+    seen = []
+    streaming.transcribe_streaming(
+        tmp_path / "a.mp3", model=LongPhrase(), out_path=tmp_path / "a.txt",
+        window_seconds=10, guard_seconds=1, pcm_source=SilentPCM(30), segment_handler=seen.append,
+    )
+    spans = [(s.start, s.end) for s in seen]
+    # второе окно переносило бы 19 с: фраза записана, дальше идём с её конца
+    assert spans == [(1.0, 19.5), (20.5, 29.5)]
+
+
+_RSS_PROBE = textwrap.dedent(
+    """
+    import resource, sys, types
+    sys.path[:0] = [{root!r}, {tests!r}]
+    sys.modules["faster_whisper"] = types.SimpleNamespace(WhisperModel=object)
+    from test_streaming import SecondModel, SilentPCM
+    import streaming
+    streaming.transcribe_streaming(
+        "probe.mp3", model=SecondModel(), out_path={out!r},
+        window_seconds=60, pcm_source=SilentPCM({seconds}),
+    )
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    """
+)
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="ru_maxrss is POSIX-only")
+def test_peak_rss_is_flat_in_duration(tmp_path):
+    def peak_kib(seconds):
+        code = _RSS_PROBE.format(
+            root=str(ROOT), tests=str(ROOT / "tests"), out=str(tmp_path / "p.txt"), seconds=seconds
+        )
+        out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+        return int(out.stdout.split()[-1])
+
+    short = peak_kib(10 * 60)
+    long = peak_kib(60 * 60)
+    # Полное декодирование часа – ~230 МБ float32; допускаем шум в 25 МБ.
+    assert long - short < 25 * 1024
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from timemap import TimeMap
+
+
+def test_drop_and_roundtrip(tmp_path):
+    tm = TimeMap(started_at=1000.0)
+    tm.add_silence(10.0, 40.0)
+    tm.add_silence(60.0, 70.0)
+    # В файле: 0–10 → 0–10, 10–30 → 40–60, 30+ → 70+
+    assert tm.to_original(9.0) == 9.0
+    assert tm.to_original(10.0) == 40.0
+    assert tm.to_original(25.0) == 55.0
+    assert tm.to_original(31.0) == 71.0
+    assert tm.to_wallclock(31.0) == 1071.0
+    assert tm.removed_seconds == 40.0
+
+    audio = tmp_path / "rec.mp3"
+    tm.save(TimeMap.sidecar_path(audio))
+    loaded = TimeMap.for_audio(audio)
+    assert loaded.to_original(31.0) == 71.0
+    assert loaded.periods == 2
+    assert TimeMap.for_audio(tmp_path / "other.mp3") is None
@@ -0,0 +1,149 @@
+import asyncio
+import importlib
+import json
+import sys
+import threading
+import types
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class StubModel:
+    """Модель-заглушка: выдаёт сегменты по одному, пока открыт ``gate``."""
+
+    def __init__(self, segments=3):
+        self.segments = segments
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def transcribe(self, path, language=None, beam_size=5, vad_filter=True):
+        def gen():
+            for i in range(self.segments):
+                self.gate.wait(5)
+                yield types.SimpleNamespace(start=float(i), end=i + 1.0, text=f" seg {i}")
+        return gen(), {}
+
+
+@pytest.fixture
+def server_mod(monkeypatch):
+    dummy_module = types.SimpleNamespace(WhisperModel=object)
+    monkeypatch.setitem(sys.modules, "faster_whisper", dummy_module)
+    importlib.reload(importlib.import_module("audio2text"))
+    return importlib.reload(importlib.import_module("transcribe_server"))
+
+
+def _request(port, method, path, payload=None, headers=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, resp.read().decode()
+    except urllib.error.HTTPError as err:
+        return err.code, err.read().decode()
+
+
+def test_submit_poll_and_stream(server_mod, tmp_path):
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"dummy")
+
+    async def scenario():
+        server = server_mod.TranscriptionServer(model=StubModel(), port=0)
+        await server.start()
+        try:
+            status, body = await asyncio.to_thread(_request, server.port, "POST", "/jobs", {"audio": str(audio)})
+            assert status == 202
+            job_id = json.loads(body)["id"]
+            status, body = await asyncio.to_thread(_request, server.port, "GET", f"/jobs/{job_id}/segments")
+            lines = [json.loads(l) for l in body.splitlines()]
+            assert [l["text"] for l in lines[:-1]] == ["seg 0", "seg 1", "seg 2"]
+            assert lines[-1]["status"] == "done"
+            status, body = await asyncio.to_thread(_request, server.port, "GET", f"/jobs/{job_id}")
+            assert json.loads(body)["status"] == "done"
+        finally:
+            await server.stop()
+        assert (tmp_path / "a.txt").exists()
+
+    asyncio.run(scenario())
+
+
+def test_queue_full_and_cancel(server_mod, tmp_path):
+    audio = tmp_path / "b.wav"
+    audio.write_bytes(b"dummy")
+    model = StubModel(segments=100)
+    model.gate.clear()
+
+    async def scenario():
+        server = server_mod.TranscriptionServer(model=model, port=0, max_queue=1)
+        await server.start()
+        try:
+            running = server.submit(audio)
+            while running.status != "running":
+                await asyncio.sleep(0.01)
+            server.submit(audio)
+            status, _ = await asyncio.to_thread(_request, server.port, "POST", "/jobs", {"audio": str(audio)})
+            assert status == 503
+            status, body = await asyncio.to_thread(_request, server.port, "DELETE", f"/jobs/{running.id}")
+            assert status == 200
+            model.gate.set()
+            while running.status not in ("done", "cancelled"):
+                await asyncio.sleep(0.01)
+            assert running.status == "cancelled"
+            assert len(running.segments) < 100
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_rejects_browser_requests_and_foreign_out_path(server_mod, tmp_path):
+    audio = tmp_path / "c.wav"
+    audio.write_bytes(b"dummy")
+    victim = tmp_path.parent / "victim.txt"
+
+    async def scenario():
+        server = server_mod.TranscriptionServer(model=StubModel(), port=0)
+        await server.start()
+        try:
+            post = lambda payload, **headers: _request(server.port, "POST", "/jobs", payload, headers)
+            # «простой» запрос со страницы: text/plain и Origin
+            status, _ = await asyncio.to_thread(
+                post, {"audio": str(audio)}, **{"Content-Type": "text/plain"}
+            )
+            assert status == 415
+            status, _ = await asyncio.to_thread(post, {"audio": str(audio)}, Origin="https://evil.example")
+            assert status == 403
+            status, body = await asyncio.to_thread(post, {"audio": str(audio), "out_path": str(victim)})
+            assert status == 403 and "out_path" in body
+            status, body = await asyncio.to_thread(
+                post, {"audio": str(audio), "out_path": str(tmp_path / "sub" / "c.txt")}
+            )
+            assert status == 202
+            assert all(j.out_path != victim for j in server.jobs.values())
+        finally:
+            await server.stop()
+        assert not victim.exists()
+
+    asyncio.run(scenario())
+
+
+def test_submit_requires_a_running_server(server_mod, tmp_path):
+    audio = tmp_path / "d.wav"
+    audio.write_bytes(b"dummy")
+    server = server_mod.TranscriptionServer(model=StubModel(), port=0)
+    with pytest.raises(RuntimeError, match="start"):
+        server.submit(audio)
+
+    async def scenario():
+        await server.start()
+        await server.stop()
+
+    asyncio.run(scenario())
+    with pytest.raises(RuntimeError):
+        server.submit(audio)
+    assert not server.jobs
@@ -0,0 +1,112 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import transcript_index
+from transcript_index import TranscriptIndex, parse_timestamp
+
+
+def _line(i):
+    t = i * 2
+    return f"[{t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d}.000 --> {t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d}.900] строка {i}\n"
+
+
+def test_lines_and_find_time(tmp_path, monkeypatch):
+    # маленький блок сканирования – проверяем стыки блоков
+    monkeypatch.setattr(transcript_index, "SCAN_CHUNK", 7)
+    path = tmp_path / "t.txt"
+    path.write_text("".join(_line(i) for i in range(5000)), encoding="utf-8")
+    with TranscriptIndex(path) as index:
+        assert len(index) == 5000
+        assert index.line(0) == _line(0).rstrip("\n")
+        assert index.lines(4998, 6000) == [_line(4998).rstrip("\n"), _line(4999).rstrip("\n")]
+        assert index.find_time(parse_timestamp("01:00:00")) == 1800
+        assert index.find_time(3601.5) == 1800
+        assert index.find_time(-1) == 0
+        assert index.find_time(1e9) == 4999
+        with pytest.raises(IndexError):
+            index.line(5000)
+
+
+def test_growing_and_rewritten_file(tmp_path):
+    path = tmp_path / "t.txt"
+    path.write_bytes(b"")
+    index = TranscriptIndex(path)
+    assert len(index) == 0 and index.find_time(10) == 0
+    with open(path, "a", encoding="utf-8") as fp:
+        fp.write(_line(0) + "[00:00:02.000 --> 00:00:03.000] недопис")
+    assert index.refresh()
+    assert len(index) == 2 and index.line(1).endswith("недопис")
+    with open(path, "a", encoding="utf-8") as fp:
+        fp.write("ано\n" + _line(2))
+    index.refresh()
+    assert index.lines(1, 3) == ["[00:00:02.000 --> 00:00:03.000] недописано", _line(2).rstrip("\n")]
+    assert not index.refresh()
+    path.write_text(_line(7), encoding="utf-8")
+    index.refresh()
+    assert index.lines(0, 10) == [_line(7).rstrip("\n")]
+    index.close()
+
+
+def test_untimed_lines_are_skipped(tmp_path):
+    path = tmp_path / "t.txt"
+    path.write_text(_line(0) + "заметка\n" + "\n" + _line(10) + _line(20), encoding="utf-8")
+    with TranscriptIndex(path) as index:
+        assert index.find_time(25) == 3
+        assert index.find_time(5) == 0
+        assert index.start_time(1) is None
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("1:02:03.5") == 3723.5
+    assert parse_timestamp("02:03") == 123
+    assert parse_timestamp(" 42 ") == 42
+    for bad in ("", "1::2", "a:b", "1:2:3:4"):
+        with pytest.raises(ValueError):
+            parse_timestamp(bad)
+
+
+def _open_fds_to(path):
+    fd_dir = Path("/proc/self/fd")
+    if not fd_dir.is_dir():
+        pytest.skip("needs /proc")
+    found = []
+    for fd in fd_dir.iterdir():
+        try:
+            if Path(fd.readlink()) == path:
+                found.append(fd)
+        except OSError:
+            pass
+    return found
+
+
+def test_replaced_and_truncated_file_without_open_handle(tmp_path):
+    path = tmp_path / "t.txt"
+    path.write_text(_line(0) + _line(1), encoding="utf-8")
+    index = TranscriptIndex(path)
+    assert index.line(1) == _line(1).rstrip("\n")
+    assert not _open_fds_to(path)          # файл не держится между обращениями
+
+    # two_pass/incremental подменяют файл через os.replace
+    tmp = tmp_path / "t.txt.tmp"
+    tmp.write_text(_line(5) + _line(6) + _line(7), encoding="utf-8")
+    generation = index.generation
+    os.replace(tmp, path)
+    assert index.refresh() and index.generation == generation + 1
+    assert index.lines(0, 5) == [_line(i).rstrip("\n") for i in (5, 6, 7)]
+
+    # transcribe_audio переоткрывает файл с "w" и пишет больше, чем было
+    path.write_text(_line(8) + _line(9) + _line(10) + _line(11), encoding="utf-8")
+    index.refresh()
+    assert index.lines(0, 5) == [_line(i).rstrip("\n") for i in (8, 9, 10, 11)]
+
+    # обрезан после refresh: чтение не падает, следующее refresh исправляет
+    path.write_bytes(b"")
+    index.close()                           # сбросить окно чтения
+    assert index.line(3) == ""
+    index.refresh()
+    assert len(index) == 0
+    index.close()
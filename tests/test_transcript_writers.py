@@ -0,0 +1,94 @@
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from transcript_writers import (
+    TranscriptWriter,
+    WRITERS,
+    format_segment,
+    format_timestamp,
+    open_writers,
+    parse_segment,
+    register_writer,
+    write_transcript,
+)
+
+
+def _segments():
+    word = types.SimpleNamespace(start=0.5, end=0.9, word=" привет", probability=0.97)
+    return [
+        types.SimpleNamespace(start=0.5, end=1.25, text=" привет", words=[word]),
+        types.SimpleNamespace(start=3661.0, end=3662.5, text=" мир "),
+    ]
+
+
+def test_all_formats_in_one_pass(tmp_path):
+    base = tmp_path / "talk.txt"
+    with open_writers(base, ("txt", "srt", "vtt", "json")) as out:
+        for seg in _segments():
+            out.write(seg)
+    assert out.paths["txt"] == base
+
+    assert base.read_text(encoding="utf-8") == (
+        "[00:00:00.500 --> 00:00:01.250] привет\n"
+        "[01:01:01.000 --> 01:01:02.500] мир\n"
+    )
+    srt = (tmp_path / "talk.srt").read_text(encoding="utf-8")
+    assert srt.startswith("1\n00:00:00,500 --> 00:00:01,250\nпривет\n\n2\n01:01:01,000")
+    vtt = (tmp_path / "talk.vtt").read_text(encoding="utf-8")
+    assert vtt.startswith("WEBVTT\n\n00:00:00.500 --> 00:00:01.250\nпривет\n\n")
+
+    data = json.loads((tmp_path / "talk.json").read_text(encoding="utf-8"))
+    assert [d["text"] for d in data] == ["привет", "мир"]
+    assert data[0]["words"] == [{"start": 0.5, "end": 0.9, "word": " привет", "probability": 0.97}]
+    assert "words" not in data[1]
+
+
+def test_empty_json_and_unknown_format(tmp_path):
+    with open_writers(tmp_path / "a.json", ("json",)):
+        pass
+    assert json.loads((tmp_path / "a.json").read_text(encoding="utf-8")) == []
+    with pytest.raises(ValueError):
+        open_writers(tmp_path / "a.txt", ("txt", "docx"))
+    assert not (tmp_path / "a.txt").exists()
+
+
+def test_register_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys.modules["transcript_writers"], "WRITERS", dict(WRITERS))
+
+    @register_writer
+    class CsvWriter(TranscriptWriter):
+        extension = "csv"
+
+        def format(self, seg):
+            return f"{seg.start},{seg.end},{seg.text.strip()}\n"
+
+    with open_writers(tmp_path / "a.txt", ("txt", "csv")) as out:
+        out.write(_segments()[0])
+    assert (tmp_path / "a.csv").read_text(encoding="utf-8") == "0.5,1.25,привет\n"
+
+
+def test_one_timestamp_format_for_all_writers():
+    # округление до целых мс без «60.000» в секундах
+    assert format_timestamp(59.9996) == "00:01:00.000"
+    assert format_timestamp(3725.0004, ",") == "01:02:05,000"
+    seg = types.SimpleNamespace(start=59.9996, end=61.25, text=" hi ")
+    line = format_segment(seg)
+    assert line == "[00:01:00.000 --> 00:01:01.250] hi\n"
+    assert WRITERS["txt"].format(None, seg) == line
+    parsed = parse_segment(line)
+    assert (parsed.start, parsed.end, parsed.text) == (60.0, 61.25, "hi")
+    assert parse_segment("not a segment") is None
+
+
+def test_write_transcript_replaces_all_formats(tmp_path):
+    seg = types.SimpleNamespace(start=0.0, end=1.0, text="new")
+    (tmp_path / "a.txt").write_text("old\n", encoding="utf-8")
+    paths = write_transcript(tmp_path / "a.txt", ("txt", "vtt"), [seg])
+    assert paths["vtt"].read_text(encoding="utf-8") == "WEBVTT\n\n00:00:00.000 --> 00:00:01.000\nnew\n\n"
+    assert paths["txt"].read_text(encoding="utf-8") == "[00:00:00.000 --> 00:00:01.000] new\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.txt", "a.vtt"]
@@ -0,0 +1,138 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class StubModel:
+    def __init__(self, label):
+        self.label = label
+
+    def transcribe(self, path, language=None, beam_size=5, vad_filter=True):
+        segs = [types.SimpleNamespace(start=float(i), end=i + 1.0, text=f"{self.label} {i}") for i in range(3)]
+        return iter(segs), {}
+
+
+@pytest.fixture
+def two_pass(monkeypatch):
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=object))
+    importlib.reload(importlib.import_module("audio2text"))
+    return importlib.reload(importlib.import_module("two_pass"))
+
+
+def test_refined_segments_replace_draft(two_pass, tmp_path):
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"dummy")
+    snapshots = []
+    drafts = []
+
+    job = two_pass.TwoPassTranscription(
+        audio,
+        draft_model=StubModel("draft"),
+        model=StubModel("final"),
+        flush_interval=0,
+        on_draft=lambda p: drafts.append(Path(p).read_text(encoding="utf-8")),
+        on_update=lambda j: snapshots.append(j.out_path.read_text(encoding="utf-8")),
+    )
+    job.start().wait(5)
+
+    assert job.state == "done"
+    assert "draft 2" in drafts[0]
+    # после первого уточнённого сегмента остальные строки ещё черновые
+    first = snapshots[0].splitlines()
+    assert first[0].endswith("final 0") and first[1].endswith("draft 1")
+    lines = (tmp_path / "a.txt").read_text(encoding="utf-8").splitlines()
+    assert [l.split("] ")[1] for l in lines] == ["final 0", "final 1", "final 2"]
+    assert not (tmp_path / "a.txt.refine").exists()
+
+
+def test_all_formats_follow_refinement(two_pass, tmp_path):
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"dummy")
+    drafts = []
+    job = two_pass.TwoPassTranscription(
+        audio, draft_model=StubModel("draft"), model=StubModel("final"), formats=("txt", "srt"),
+        flush_interval=0, on_draft=lambda p: drafts.append((tmp_path / "a.srt").read_text(encoding="utf-8")),
+    )
+    job.start().wait(5)
+
+    assert job.state == "done", job.error
+    assert "draft 2" in drafts[0]
+    srt = (tmp_path / "a.srt").read_text(encoding="utf-8")
+    assert "3\n00:00:02,000 --> 00:00:03,000\nfinal 2\n" in srt and "draft" not in srt
+    assert not list(tmp_path.glob("*.tmp*"))
+
+
+def test_rewrites_while_reader_holds_file(two_pass, tmp_path, monkeypatch):
+    from transcript_index import TranscriptIndex
+
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"dummy")
+    seen = []
+    index = None
+
+    def on_draft(p):
+        nonlocal index
+        index = TranscriptIndex(p)
+        seen.append(index.lines(0, 10))
+
+    def on_update(job):
+        # читатель держит файл открытым, пока идёт следующая замена
+        with open(job.out_path, "rb"):
+            index.refresh()
+            seen.append(index.lines(0, 10))
+
+    # Windows: пока читатель держит файл, os.replace падает с PermissionError
+    real_replace = two_pass.os.replace
+    failures = iter([True, True])
+
+    def flaky_replace(src, dst):
+        if next(failures, False):
+            raise PermissionError(13, "file in use", str(dst))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(two_pass.os, "replace", flaky_replace)
+    monkeypatch.setattr(two_pass, "REPLACE_DELAY", 0)
+    job = two_pass.TwoPassTranscription(
+        audio, draft_model=StubModel("draft"), model=StubModel("final"),
+        flush_interval=0, on_draft=on_draft, on_update=on_update,
+    )
+    job.start().wait(5)
+
+    assert job.state == "done", job.error
+    assert seen[0][2].endswith("draft 2") and seen[-1][0].endswith("final 0")
+    index.refresh()
+    assert [l.split("] ")[1] for l in index.lines(0, 10)] == ["final 0", "final 1", "final 2"]
+    assert not list(tmp_path.glob("*.tmp*"))
+
+
+def test_refinement_appends_without_rewriting_the_file(two_pass, tmp_path, monkeypatch):
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"dummy")
+    rewrites = []
+    real_write = two_pass.write_transcript
+    monkeypatch.setattr(two_pass, "write_transcript", lambda *a, **k: (rewrites.append(a), real_write(*a, **k))[1])
+    created = []
+    real_open = two_pass.transcribe_audio
+
+    def spy(path, **kwargs):
+        created.append(kwargs.get("formats", ("txt",)))
+        return real_open(path, **kwargs)
+
+    monkeypatch.setattr(two_pass, "transcribe_audio", spy)
+    sizes = []
+    job = two_pass.TwoPassTranscription(
+        audio, draft_model=StubModel("draft"), model=StubModel("final"), flush_interval=0,
+        on_update=lambda j: sizes.append(j._refined_bytes),
+    )
+    job.start().wait(5)
+
+    assert job.state == "done", job.error
+    assert created[1] == ()                     # второй проход файлов не пишет
+    assert len(rewrites) == 1                   # атомарная перезапись – только итог
+    assert len(sizes) == 3 and sizes == sorted(sizes) and sizes[0] > 0
+    assert not list(tmp_path.glob("*.refine"))
@@ -0,0 +1,77 @@
+import importlib
+import io
+import os
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from resource_scheduler import RECORDING, ResourceScheduler
+
+
+@pytest.fixture
+def waveform(monkeypatch):
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=object))
+    importlib.reload(importlib.import_module("audio2text"))
+    importlib.reload(importlib.import_module("streaming"))
+    return importlib.reload(importlib.import_module("waveform"))
+
+
+def _pcm(seconds, rate=8000):
+    t = np.arange(int(seconds * rate)) / rate
+    # Тишина, затем громкий тон во второй половине
+    signal = np.where(t >= seconds / 2, 20000 * np.sin(2 * np.pi * 200 * t), 0)
+    return signal.astype(np.int16)
+
+
+def test_pyramid_matches_direct_minmax_and_roundtrips(waveform, tmp_path):
+    pcm = _pcm(60)
+    peaks = waveform.compute_peaks(io.BytesIO(pcm.tobytes()), block=256, chunk_blocks=7)
+
+    blocks = pcm[: len(pcm) // 256 * 256].reshape(-1, 256)
+    assert np.array_equal(peaks.levels[0][1][: len(blocks)], (blocks.max(axis=1) >> 8).astype(np.int8))
+    assert len(peaks.levels[0][0]) == -(-len(pcm) // 256)
+    for (lo, hi), (lo2, hi2) in zip(peaks.levels, peaks.levels[1:]):
+        assert len(lo2) == -(-len(lo) // 2)
+        assert hi2.max() == hi.max() and lo2.min() == lo.min()
+    assert len(peaks.levels[-1][0]) <= 64
+
+    mins, maxs = peaks.for_width(100)
+    assert len(mins) == len(maxs) == 100
+    assert maxs[:45].max() == 0 and maxs[55:].min() > 70
+
+    audio = tmp_path / "rec.mp3"
+    audio.write_bytes(b"x")
+    peaks.save(waveform.WaveformPeaks.sidecar_path(audio))
+    loaded = waveform.WaveformPeaks.for_audio(audio)
+    assert np.array_equal(loaded.for_width(100)[1], maxs)
+    # Запись новее файла пиков – пики устарели.
+    os.utime(audio, (time.time() + 10, time.time() + 10))
+    assert waveform.WaveformPeaks.for_audio(audio) is None
+
+
+def test_indexer_waits_for_recording_to_finish(waveform, tmp_path):
+    scheduler = ResourceScheduler(total_cores=4)
+    lease = scheduler.acquire(RECORDING)
+    built = []
+
+    def builder(path, **kwargs):
+        built.append(path)
+        return waveform.WaveformPeaks([])
+
+    done = threading.Event()
+    indexer = waveform.WaveformIndexer(lambda p, peaks: done.set(), scheduler=scheduler, builder=builder)
+    audio = tmp_path / "a.mp3"
+    audio.write_bytes(b"x")
+    indexer.enqueue(audio)
+    time.sleep(0.2)
+    assert built == []
+    lease.release()
+    assert done.wait(2)
+    assert built == [audio]
+    indexer.stop()
@@ -0,0 +1,115 @@
+"""
+ timemap.py – соответствие времени в записи с вырезанной тишиной исходному
+ (настенному) времени.
+
+ :class:`ffmpeg_core.FFmpegProgressWatcher` в режиме пропуска тишины
+ сохраняет рядом с записью ``<audio>.timemap.json``: список опорных точек
+ ``(время в файле, время от начала записи)`` и момент старта записи.
+ Между опорными точками время идёт с коэффициентом 1.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+__all__ = ["TimeMap"]
+
+SUFFIX = ".timemap.json"
+
+
+class TimeMap:
+    """Piecewise-linear map from output-file time to original recording time."""
+
+    def __init__(self, started_at: Optional[float] = None) -> None:
+        self.started_at = started_at      # epoch-секунды старта записи
+        self.anchors: list[tuple[float, float]] = [(0.0, 0.0)]
+        self.removed_seconds = 0.0
+        self.periods = 0
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def add_silence(self, start: float, end: float, keep: float = 0.0) -> None:
+        """Record that original ``[start, end]`` was shortened to *keep* seconds."""
+        keep = min(keep, end - start)
+        removed = (end - start) - keep
+        if removed <= 0:
+            return
+        out_start = start - self.removed_seconds
+        self.anchors.append((out_start, start))
+        self.anchors.append((out_start + keep, end))
+        self.removed_seconds += removed
+        self.periods += 1
+
+    def copy(self) -> "TimeMap":
+        """Independent copy (a snapshot of a map that is still growing)."""
+        tm = TimeMap(self.started_at)
+        tm.anchors = list(self.anchors)
+        tm.removed_seconds = self.removed_seconds
+        tm.periods = self.periods
+        return tm
+
+    # ------------------------------------------------------------------
+    # Mapping
+    # ------------------------------------------------------------------
+
+    def to_original(self, t: float) -> float:
+        """Seconds in the output file → seconds since the recording started."""
+        i = bisect.bisect_right(self.anchors, (t, float("inf"))) - 1
+        out, orig = self.anchors[max(i, 0)]
+        return orig + (t - out)
+
+    def to_wallclock(self, t: float) -> Optional[float]:
+        """Seconds in the output file → epoch seconds, if the start time is known."""
+        if self.started_at is None:
+            return None
+        return self.started_at + self.to_original(t)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def sidecar_path(audio_path: Union[str, Path]) -> Path:
+        return Path(str(audio_path) + SUFFIX)
+
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(
+            json.dumps({
+                "version": 1,
+                "started_at": self.started_at,
+                "anchors": self.anchors,
+                "removed_seconds": self.removed_seconds,
+                "periods": self.periods,
+            }),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TimeMap":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        tm = cls(data.get("started_at"))
+        tm.anchors = [tuple(a) for a in data["anchors"]]
+        tm.removed_seconds = data.get("removed_seconds", 0.0)
+        tm.periods = data.get("periods", 0)
+        return tm
+
+    @classmethod
+    def for_audio(cls, audio_path: Union[str, Path]) -> Optional["TimeMap"]:
+        """Load the sidecar of *audio_path*, or ``None`` if it has none."""
+        path = cls.sidecar_path(audio_path)
+        if not path.exists():
+            return None
+        try:
+            return cls.load(path)
+        except (OSError, ValueError, KeyError):
+            return None
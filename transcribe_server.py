@@ -0,0 +1,511 @@
+"""
+ transcribe_server.py – локальный HTTP/JSON сервис транскрибации поверх
+ :func:`audio2text.transcribe_audio` с одной «тёплой» моделью на все запросы.
+
+ Эндпоинты::
+
+     GET    /health                 состояние сервиса и очереди
+     POST   /jobs                   {"audio": "/path/file.mp3", ...} → 202 {"id": ...}
+     GET    /jobs                   список задач
+     GET    /jobs/<id>              статус задачи
+     GET    /jobs/<id>/segments     поток сегментов (NDJSON, chunked) по мере готовности
+     DELETE /jobs/<id>              отмена задачи
+
+ Если очередь заполнена, ``POST /jobs`` отвечает ``503`` с ``Retry-After``.
+
+ Сервис слушает только localhost, но до него может достучаться любая
+ открытая в браузере страница.  Поэтому запросы с заголовком ``Origin``
+ отклоняются (``403``), ``POST`` принимается только с
+ ``Content-Type: application/json`` (такой запрос браузер без preflight не
+ отправит), а ``out_path`` должен лежать в папке аудио или в ``--output-root``.
+
+ Запуск из CLI::
+
+     python transcribe_server.py --port 8765 --model large-v3 --device cuda
+ """
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from audio2text import load_model, transcribe_audio_async
+from decoding_presets import AdaptivePresetPolicy, get_preset
+from resource_scheduler import default_scheduler
+
+__all__ = ["TranscriptionServer", "Job"]
+
+_TERMINAL = ("done", "failed", "cancelled")
+
+_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    415: "Unsupported Media Type",
+    503: "Service Unavailable",
+}
+
+
+@dataclass
+class Job:
+    """State of a single transcription request."""
+
+    id: str
+    audio: Path
+    out_path: Optional[Path] = None
+    language: str = "ru"
+    beam_size: int = 5
+    preset: Optional[str] = None
+    status: str = "queued"
+    progress: int = 0
+    error: Optional[str] = None
+    segments: list = field(default_factory=list)
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    cancel_requested: bool = False
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def notify(self) -> None:
+        """Wake up every stream waiting for new data and re-arm the event."""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "audio": str(self.audio),
+            "out_path": str(self.out_path) if self.out_path else None,
+            "status": self.status,
+            "preset": self.preset,
+            "progress": self.progress,
+            "segments": len(self.segments),
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class TranscriptionServer:
+    """Asyncio HTTP server sharing one preloaded model across all jobs.
+
+    Parameters
+    ----------
+    model : WhisperModel | None, default ``None``
+        Preloaded model (or a stub with the same ``transcribe`` API).  If
+        ``None`` the model is loaded once through :func:`load_model`.
+    host, port : str, int
+        Address to bind.  ``port=0`` picks a free port (see :attr:`port`).
+    max_queue : int, default 8
+        Admission limit: number of jobs waiting for a worker.  Further
+        submissions are rejected with ``503``.
+    workers : int, default 1
+        Number of jobs transcribed concurrently against the shared model.
+    keep_finished : int, default 100
+        How many finished jobs are kept for status queries.
+    scheduler : ResourceScheduler | None
+        Source of the CPU thread budget for the model loaded here;
+        defaults to :func:`resource_scheduler.default_scheduler`.
+    policy : AdaptivePresetPolicy | None
+        Picks a decoding preset for jobs submitted without one, based on the
+        queue depth and how long the job waited.  ``None`` keeps the plain
+        ``beam_size`` decoding.
+    output_root : str | Path | None
+        Extra directory a job's ``out_path`` may point into; by default
+        transcripts may only be written next to their audio.
+    """
+
+    def __init__(
+        self,
+        *,
+        model=None,
+        model_name: str = "large-v3",
+        device: str = "cuda",
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        max_queue: int = 8,
+        workers: int = 1,
+        keep_finished: int = 100,
+        scheduler=None,
+        policy: Optional[AdaptivePresetPolicy] = None,
+        output_root=None,
+    ) -> None:
+        self.model = model
+        self.model_name = model_name
+        self.device = device
+        self.host = host
+        self._port = port
+        self.max_queue = max_queue
+        self.workers = workers
+        self.keep_finished = keep_finished
+        self.scheduler = scheduler or default_scheduler()
+        self.policy = policy
+        self.output_root = Path(output_root).expanduser().resolve() if output_root else None
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._running: dict[str, asyncio.Task] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcribe")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def port(self) -> int:
+        """Actual bound port (useful with ``port=0``)."""
+        if self._server and self._server.sockets:
+            return self._server.sockets[0].getsockname()[1]
+        return self._port
+
+    async def start(self) -> None:
+        """Load the model (once), bind the socket and spawn workers."""
+        loop = asyncio.get_running_loop()
+        if self.model is None:
+            # Одна модель на всех воркеров: CTranslate2 держит веса один раз.
+            threads = self.scheduler.transcription_threads(self.workers)
+            self.model = await loop.run_in_executor(
+                self._executor, load_model, self.model_name, self.device, threads, self.workers
+            )
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle, self.host, self._port)
+
+    async def stop(self) -> None:
+        """Stop accepting requests and cancel outstanding jobs."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for job in list(self.jobs.values()):
+            if job.status not in _TERMINAL:
+                self.cancel(job.id)
+        running = list(self._running.values())
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, *running, return_exceptions=True)
+        self._queue = None      # воркеров больше нет – новые задачи не принимаем
+        # Running inference stops at its next segment; wait for it off-loop.
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f"Сервис транскрибации слушает http://{self.host}:{self.port}")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def submit(self, audio, *, out_path=None, language="ru", beam_size=5, preset=None) -> Job:
+        """Queue a new job.
+
+        Raises
+        ------
+        RuntimeError
+            If the server is not started (or already stopped).
+        asyncio.QueueFull
+            When the queue is saturated.
+        FileNotFoundError
+            If *audio* does not exist.
+        PermissionError
+            If *out_path* is outside the audio's folder and :attr:`output_root`.
+        """
+        if self._queue is None:
+            raise RuntimeError("TranscriptionServer is not running; await start() before submit()")
+        audio_path = Path(audio).expanduser().resolve()
+        if not audio_path.exists():
+            raise FileNotFoundError(audio_path)
+        if preset is not None:
+            get_preset(preset)
+        if out_path:
+            out_path = Path(out_path).expanduser().resolve()
+            allowed = [audio_path.parent] + ([self.output_root] if self.output_root else [])
+            if not any(out_path.parent.is_relative_to(root) for root in allowed):
+                raise PermissionError(f"out_path outside allowed folders: {out_path}")
+        job = Job(
+            id=str(next(self._ids)),
+            audio=audio_path,
+            out_path=out_path or audio_path.with_suffix(".txt"),
+            language=language,
+            beam_size=int(beam_size),
+            preset=preset,
+        )
+        self._queue.put_nowait(job)
+        self.jobs[job.id] = job
+        self._trim_finished()
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.jobs[job_id]
+        if job.status not in _TERMINAL:
+            job.cancel_requested = True
+            if job.id in self._running:
+                self._running[job.id].cancel()
+            else:
+                self._finish(job, "cancelled")
+        return job
+
+    def _trim_finished(self) -> None:
+        finished = [j.id for j in self.jobs.values() if j.status in _TERMINAL]
+        for job_id in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job_id]
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished = time.time()
+        job.notify()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.cancel_requested:
+                    continue
+                job.status = "running"
+                job.started = time.time()
+                if job.preset is None and self.policy:
+                    job.preset = self.policy.choose(self._queue.qsize(), job.started - job.created)
+                job.notify()
+                task = self._running[job.id] = asyncio.create_task(self._run(job))
+                # wait() не отменяет задачу вместе с воркером: задача сама
+                # гасит свою отмену, и воркер иначе «проглотил» бы stop().
+                await asyncio.wait({task})
+            finally:
+                self._running.pop(job.id, None)
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+
+        def on_progress(p):
+            if p.total:
+                loop.call_soon_threadsafe(self._set_progress, job, int(p.elapsed / p.total * 100))
+
+        segments = transcribe_audio_async(
+            job.audio,
+            executor=self._executor,
+            model=self.model,
+            out_path=job.out_path,
+            beam_size=job.beam_size,
+            preset=job.preset,
+            language=job.language,
+            progress_handler=on_progress,
+        )
+        try:
+            async for seg in segments:
+                self._add_segment(job, {"start": seg.start, "end": seg.end, "text": seg.text.strip()})
+        except asyncio.CancelledError:
+            self._finish(job, "cancelled")
+        except Exception as exc:
+            self._finish(job, "failed", f"{type(exc).__name__}: {exc}")
+        else:
+            job.progress = 100
+            self._finish(job, "done")
+        finally:
+            await segments.aclose()
+
+    @staticmethod
+    def _set_progress(job: Job, percent: int) -> None:
+        job.progress = percent
+        job.notify()
+
+    @staticmethod
+    def _add_segment(job: Job, data: dict) -> None:
+        job.segments.append(data)
+        job.notify()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _version = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = b""
+            length = int(headers.get("content-length", "0") or 0)
+            if length:
+                body = await reader.readexactly(length)
+            if "origin" in headers:
+                # запрос со страницы в браузере (CSRF) – API только для локальных программ
+                return await self._respond(writer, 403, {"error": "cross-origin requests are not allowed"})
+            if method.upper() == "POST" and headers.get("content-type", "").split(";")[0].strip() != "application/json":
+                return await self._respond(writer, 415, {"error": "expected Content-Type: application/json"})
+            await self._dispatch(method.upper(), target, body, writer)
+        except (ValueError, asyncio.IncompleteReadError):
+            await self._respond(writer, 400, {"error": "malformed request"})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, method: str, target: str, body: bytes, writer) -> None:
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+
+        if parts == ["health"] and method == "GET":
+            return await self._respond(writer, 200, {
+                "status": "ok",
+                "queued": self._queue.qsize() if self._queue else 0,
+                "max_queue": self.max_queue,
+                "workers": self.workers,
+            })
+
+        if parts == ["jobs"]:
+            if method == "GET":
+                return await self._respond(writer, 200, [j.to_dict() for j in self.jobs.values()])
+            if method == "POST":
+                return await self._post_job(body, writer)
+            return await self._respond(writer, 405, {"error": "method not allowed"})
+
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return await self._respond(writer, 404, {"error": "unknown job"})
+            if len(parts) == 3 and parts[2] == "segments" and method == "GET":
+                start = int(query.get("from", ["0"])[0])
+                return await self._stream_segments(job, start, writer)
+            if len(parts) == 2 and method == "GET":
+                return await self._respond(writer, 200, job.to_dict())
+            if len(parts) == 2 and method == "DELETE":
+                return await self._respond(writer, 200, self.cancel(job.id).to_dict())
+            return await self._respond(writer, 405, {"error": "method not allowed"})
+
+        await self._respond(writer, 404, {"error": "not found"})
+
+    async def _post_job(self, body: bytes, writer) -> None:
+        try:
+            data = json.loads(body or b"{}")
+            audio = data["audio"]
+        except (ValueError, KeyError, TypeError):
+            return await self._respond(writer, 400, {"error": "expected JSON with 'audio'"})
+        try:
+            job = self.submit(
+                audio,
+                out_path=data.get("out_path"),
+                language=data.get("language", "ru"),
+                beam_size=data.get("beam_size", 5),
+                preset=data.get("preset"),
+            )
+        except FileNotFoundError:
+            return await self._respond(writer, 404, {"error": f"file not found: {audio}"})
+        except PermissionError as exc:
+            return await self._respond(writer, 403, {"error": str(exc)})
+        except (TypeError, ValueError):
+            return await self._respond(writer, 400, {"error": "invalid job parameters"})
+        except asyncio.QueueFull:
+            return await self._respond(
+                writer, 503, {"error": "queue is full"}, extra_headers={"Retry-After": "5"}
+            )
+        await self._respond(writer, 202, job.to_dict())
+
+    async def _stream_segments(self, job: Job, start: int, writer) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson; charset=utf-8\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        sent = max(0, start)
+        while True:
+            changed = job.changed
+            chunk = b"".join(
+                json.dumps(s, ensure_ascii=False).encode("utf-8") + b"\n"
+                for s in job.segments[sent:]
+            )
+            sent = len(job.segments)
+            if chunk:
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                await writer.drain()
+            if job.status in _TERMINAL:
+                break
+            await changed.wait()
+        trailer = json.dumps({"status": job.status, "error": job.error}).encode("utf-8") + b"\n"
+        writer.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(trailer), trailer))
+        await writer.drain()
+
+    async def _respond(self, writer, status: int, payload, extra_headers=None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        for name, value in (extra_headers or {}).items():
+            head.append(f"{name}: {value}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+# ---------------------------------------------------------------------------
+# CLI wrapper
+# ---------------------------------------------------------------------------
+
+
+def _parse_cli_args() -> argparse.Namespace:  # pragma: no cover
+    p = argparse.ArgumentParser(prog="transcribe_server", description="Local transcription HTTP API")
+    p.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    p.add_argument("--port", type=int, default=8765, help="Port to bind")
+    p.add_argument("--model", default="large-v3", help="HF model name or local dir")
+    p.add_argument("--device", default="cuda", choices=["cuda", "cpu"], help="Device to run on")
+    p.add_argument("--max-queue", type=int, default=8, help="Max queued jobs before 503")
+    p.add_argument("--workers", type=int, default=1, help="Concurrent jobs")
+    p.add_argument("--adaptive", action="store_true", help="Step down to fast decoding under load")
+    p.add_argument("--output-root", help="Extra folder clients may write transcripts into")
+    return p.parse_args()
+
+
+def main() -> None:  # pragma: no cover – CLI only
+    args = _parse_cli_args()
+    server = TranscriptionServer(
+        model_name=args.model,
+        device=args.device,
+        host=args.host,
+        port=args.port,
+        max_queue=args.max_queue,
+        workers=args.workers,
+        policy=AdaptivePresetPolicy() if args.adaptive else None,
+        output_root=args.output_root,
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
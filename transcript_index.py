@@ -0,0 +1,207 @@
+"""
+ transcript_index.py – быстрый доступ к строкам большого транскрипта.
+
+ Смещения начала строк находятся numpy‑поиском ``\\n`` по блокам файла.
+ Строка декодируется только при обращении; читается она окном
+ :data:`READ_WINDOW` вместе с соседними, поэтому открытие многомегабайтного транскрипта
+ за целый день записи не зависит от его размера.  Переход к моменту
+ времени – бинарный поиск по префиксам ``[hh:mm:ss.mmm -->``: разбираются
+ лишь O(log n) строк.
+
+ Файл не держится открытым между обращениями: транскрибатор может
+ обрезать его (``"w"``) или подменить через ``os.replace``, в том числе в
+ Windows.  :meth:`TranscriptIndex.refresh` по ``stat`` отличает дописанный
+ файл (индексируется только хвост) от заменённого или обрезанного
+ (индексируется заново).
+
+ Использование::
+
+     with TranscriptIndex("meeting.txt") as index:
+         row = index.find_time(parse_timestamp("01:15:00"))
+         print(index.lines(row, row + 20))
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+__all__ = ["TranscriptIndex", "parse_timestamp"]
+
+# Размер блока при поиске переводов строк: ограничивает временный bool‑массив.
+SCAN_CHUNK = 16 << 20
+# Сколько байт читать за раз при обращении к строкам (соседние строки – из кэша).
+READ_WINDOW = 64 << 10
+# Сколько последних байт сверять, чтобы отличить дописанный файл от переписанного.
+TAIL_CHECK = 256
+
+_PREFIX_RE = re.compile(rb"\[(\d+):(\d\d):(\d\d(?:\.\d+)?) -->")
+
+
+def parse_timestamp(text: str) -> float:
+    """Parse ``hh:mm:ss.mmm``, ``mm:ss`` or plain seconds into seconds.
+
+    Raises
+    ------
+    ValueError
+        If *text* is not a timestamp.
+    """
+    parts = text.strip().split(":")
+    if not 1 <= len(parts) <= 3 or not all(parts):
+        raise ValueError(f"not a timestamp: {text!r}")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class TranscriptIndex:
+    """Line-offset index of a transcript that may grow or be replaced.
+
+    Parameters
+    ----------
+    path : str | Path
+        Text transcript (``[hh:mm:ss.mmm --> hh:mm:ss.mmm] text`` lines).
+
+    Raises
+    ------
+    OSError
+        If *path* cannot be read.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._stat: Optional[os.stat_result] = None
+        # Смещения начала строк; последний элемент – конец данных.
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._window = (0, b"")          # (смещение, байты) последнего чтения
+        self._tail_bytes = b""
+        self.generation = 0              # растёт при каждой полной переиндексации
+        self.refresh()
+
+    # -- index ------------------------------------------------------------
+    def refresh(self) -> bool:
+        """Pick up changes of a growing, rewritten or replaced file.
+
+        Appended data is indexed from the last line start only; a file
+        that shrank, was rewritten in place or replaced by another one is
+        indexed again from scratch (and :attr:`generation` grows).
+        Returns ``True`` if the file changed.
+        """
+        st = os.stat(self.path)
+        old = self._stat
+        if old is not None and (st.st_ino, st.st_size, st.st_mtime_ns) == (old.st_ino, old.st_size, old.st_mtime_ns):
+            return False
+        size = st.st_size
+        appended = (
+            old is not None
+            and st.st_ino == old.st_ino
+            and size > old.st_size
+            and self._tail() == self._tail_bytes
+        )
+        if appended:
+            # Последняя строка могла быть недописана – пересканируем её.
+            starts = self._offsets[:-1] if len(self._offsets) > 1 else np.zeros(1, dtype=np.int64)
+        else:
+            starts = np.zeros(1, dtype=np.int64)
+            self.generation += 1
+        self._offsets = self._build_offsets(starts, int(starts[-1]), size)
+        self._stat = st
+        self._window = (0, b"")
+        self._tail_bytes = self._tail()
+        return True
+
+    def _tail(self) -> bytes:
+        """Last indexed bytes: differ if the file was truncated and rewritten longer."""
+        end = int(self._offsets[-1])
+        with open(self.path, "rb") as fp:
+            fp.seek(max(0, end - TAIL_CHECK))
+            return fp.read(min(end, TAIL_CHECK))
+
+    def _build_offsets(self, starts: np.ndarray, scan_from: int, size: int) -> np.ndarray:
+        if not size:
+            return np.zeros(1, dtype=np.int64)
+        parts = [starts]
+        with open(self.path, "rb") as fp:
+            fp.seek(scan_from)
+            pos = scan_from
+            while pos < size:
+                chunk = fp.read(min(SCAN_CHUNK, size - pos))
+                if not chunk:
+                    break   # файл обрезали прямо сейчас – доиндексируем в следующий раз
+                newlines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10)
+                parts.append(newlines.astype(np.int64) + (pos + 1))
+                pos += len(chunk)
+        offsets = np.concatenate(parts)
+        if offsets[-1] != pos:
+            offsets = np.append(offsets, pos)   # последняя строка без '\n'
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    # -- access -----------------------------------------------------------
+    def _raw(self, row: int) -> bytes:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        base, data = self._window
+        if not (base <= start and end <= base + len(data)):
+            # Окно вокруг строки: прокрутка в обе стороны попадает в кэш
+            base = max(0, start - READ_WINDOW // 2)
+            with open(self.path, "rb") as fp:
+                fp.seek(base)
+                data = fp.read(max(end - base, READ_WINDOW))
+            self._window = (base, data)
+        return data[start - base:end - base]
+
+    def line(self, row: int) -> str:
+        """Decoded line *row* without the trailing newline."""
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self._raw(row).decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def lines(self, start: int, stop: int) -> list[str]:
+        """Lines ``start … stop-1`` (clamped to the file)."""
+        return [self.line(row) for row in range(max(start, 0), min(stop, len(self)))]
+
+    def start_time(self, row: int) -> Optional[float]:
+        """Start time of line *row* from its ``[hh:mm:ss.mmm -->`` prefix."""
+        match = _PREFIX_RE.match(self._raw(row))
+        if not match:
+            return None
+        h, m, s = match.groups()
+        return int(h) * 3600 + int(m) * 60 + float(s)
+
+    def find_time(self, seconds: float) -> int:
+        """Row of the last line starting at or before *seconds*.
+
+        Lines are assumed to be in start-time order (as all writers of the
+        project produce them); lines without a timestamp are skipped.
+        """
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = mid
+            t = self.start_time(probe)
+            while t is None and probe + 1 < hi:
+                probe += 1
+                t = self.start_time(probe)
+            if t is None or t > seconds:
+                hi = mid
+            else:
+                lo = probe + 1
+        return max(lo - 1, 0)
+
+    # -- lifetime ---------------------------------------------------------
+    def close(self) -> None:
+        """Drop cached data; the file itself is never kept open."""
+        self._window = (0, b"")
+
+    def __enter__(self) -> "TranscriptIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
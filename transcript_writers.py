@@ -0,0 +1,284 @@
+"""
+ transcript_writers.py – запись транскрипта сразу в несколько форматов.
+
+ Поток сегментов читается один раз: :class:`MultiWriter` раздаёт каждый
+ сегмент всем открытым писателям, каждый пишет в свой буферизованный файл.
+ Поддерживаются ``txt`` (формат ``[чч:мм:сс.ммм --> …] текст``), ``srt``,
+ ``vtt`` и ``json`` (с пословными метками, если модель их вернула).
+ Новые форматы добавляются через :func:`register_writer`.
+
+ Использование::
+
+     with open_writers("talk.txt", ("txt", "srt", "json")) as out:
+         for seg in segments:
+             out.write(seg)
+
+ или из CLI::
+
+     python audio2text.py talk.mp3 --formats txt srt vtt json
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from types import SimpleNamespace
+from typing import IO, Callable, Iterable, Optional, Union
+
+__all__ = [
+    "format_timestamp",
+    "format_segment",
+    "parse_segment",
+    "TranscriptWriter",
+    "TxtWriter",
+    "SrtWriter",
+    "VttWriter",
+    "JsonWriter",
+    "WRITERS",
+    "register_writer",
+    "MultiWriter",
+    "output_paths",
+    "open_writers",
+    "write_transcript",
+]
+
+BUFFER_SIZE = 1 << 16
+
+# Один экземпляр кодировщика вместо разбора аргументов json.dumps на каждый сегмент
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(", ", ": ")).encode
+
+
+def format_timestamp(t: float, sep: str = ".") -> str:
+    """Seconds → ``hh:mm:ss.mmm`` (``,`` as *sep* for SRT), rounded to whole ms."""
+    ms = int(round(t * 1000))
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def format_segment(seg) -> str:
+    """Render *seg* as a transcript line ``[start --> end] text``."""
+    return f"[{format_timestamp(seg.start)} --> {format_timestamp(seg.end)}] {seg.text.strip()}\n"
+
+
+_LINE_RE = re.compile(r"\[(\d+):(\d\d):(\d\d\.\d+) --> (\d+):(\d\d):(\d\d\.\d+)\] ?(.*)")
+
+
+def parse_segment(line: str) -> Optional[SimpleNamespace]:
+    """Inverse of :func:`format_segment`; ``None`` for other lines."""
+    m = _LINE_RE.match(line)
+    if not m:
+        return None
+    h1, m1, s1, h2, m2, s2, text = m.groups()
+    return SimpleNamespace(
+        start=int(h1) * 3600 + int(m1) * 60 + float(s1),
+        end=int(h2) * 3600 + int(m2) * 60 + float(s2),
+        text=text.rstrip("\r\n"),
+        words=None,
+    )
+
+
+class TranscriptWriter:
+    """Base class: one output format written to an open text file."""
+
+    extension = ""
+
+    def __init__(self, fp: IO[str]) -> None:
+        self.fp = fp
+        self.count = 0
+
+    def write(self, seg) -> None:
+        self.count += 1
+        self.fp.write(self.format(seg))
+
+    def format(self, seg) -> str:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        self.fp.flush()
+
+    def close(self) -> None:
+        """Write the footer (if any) and close the file."""
+        self.fp.close()
+
+
+class TxtWriter(TranscriptWriter):
+    extension = "txt"
+
+    def format(self, seg) -> str:
+        return format_segment(seg)
+
+
+class SrtWriter(TranscriptWriter):
+    extension = "srt"
+
+    def format(self, seg) -> str:
+        return (
+            f"{self.count}\n{format_timestamp(seg.start, ',')} --> {format_timestamp(seg.end, ',')}\n"
+            f"{seg.text.strip()}\n\n"
+        )
+
+
+class VttWriter(TranscriptWriter):
+    extension = "vtt"
+
+    def __init__(self, fp: IO[str]) -> None:
+        super().__init__(fp)
+        fp.write("WEBVTT\n\n")
+
+    def format(self, seg) -> str:
+        return f"{format_timestamp(seg.start)} --> {format_timestamp(seg.end)}\n{seg.text.strip()}\n\n"
+
+
+class JsonWriter(TranscriptWriter):
+    """JSON array of segments, streamed element by element."""
+
+    extension = "json"
+
+    def __init__(self, fp: IO[str]) -> None:
+        super().__init__(fp)
+        fp.write("[")
+
+    def format(self, seg) -> str:
+        data = {"start": round(seg.start, 3), "end": round(seg.end, 3), "text": seg.text.strip()}
+        words = getattr(seg, "words", None)
+        if words:
+            data["words"] = [
+                {
+                    "start": round(w.start, 3),
+                    "end": round(w.end, 3),
+                    "word": w.word,
+                    "probability": round(getattr(w, "probability", 1.0), 4),
+                }
+                for w in words
+            ]
+        prefix = "\n  " if self.count == 1 else ",\n  "
+        return prefix + _encode(data)
+
+    def close(self) -> None:
+        self.fp.write("\n]\n" if self.count else "]\n")
+        super().close()
+
+
+WRITERS = {cls.extension: cls for cls in (TxtWriter, SrtWriter, VttWriter, JsonWriter)}
+
+
+def register_writer(cls: type) -> type:
+    """Add a :class:`TranscriptWriter` subclass to :data:`WRITERS` (usable as decorator)."""
+    WRITERS[cls.extension] = cls
+    return cls
+
+
+class MultiWriter:
+    """Fan one segment stream out to several writers."""
+
+    def __init__(self, writers: dict) -> None:
+        self.writers = writers            # формат → TranscriptWriter
+        self.paths: dict = {}
+        # Список методов собираем один раз, а не на каждый сегмент.
+        self._targets = [w.write for w in writers.values()]
+
+    def write(self, seg) -> None:
+        for write in self._targets:
+            write(seg)
+
+    def flush(self) -> None:
+        """Push buffered lines to disk (for readers of a growing transcript)."""
+        for writer in self.writers.values():
+            writer.flush()
+
+    def close(self) -> None:
+        errors = []
+        for writer in self.writers.values():
+            try:
+                writer.close()
+            except Exception as exc:
+                errors.append(exc)
+        if errors:
+            raise errors[0]
+
+    def __enter__(self) -> "MultiWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def output_paths(base: Union[str, Path], formats: Iterable[str]) -> dict:
+    """``{format: path}`` – the first format goes to *base* itself, the
+    others next to it with the suffix replaced."""
+    base = Path(base)
+    paths = {}
+    for fmt in formats:
+        paths[fmt] = base if not paths else base.with_suffix("." + WRITERS[fmt].extension)
+    return paths
+
+
+def open_writers(
+    base: Union[str, Path], formats: Iterable[str] = ("txt",), *, buffer_size: int = BUFFER_SIZE
+) -> MultiWriter:
+    """Open one buffered file per format and return a :class:`MultiWriter`.
+
+    Raises
+    ------
+    ValueError
+        If a format is not registered in :data:`WRITERS` or two formats
+        would be written to the same file.
+    """
+    formats = list(dict.fromkeys(formats))
+    unknown = [f for f in formats if f not in WRITERS]
+    if unknown:
+        raise ValueError(f"unknown transcript format(s) {unknown}; expected one of {sorted(WRITERS)}")
+    paths = output_paths(base, formats)
+    if len(set(paths.values())) < len(paths):
+        raise ValueError(f"transcript formats {formats} would share an output file: {base}")
+    writers = {}
+    try:
+        for fmt, path in paths.items():
+            fp = open(path, "w", encoding="utf-8", buffering=buffer_size)
+            writers[fmt] = WRITERS[fmt](fp)
+    except BaseException:
+        for writer in writers.values():
+            writer.fp.close()
+        raise
+    multi = MultiWriter(writers)
+    multi.paths = paths
+    return multi
+
+
+def write_transcript(
+    base: Union[str, Path],
+    formats: Iterable[str],
+    segments: Iterable,
+    *,
+    replace: Callable[[Path, Path], None] = os.replace,
+) -> dict:
+    """Rewrite every format of a transcript atomically; returns ``{format: path}``.
+
+    The files are written next to the targets as ``<stem>.tmp.<ext>`` and
+    moved over them with *replace*, so a reader never sees a half-written
+    transcript.
+
+    Raises
+    ------
+    ValueError
+        As :func:`open_writers`.
+    """
+    formats = list(dict.fromkeys(formats))
+    base = Path(base)
+    out = open_writers(base.with_name(f"{base.stem}.tmp{base.suffix}"), formats)
+    try:
+        with out:
+            for seg in segments:
+                out.write(seg)
+    except BaseException:
+        for tmp in out.paths.values():
+            tmp.unlink(missing_ok=True)
+        raise
+    paths = output_paths(base, formats)
+    for fmt, tmp in out.paths.items():
+        replace(tmp, paths[fmt])
+    return paths
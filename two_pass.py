@@ -0,0 +1,280 @@
+"""
+ two_pass.py – двухпроходная транскрибация: быстрый черновик маленькой
+ моделью на CPU, затем уточнение основной моделью в фоне.
+
+ Черновик появляется в выходном файле через секунды.  Уточнённые сегменты
+ по мере готовности заменяют соответствующие черновые: новые уточнённые
+ строки дописываются после уже уточнённых, и переписывается только
+ оставшийся черновой хвост, а не весь файл.  Второй проход файлов не
+ пишет – сегменты приходят через ``segment_handler``.  Итог (и все
+ форматы) записывается атомарно (``os.replace``); просмотрщик
+ (:mod:`transcript_index`) не держит файл открытым, а если в Windows файл
+ всё же кто‑то читает в момент замены, замена повторяется.
+
+ Использование::
+
+     job = transcribe_two_pass("meeting.mp3", on_draft=print)
+     job.wait()
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+from audio2text import TranscriptionCancelled, load_model, transcribe_audio
+from transcript_writers import format_segment, write_transcript
+
+__all__ = ["TwoPassTranscription", "transcribe_two_pass"]
+
+# Повторы os.replace, пока читатель в Windows держит файл (PermissionError)
+REPLACE_ATTEMPTS = 20
+REPLACE_DELAY = 0.05
+
+
+def _replace(src: Path, dst: Path) -> None:
+    """``os.replace`` that waits out a reader briefly holding *dst* open.
+
+    Raises
+    ------
+    PermissionError
+        If *dst* stays locked for ``REPLACE_ATTEMPTS * REPLACE_DELAY`` seconds.
+    """
+    for attempt in range(REPLACE_ATTEMPTS):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == REPLACE_ATTEMPTS - 1:
+                raise
+            time.sleep(REPLACE_DELAY)
+
+
+class TwoPassTranscription:
+    """Draft-then-refine transcription of one file running in a background thread.
+
+    Parameters
+    ----------
+    input_audio : str | Path
+        Path to the source audio file.
+    out_path : str | Path | None
+        Transcript location; ``<input_audio>.<first format>`` by default.
+    formats : Iterable[str], default ("txt",)
+        Transcript formats; must start with ``txt`` – the text file is
+        updated while refining, the others are written with the draft and
+        the final result (see :func:`transcript_writers.open_writers`).
+    model_name, device, model, cpu_threads, engine
+        Refinement model, as in :func:`audio2text.transcribe_audio`;
+        *cpu_threads* (the job's lease) and *engine* apply to the draft
+        model too.
+    preset, word_timestamps
+        Decoding of the refinement pass, as in
+        :func:`audio2text.transcribe_audio`; the draft is always greedy.
+    draft_model_name : str, default "base"
+        Small model for the draft pass (``tiny`` / ``base``).
+    draft_device : str, default "cpu"
+        Device for the draft model; on CPU it is loaded as int8.
+    draft_model : WhisperModel | None
+        Preloaded draft model.
+    flush_interval : float, default 1.0
+        Minimum seconds between rewrites of the output file during refinement.
+    on_draft : Callable[[Path], None] | None
+        Called once the draft transcript is complete.
+    on_update : Callable[[TwoPassTranscription], None] | None
+        Called after each rewrite of the output file during refinement.
+    on_done : Callable[[TwoPassTranscription], None] | None
+        Called when the job finishes, fails or is cancelled (see :attr:`state`).
+    """
+
+    def __init__(
+        self,
+        input_audio: Union[str, Path],
+        *,
+        out_path: Optional[Union[str, Path]] = None,
+        formats: Iterable[str] = ("txt",),
+        model_name: str = "large-v3",
+        device: str = "cuda",
+        model=None,
+        cpu_threads: int = 0,
+        engine: str = "faster-whisper",
+        draft_model_name: str = "base",
+        draft_device: str = "cpu",
+        draft_model=None,
+        beam_size: int = 5,
+        preset=None,
+        language: str = "ru",
+        word_timestamps: bool = False,
+        flush_interval: float = 1.0,
+        on_draft: Optional[Callable[[Path], None]] = None,
+        on_update: Optional[Callable[["TwoPassTranscription"], None]] = None,
+        on_done: Optional[Callable[["TwoPassTranscription"], None]] = None,
+    ) -> None:
+        self.audio_path = Path(input_audio).expanduser().resolve()
+        if not self.audio_path.exists():
+            raise FileNotFoundError(self.audio_path)
+        self.formats = list(dict.fromkeys(formats))
+        if self.formats[0] != "txt":
+            raise ValueError(f"two-pass transcript must be written as txt first, got {self.formats}")
+        self.out_path = (
+            Path(out_path).expanduser().resolve()
+            if out_path
+            else self.audio_path.with_suffix("." + self.formats[0])
+        )
+        self.model_name = model_name
+        self.device = device
+        self.model = model
+        self.cpu_threads = cpu_threads
+        self.engine = engine
+        self.draft_model_name = draft_model_name
+        self.draft_device = draft_device
+        self.draft_model = draft_model
+        self.beam_size = beam_size
+        self.preset = preset
+        self.language = language
+        self.word_timestamps = word_timestamps
+        self.flush_interval = flush_interval
+        self.on_draft = on_draft
+        self.on_update = on_update
+        self.on_done = on_done
+
+        self.state = "pending"   # pending → draft → refining → done | failed | cancelled
+        self.error: Optional[BaseException] = None
+        self.draft: list = []
+        self.refined: list = []
+        self.draft_seconds: Optional[float] = None
+        self._started = 0.0
+        self._last_flush = 0.0
+        self._written = 0          # уточнённых сегментов уже в файле
+        self._refined_bytes = 0    # их длина в байтах – дальше черновой хвост
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Control
+    # ------------------------------------------------------------------
+
+    def start(self) -> "TwoPassTranscription":
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job is over; return ``False`` on timeout."""
+        if self._thread:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def cancel(self) -> None:
+        """Stop at the next segment; the best transcript so far stays on disk."""
+        self._cancel.set()
+
+    def segments(self) -> list:
+        """Current transcript: refined segments followed by the uncovered draft."""
+        with self._lock:
+            return self.refined + self._draft_tail()
+
+    def _draft_tail(self) -> list:
+        # вызывается под self._lock
+        cut = self.refined[-1].end if self.refined else 0.0
+        # Черновой сегмент уходит, как только уточнение покрыло его середину.
+        return [d for d in self.draft if (d.start + d.end) / 2 >= cut]
+
+    # ------------------------------------------------------------------
+    # Passes
+    # ------------------------------------------------------------------
+
+    def run(self) -> None:
+        """Run both passes in the calling thread."""
+        self._started = time.monotonic()
+        try:
+            self.state = "draft"
+            draft_model = self.draft_model or load_model(
+                self.draft_model_name, self.draft_device, self.cpu_threads, engine=self.engine
+            )
+            transcribe_audio(
+                self.audio_path,
+                model=draft_model,
+                out_path=self.out_path,
+                formats=self.formats,
+                beam_size=1,
+                language=self.language,
+                segment_handler=self._on_draft_segment,
+            )
+            self.draft_seconds = time.monotonic() - self._started
+            if self.on_draft:
+                self.on_draft(self.out_path)
+
+            self.state = "refining"
+            model = self.model or load_model(self.model_name, self.device, self.cpu_threads, engine=self.engine)
+            # Без файлов: сегменты собирает _on_refined_segment.
+            transcribe_audio(
+                self.audio_path,
+                model=model,
+                formats=(),
+                beam_size=self.beam_size,
+                preset=self.preset,
+                language=self.language,
+                word_timestamps=self.word_timestamps,
+                segment_handler=self._on_refined_segment,
+            )
+            # Итоговый файл – ровно результат второго прохода.
+            with self._lock:
+                refined = list(self.refined)
+            write_transcript(self.out_path, self.formats, refined, replace=_replace)
+            self.state = "done"
+        except TranscriptionCancelled:
+            self._flush()
+            self.state = "cancelled"
+        except Exception as exc:
+            self.error = exc
+            self.state = "failed"
+        finally:
+            if self.on_done:
+                self.on_done(self)
+
+    def _on_draft_segment(self, seg) -> None:
+        if self._cancel.is_set():
+            raise TranscriptionCancelled(str(self.audio_path))
+        with self._lock:
+            self.draft.append(seg)
+
+    def _on_refined_segment(self, seg) -> None:
+        if self._cancel.is_set():
+            raise TranscriptionCancelled(str(self.audio_path))
+        with self._lock:
+            self.refined.append(seg)
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._last_flush = now
+            self._append()
+            if self.on_update:
+                self.on_update(self)
+
+    def _append(self) -> None:
+        """Append new refined lines to the text file and rewrite only the draft tail."""
+        with self._lock:
+            new = self.refined[self._written:]
+            self._written = len(self.refined)
+            tail = self._draft_tail()
+        refined = "".join(map(format_segment, new)).encode("utf-8")
+        draft = "".join(map(format_segment, tail)).encode("utf-8")
+        with open(self.out_path, "r+b") as fp:
+            fp.seek(self._refined_bytes)
+            # Сначала пишем, потом режем: файл не становится короче уже видимого.
+            fp.write(refined + draft)
+            fp.truncate()
+        self._refined_bytes += len(refined)
+
+    def _flush(self) -> None:
+        """Atomically rewrite every output file with the merged transcript."""
+        write_transcript(self.out_path, self.formats, self.segments(), replace=_replace)
+
+
+def transcribe_two_pass(input_audio: Union[str, Path], **kwargs) -> TwoPassTranscription:
+    """Start a :class:`TwoPassTranscription` in the background and return it."""
+    return TwoPassTranscription(input_audio, **kwargs).start()
@@ -37,6 +37,7 @@ class ConsolePanel(QFrame):
             padding-top: 16px;
             padding-bottom: 8px;
         """)
+        self.console_title = console_title
         vbox.addWidget(console_title)
 
         # --- Область с логами ---
@@ -88,3 +89,7 @@ class ConsolePanel(QFrame):
             lines.append(line)
         self._buffer.extend(lines)
         self.console_box.setHtml(self._buffer.render_html("<br>"))
+
+    def set_stall_count(self, count: int):
+        """Показать в заголовке число зафиксированных зависаний интерфейса."""
+        self.console_title.setText(f"Console  · UI stalls: {count}" if count else "Console")
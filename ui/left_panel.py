@@ -8,13 +8,29 @@ from PyQt6.QtWidgets import (
     QLabel,
     QScrollArea,
     QMessageBox,
+    QProgressBar,
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 import subprocess, sys
-from ffmpeg_core import FFmpegProgressWatcher, get_audio_lines
+from ffmpeg_core import MULTITRACK_EXT, FFmpegProgressWatcher, get_audio_lines
 import os, datetime
 import threading
 from audio2text import transcribe_audio
+from two_pass import TwoPassTranscription
+from multichannel import transcribe_multichannel
+from incremental import IncrementalTranscriber
+from resource_scheduler import RECORDING, TRANSCRIPTION, default_scheduler
+from level_meter import LevelMeter
+from waveform import WaveformIndexer, WaveformPeaks
+from timemap import TimeMap
+from ui.waveform_view import WaveformView
+from ui.transcript_viewer import TranscriptViewer
+from archive import ArchivePolicy, Archiver
+
+def same_path_key(path: str) -> str:
+    """Ключ для сравнения путей: QFileDialog, os.path.join и Path.resolve()
+    дают разные написания одного файла."""
+    return os.path.normcase(os.path.realpath(path))
 
 def open_in_folder(path: str):
     """Открыть папку, содержащую указанный файл."""
@@ -38,15 +54,25 @@ def open_file(path: str):
         subprocess.Popen(["xdg-open", path])
 
 
+# Файлы рядом с записью, которые переезжают и удаляются вместе с ней
+SIDECARS = (WaveformPeaks.sidecar_path, TimeMap.sidecar_path)
+
+
 class RecordItem(QFrame):
     """Элемент списка сохранённых записей."""
 
+    # путь удалённой записи
+    deleted = pyqtSignal(str)
+    # старый и новый путь переименованной записи
+    renamed = pyqtSignal(str, str)
+
     def __init__(self, path: str, settings, transcribe_cb=None, parent=None):
         super().__init__(parent)
         self.path = path
         self._settings = settings
         self._transcribe_cb = transcribe_cb
         self._txt_path = self._calc_transcript_path(path)
+        self._viewer = None
         self.setFixedHeight(48)
         # Стилизация элемента
         self.setStyleSheet(
@@ -73,12 +99,16 @@ class RecordItem(QFrame):
         hbox.setSpacing(12)
 
         self.name_lbl = QLabel(os.path.basename(path))
-        hbox.addWidget(self.name_lbl, stretch=1)
+        hbox.addWidget(self.name_lbl)
+
+        # Миниатюра волны; если файла пиков ещё нет, его построит индексатор
+        self.waveform = WaveformView(WaveformPeaks.for_audio(path))
+        hbox.addWidget(self.waveform, stretch=1)
 
         # Кнопка открытия расположения файла
         show_btn = QPushButton("📂")
         show_btn.setFixedWidth(36)
-        show_btn.clicked.connect(lambda: open_in_folder(path))
+        show_btn.clicked.connect(lambda: open_in_folder(self.path))
         hbox.addWidget(show_btn)
 
         # Кнопка переименования
@@ -121,8 +151,32 @@ class RecordItem(QFrame):
         self._txt_path = path
         self.open_txt_btn.setVisible(os.path.exists(path))
 
+    def refresh_viewer(self) -> None:
+        """Подхватить изменения транскрипта в открытом просмотрщике сразу, не дожидаясь таймера."""
+        if self._viewer is not None:
+            self._viewer.refresh()
+
     def open_transcript(self):
-        open_file(self._txt_path)
+        """Показать транскрипт во встроенном просмотрщике."""
+        if not os.path.exists(self._txt_path):
+            return
+        if self._viewer is not None:
+            self._viewer.raise_()
+            self._viewer.activateWindow()
+            return
+        try:
+            viewer = TranscriptViewer(self._txt_path, self.window())
+        except OSError:
+            open_file(self._txt_path)
+            return
+        viewer.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        viewer.finished.connect(lambda _: setattr(self, "_viewer", None))
+        self._viewer = viewer
+        viewer.show()
+
+    def _close_viewer(self):
+        if self._viewer is not None:
+            self._viewer.close()
 
     def rename_file(self):
         from PyQt6.QtWidgets import QInputDialog
@@ -134,6 +188,7 @@ class RecordItem(QFrame):
             if not new_name.lower().endswith(os.path.splitext(current_name)[1]):
                 new_name += os.path.splitext(current_name)[1]
             new_path = os.path.join(folder, new_name)
+            self._close_viewer()
             try:
                 os.rename(self.path, new_path)
             except OSError:
@@ -149,6 +204,11 @@ class RecordItem(QFrame):
                 except OSError:
                     pass
             self.set_transcript_path(new_txt)
+            for sidecar in SIDECARS:
+                try:
+                    os.rename(sidecar(old_path), sidecar(new_path))
+                except OSError:
+                    pass
             self.name_lbl.setText(new_name)
             # обновляем список записей в настройках
             records = self._settings.records()
@@ -157,6 +217,7 @@ class RecordItem(QFrame):
                     records[i] = new_path
                     break
             self._settings.set_records(records)
+            self.renamed.emit(old_path, new_path)
 
     def delete_file(self):
         """Удалить запись и обновить список."""
@@ -168,10 +229,16 @@ class RecordItem(QFrame):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
         )
         if reply == QMessageBox.StandardButton.Yes:
+            self._close_viewer()
             try:
                 os.remove(self.path)
             except OSError:
                 pass
+            for sidecar in SIDECARS:
+                try:
+                    os.remove(sidecar(self.path))
+                except OSError:
+                    pass
             txt = self._calc_transcript_path(self.path)
             if os.path.exists(txt):
                 try:
@@ -180,6 +247,7 @@ class RecordItem(QFrame):
                     pass
             records = [p for p in self._settings.records() if p != self.path]
             self._settings.set_records(records)
+            self.deleted.emit(self.path)
             self.setParent(None)
             self.deleteLater()
 
@@ -193,14 +261,47 @@ from ui.settings_panel import SettingsPanel
 from ui.settings_manager import SettingsManager
 
 class LeftPanel(QFrame):
+    # (watcher, lease, result) из потока завершения записи
+    record_finalized = pyqtSignal(object, object, object)
+    # (старый путь, путь архива) из потока архивации
+    record_archived = pyqtSignal(str, str)
+    # новая папка транскриптов (уведомление может прийти из потока записи настроек)
+    transcript_folder_changed = pyqtSignal(object)
+    # (текст, цвет) для консоли из фоновых потоков
+    log_message = pyqtSignal(str, str)
+    # (RecordItem, путь транскрипта) из потока транскрибации
+    transcript_ready = pyqtSignal(object, str)
+    # RecordItem, чей транскрипт только что дописан (уточнение второго прохода)
+    transcript_updated = pyqtSignal(object)
+
     def __init__(self, console_panel):
         super().__init__()
         self.console = console_panel          # ссылка на ConsolePanel
         self.settings = SettingsManager()
         self.ffmpeg = None                    # активный FFmpegProgressWatcher
+        self.scheduler = default_scheduler()  # бюджеты потоков CPU
+        self.record_lease = None
+        self.finalizing = set()               # записи, которые ещё дописываются
+        self.record_finalized.connect(self._on_record_finalized)
         self.progress_timer = QTimer()
         self.progress_timer.timeout.connect(self._poll_progress)
+        self.level_meter = None
+        self.level_timer = QTimer()           # индикатор уровня, ~30 fps
+        self.level_timer.timeout.connect(self._poll_level)
+        self._silence_warned = False
         self.trans_thread = None
+        self.catchup_thread = None
+        self._record_items = {}               # путь → RecordItem
+        self._caught_up = set()               # записи с инкрементальным транскриптом
+        self._busy_paths = []                 # записи, которые сейчас транскрибируются (с повторами)
+        self.waveform_indexer = WaveformIndexer(self._on_waveform_ready, scheduler=self.scheduler)
+        self.archiver = None
+        self.record_archived.connect(self._on_record_archived)
+        self.transcript_folder_changed.connect(self._on_transcript_folder_changed)
+        self.log_message.connect(self._log)
+        self.transcript_ready.connect(lambda item, path: item.set_transcript_path(path))
+        self.transcript_updated.connect(lambda item: item.refresh_viewer())
+        self.settings.on_change(SettingsManager.TXT_FOLDER_KEY, self.transcript_folder_changed.emit)
         
         self.setFixedWidth(540)
         self.setObjectName("left_frame")
@@ -314,8 +415,11 @@ class LeftPanel(QFrame):
             """
         )
 
-        info_hbox = QHBoxLayout(self.record_frame)
-        info_hbox.setContentsMargins(16, 8, 16, 8)
+        record_outer = QVBoxLayout(self.record_frame)
+        record_outer.setContentsMargins(16, 8, 16, 8)
+        record_outer.setSpacing(6)
+        info_hbox = QHBoxLayout()
+        info_hbox.setContentsMargins(0, 0, 0, 0)
         info_hbox.setSpacing(12)
 
         self.file_lbl = QLabel()
@@ -327,9 +431,42 @@ class LeftPanel(QFrame):
         self.size_lbl = QLabel("0 KB")
         self.size_lbl.setStyleSheet(f"color: {SETTINGS_TEXT};")
 
+        # Дотранскрибировать то, что записано с прошлого раза
+        self.catchup_btn = QPushButton("⟳")
+        self.catchup_btn.setFixedWidth(36)
+        self.catchup_btn.setToolTip("Транскрибировать новое с прошлого раза")
+        self.catchup_btn.setStyleSheet(
+            f"""
+            QPushButton {{
+                background: #323B4A;
+                color: {LABEL_TEXT};
+                border: none;
+                border-radius: 8px;
+                font-size: 16px;
+            }}
+            QPushButton:hover {{ background: #48516B; }}
+            """
+        )
+        self.catchup_btn.clicked.connect(self.catch_up)
+
         info_hbox.addWidget(self.file_lbl)
         info_hbox.addWidget(self.time_lbl)
         info_hbox.addWidget(self.size_lbl)
+        info_hbox.addWidget(self.catchup_btn)
+
+        # Уровень входного сигнала: RMS в дБ, шкала от -60 до 0
+        self.level_bar = QProgressBar()
+        self.level_bar.setRange(0, 60)
+        self.level_bar.setTextVisible(False)
+        self.level_bar.setFixedHeight(6)
+        self.level_bar.setStyleSheet(
+            f"""
+            QProgressBar {{ background: #323B4A; border: none; border-radius: 3px; }}
+            QProgressBar::chunk {{ background: {BTN_PLAY}; border-radius: 3px; }}
+            """
+        )
+        record_outer.addLayout(info_hbox)
+        record_outer.addWidget(self.level_bar)
 
         self.record_frame.setVisible(False)
         left_main_vbox.addWidget(self.record_frame)
@@ -367,6 +504,8 @@ class LeftPanel(QFrame):
         self.left_stack.addWidget(self.left_settings_widget)
         self.left_stack.setCurrentWidget(self.left_main_widget)
 
+        self.start_archiver()
+
     def show_settings(self):
         self.left_stack.setCurrentWidget(self.left_settings_widget)
     def show_main(self):
@@ -375,8 +514,11 @@ class LeftPanel(QFrame):
         self.left_stack.setCurrentWidget(self.left_main_widget)
 
         # --- доступ к настройкам ---
-    def _current_device(self) -> str:
-        return self.left_settings_widget.device_combo.currentText()
+    def _current_device(self):
+        """Одно устройство или [микрофон, второй источник] для сведения."""
+        device = self.left_settings_widget.device_combo.currentText()
+        extra = self.left_settings_widget.extra_device()
+        return [device, extra] if extra and extra != device else device
 
     def _save_folder(self) -> str:
         return self.left_settings_widget.folder_frame.value()
@@ -393,17 +535,42 @@ class LeftPanel(QFrame):
         # путь и имя файла
         folder = self._save_folder()
         os.makedirs(folder, exist_ok=True)
+        device = self._current_device()
+        # Режим источников важен, только когда их два; дорожки кладём в .mka
+        source_mode = self.left_settings_widget.source_mode() if isinstance(device, list) else "mix"
+        ext = ".mka" if source_mode == "tracks" else ".mp3"
+        skip_silence = self.settings.skip_silence()
+        if skip_silence and source_mode == "tracks":
+            # ffmpeg не умеет вырезать тишину синхронно в нескольких дорожках
+            self.console.insert_log([
+                (datetime.datetime.now().strftime("%H:%M:%S"), "WARNING Silence skipping is off for separate tracks", "#FFB74D")
+            ])
+            skip_silence = False
         stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        out_file = os.path.join(folder, f"{stamp}.mp3")
+        out_file = os.path.join(folder, f"{stamp}{ext}")
+        # Предыдущая запись могла ещё не дописаться в ту же секунду
+        busy = {w.output_file for w in self.finalizing}
+        n = 1
+        while out_file in busy or os.path.exists(out_file):
+            out_file = os.path.join(folder, f"{stamp}_{n}{ext}")
+            n += 1
         self.current_file = out_file
 
         # watcher
+        self.record_lease = self.scheduler.acquire(RECORDING)
         self.ffmpeg = FFmpegProgressWatcher(
-            device_name=self._current_device(),
+            device_name=device,
             output_file=out_file,
-            bitrate="128k"
+            bitrate="128k",
+            threads=self.record_lease.threads,
+            silence_mode="compress" if skip_silence else None,
+            level_meter=LevelMeter(),
+            source_mode=source_mode,
         )
+        self.level_meter = self.ffmpeg.level_meter
+        self._silence_warned = False
         self.ffmpeg.start()
+        self.level_timer.start(33)
         self.console.insert_log([(stamp, f"INFO Recording → {out_file}", "#4DC3F6")])
         self.progress_timer.start(1000)   # раз в сек
         self.file_lbl.setText(os.path.basename(out_file))
@@ -412,29 +579,69 @@ class LeftPanel(QFrame):
         self.record_frame.setVisible(True)
 
     def stop_record(self):
+        """Остановить запись, не блокируя интерфейс.
+
+        ffmpeg дописывает файл в фоновом потоке; результат приходит сигналом
+        ``record_finalized``.  Новую запись можно начать сразу.
+        """
         if not self.ffmpeg:
             return
-        
+
+        watcher, lease = self.ffmpeg, self.record_lease
+        self.ffmpeg = None
+        self.record_lease = None
+        self.finalizing.add(watcher)
+
         self.btn_play.setEnabled(True)    # Можно снова начинать запись
         self.btn_stop.setEnabled(False)     # Пока нечего останавливать
-
-        result = self.ffmpeg.stop()
         self.progress_timer.stop()
+        self.level_timer.stop()
+        self.level_meter = None
+        self.level_bar.setValue(0)
+        self.file_lbl.setText(f"{os.path.basename(watcher.output_file)} · finalizing…")
+        self._log(f"INFO Finalizing {watcher.output_file}…", "#AAB8CC")
+
+        watcher.stop_async(lambda result: self.record_finalized.emit(watcher, lease, result))
+
+    def _on_record_finalized(self, watcher, lease, result):
+        """Завершение записи (GUI-поток): статистика и регистрация файла."""
+        lease.release()
+        self.finalizing.discard(watcher)
+        current = self.ffmpeg is None        # новая запись ещё не начата
         if result["success"]:
             msg = f"Saved: {result['output_file']} · {result['duration']}"
             self.console.insert_log([(datetime.datetime.now().strftime("%H:%M:%S"), msg, "#4DC3F6")])
-            self.time_lbl.setText(result["duration"])
-            self.size_lbl.setText(self._format_size(result.get("size_bytes", 0)))
+            if current:
+                self.time_lbl.setText(result["duration"])
+                self.size_lbl.setText(self._format_size(result.get("size_bytes", 0)))
+            resources = result.get("resources")
+            if resources:
+                self._log(
+                    f"INFO ffmpeg CPU avg {resources['cpu_avg']:.0f}% · max {resources['cpu_max']:.0f}% · "
+                    f"RSS {self._format_size(resources['rss_max'])}",
+                    "#AAB8CC",
+                )
+            silence = result.get("silence")
+            if silence and silence["periods"]:
+                self._log(
+                    f"INFO Silence skipped: {silence['periods']} × · "
+                    f"{silence['removed_seconds']:.0f} s · ~{self._format_size(silence['saved_bytes'])}",
+                    "#AAB8CC",
+                )
             # persist record info
             records = self.settings.records()
             if result["output_file"] not in records:
                 records.append(result["output_file"])
                 self.settings.set_records(records)
             self._add_record_item(result["output_file"])
+            if os.path.abspath(result["output_file"]) in self._caught_up:
+                # хвост после последнего «догнать» и черновой край – окончательно
+                self._caught_up.discard(os.path.abspath(result["output_file"]))
+                self._run_catch_up(result["output_file"], final=True)
         else:
             self.console.insert_log([(datetime.datetime.now().strftime("%H:%M:%S"), "ERROR Record failed", "#FF7043")])
-        self.ffmpeg = None
-        self.record_frame.setVisible(False)
+        if current:
+            self.record_frame.setVisible(False)
 
     def _poll_progress(self):
         if self.ffmpeg:
@@ -442,12 +649,33 @@ class LeftPanel(QFrame):
             txt = f"{out_time}  {int(size)//1024} KB  {speed}"
             self.console.insert_log([(datetime.datetime.now().strftime("%H:%M:%S"), txt, "#AAB8CC")])
             self.time_lbl.setText(out_time)
+            if len(self.ffmpeg.devices) > 1:
+                levels = "  ".join(
+                    f"{p['device']}: {p['time']:.0f}s "
+                    + ("—" if p["rms_db"] is None else f"{p['rms_db']:.0f} dB")
+                    for p in self.ffmpeg.get_source_progress()
+                )
+                self._log(levels, "#AAB8CC")
             try:
                 bytes_size = int(size)
             except ValueError:
                 bytes_size = 0
             self.size_lbl.setText(self._format_size(bytes_size))
 
+    def _poll_level(self):
+        meter = self.level_meter
+        if not meter:
+            return
+        rms_db, _peak_db = meter.level()
+        self.level_bar.setValue(int(max(0.0, min(60.0, rms_db + 60.0))))
+        silent = meter.silent_for >= meter.silence_seconds
+        if silent and not self._silence_warned:
+            self._log(
+                f"WARNING No input signal for {meter.silent_for:.0f} s — check the microphone",
+                "#FFB74D",
+            )
+        self._silence_warned = silent
+
     def _format_size(self, bytes_size: int) -> str:
         if bytes_size >= 1024 ** 3:
             return f"{bytes_size / (1024 ** 3):.1f} GB"
@@ -468,29 +696,186 @@ class LeftPanel(QFrame):
         """Добавить запись в список на панели."""
         item = RecordItem(path, self.settings, self._start_transcription)
         self.records_layout.addWidget(item)
+        self._record_items[same_path_key(path)] = item
+        item.deleted.connect(self._on_record_deleted)
+        item.renamed.connect(self._on_record_renamed)
+        if not item.waveform.has_peaks():
+            self.waveform_indexer.enqueue(path)
+
+    def start_archiver(self):
+        """Перекодировать старые записи в Opus в фоне (если включено)."""
+        days = self.settings.archive_days()
+        budget_gb = self.settings.archive_budget_gb()
+        if self.archiver or not (days or budget_gb):
+            return
+        policy = ArchivePolicy(
+            min_age_days=days or float("inf"),
+            budget_bytes=budget_gb * (1 << 30) if budget_gb else None,
+        )
+        self.archiver = Archiver(
+            policy, scheduler=self.scheduler, on_moved=self.record_archived.emit, in_use=self._paths_in_use
+        )
+        records = self.settings.records()
+
+        # поток архивации: в консоль – только через сигнал log_message
+        def worker():
+            try:
+                report = self.archiver.run(records)
+                for src, error in report.failed:
+                    self.log_message.emit(f"WARNING Archive failed for {os.path.basename(src)}: {error}", "#FFB74D")
+                if report.archived:
+                    self.log_message.emit(
+                        f"INFO Archived {len(report.archived)} recordings · "
+                        f"{self._format_size(report.saved_bytes)} freed",
+                        "#AAB8CC",
+                    )
+                if report.over_budget:
+                    self.log_message.emit(
+                        f"WARNING Recordings exceed the disk budget by {self._format_size(report.over_budget)}",
+                        "#FFB74D",
+                    )
+            except Exception as exc:  # pragma: no cover - GUI feedback only
+                self.log_message.emit(f"ERROR Archive: {exc}", "#FF7043")
+            finally:
+                self.archiver = None
+
+        threading.Thread(target=worker, name="archiver", daemon=True).start()
+
+    def _paths_in_use(self):
+        """Записи, которые нельзя архивировать: текущая и транскрибируемые."""
+        paths = set(self._busy_paths)
+        if self.ffmpeg:
+            paths.add(self.current_file)
+        return paths
+
+    def _on_record_archived(self, src: str, dst: str):
+        key = same_path_key(src)
+        records = [dst if same_path_key(p) == key else p for p in self.settings.records()]
+        self.settings.set_records(records)
+        item = self._record_items.pop(same_path_key(src), None)
+        if item is not None:
+            item.path = dst
+            item.name_lbl.setText(os.path.basename(dst))
+            self._record_items[same_path_key(dst)] = item
+
+    def _on_record_deleted(self, path: str):
+        # виджет уже уходит в deleteLater – индексатор не должен до него достучаться
+        self._record_items.pop(same_path_key(path), None)
+
+    def _on_record_renamed(self, old_path: str, new_path: str):
+        item = self._record_items.pop(same_path_key(old_path), None)
+        if item is not None:
+            self._record_items[same_path_key(new_path)] = item
+            # пики, которые индексатор строил под старым именем, больше не найдут виджет
+            if not item.waveform.has_peaks():
+                self.waveform_indexer.enqueue(new_path)
+
+    def _on_transcript_folder_changed(self, _folder):
+        # пути транскриптов пересчитываются по уведомлению, а не при каждом чтении
+        for item in self._record_items.values():
+            item.set_transcript_path(item._calc_transcript_path(item.path))
+
+    def _on_waveform_ready(self, path, peaks):
+        # вызывается из потока индексатора
+        item = self._record_items.get(same_path_key(path))
+        if item is not None:
+            item.waveform.peaks_ready.emit(peaks)
 
     # ------------------------------------------------------------------
     #  Transcription handling
     # ------------------------------------------------------------------
 
+    def _log(self, text: str, color: str = "#4DC3F6"):
+        self.console.insert_log([(datetime.datetime.now().strftime("%H:%M:%S"), text, color)])
+
+    def _transcript_out_path(self, path: str) -> str:
+        out_folder = self._transcript_folder()
+        os.makedirs(out_folder, exist_ok=True)
+        return os.path.join(out_folder, os.path.splitext(os.path.basename(path))[0] + ".txt")
+
+    def catch_up(self):
+        """Транскрибировать только то, что дописано в текущую запись с прошлого раза."""
+        if not self.ffmpeg or self.catchup_thread:
+            return
+        self._caught_up.add(os.path.abspath(self.current_file))
+        self._run_catch_up(self.current_file, time_map=self.ffmpeg.time_map_snapshot())
+
+    def _run_catch_up(self, path: str, *, final: bool = False, time_map=None):
+        """Дотранскрибировать хвост *path* в фоне; ``final`` – запись остановлена."""
+        out_path = self._transcript_out_path(path)
+        previous = self.catchup_thread
+        self._busy_paths.append(path)
+
+        def worker():
+            lease = None
+            try:
+                if previous is not None:
+                    previous.join()     # финальный проход – после текущего
+                # может ждать, пока другие транскрибации не вернут потоки;
+                # пул потоков у общей модели свой (см. audio2text.load_model)
+                lease = self.scheduler.acquire(TRANSCRIPTION)
+                inc = IncrementalTranscriber(
+                    path, out_path=out_path, time_map=time_map
+                )
+                inc.update(final=final)
+                what = "Transcript completed" if final else "Caught up"
+                self.log_message.emit(
+                    f"INFO {what} (+{inc.last_tail_seconds:.0f} s audio) → {out_path}", "#4DC3F6"
+                )
+            except Exception as exc:  # pragma: no cover - GUI feedback only
+                self.log_message.emit(f"ERROR {exc}", "#FF7043")
+            finally:
+                if lease is not None:
+                    lease.release()
+                self._busy_paths.remove(path)
+                if self.catchup_thread is threading.current_thread():
+                    self.catchup_thread = None
+
+        self.catchup_thread = threading.Thread(target=worker, daemon=True)
+        self.catchup_thread.start()
+
     def _start_transcription(self, path: str, item: RecordItem):
         """Start transcription of *path* in a background thread."""
         if self.trans_thread:
             return
 
-        stamp = datetime.datetime.now().strftime("%H:%M:%S")
+        out_path = self._transcript_out_path(path)
 
-        out_folder = self._transcript_folder()
-        os.makedirs(out_folder, exist_ok=True)
-        out_path = os.path.join(out_folder, os.path.splitext(os.path.basename(path))[0] + ".txt")
+        two_pass = self.settings.two_pass()
+        multitrack = os.path.splitext(path)[1].lower() in MULTITRACK_EXT
+        self._busy_paths.append(path)
+
+        # вызывается из рабочего потока – в GUI только через сигналы
+        def on_draft(p):
+            self.transcript_ready.emit(item, str(p))
+            self.log_message.emit(f"INFO Draft ready → {p}", "#4DC3F6")
 
         def worker():
+            lease = None
             try:
-                transcribe_audio(path, out_path=out_path)
-                item.set_transcript_path(out_path)
+                lease = self.scheduler.acquire(TRANSCRIPTION)
+                if multitrack:
+                    # Дорожки источников распознаём по отдельности и сливаем с метками
+                    transcribe_multichannel(path, out_path=out_path)
+                elif two_pass:
+                    # Черновик сразу доступен через 📄, уточнение идёт в этом же потоке
+                    job = TwoPassTranscription(
+                        path, out_path=out_path, cpu_threads=lease.threads,
+                        on_draft=on_draft, on_update=lambda _job: self.transcript_updated.emit(item),
+                    )
+                    job.run()
+                    if job.error:
+                        raise job.error
+                    self.log_message.emit(f"INFO Refined → {out_path}", "#4DC3F6")
+                else:
+                    transcribe_audio(path, out_path=out_path)
+                self.transcript_ready.emit(item, out_path)
             except Exception as exc:  # pragma: no cover - GUI feedback only
-                self.console.insert_log([(datetime.datetime.now().strftime("%H:%M:%S"), f"ERROR {exc}", "#FF7043")])
+                self.log_message.emit(f"ERROR {exc}", "#FF7043")
             finally:
+                if lease is not None:
+                    lease.release()
+                self._busy_paths.remove(path)
                 self.trans_thread = None
 
         self.trans_thread = threading.Thread(target=worker, daemon=True)
@@ -1,9 +1,11 @@
 from PyQt6.QtWidgets import QMainWindow, QVBoxLayout, QHBoxLayout, QWidget
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from style import *
 from ui.window_controls import WindowControls
 from ui.left_panel import LeftPanel
 from ui.console_panel import ConsolePanel
+from stall_watchdog import StallWatchdog
+import datetime
 import ctypes
 import ctypes.wintypes
 
@@ -49,6 +51,31 @@ class MainWindow(QMainWindow):
         # Устанавливаем центральный виджет
         self.setCentralWidget(central)
 
+        # --- Сторож зависаний цикла событий ---
+        self.stall_watchdog = StallWatchdog(threshold_ms=250)
+        self._stalls_seen = 0
+        self.heartbeat_timer = QTimer(self)
+        self.heartbeat_timer.timeout.connect(self._heartbeat)
+        self.heartbeat_timer.start(50)
+        self.stall_watchdog.start()
+
+    def _heartbeat(self):
+        self.stall_watchdog.tick()
+        # Новые события забираем здесь же, в GUI-потоке
+        dog = self.stall_watchdog
+        if dog.count != self._stalls_seen:
+            new = list(dog.events)[-(dog.count - self._stalls_seen):]
+            self._stalls_seen = dog.count
+            self.console_panel.set_stall_count(dog.count)
+            now = datetime.datetime.now().strftime("%H:%M:%S")
+            self.console_panel.insert_log([
+                (now, f"WARN UI stalled {e.duration_ms:.0f} ms at {e.location}", "#FFB74D") for e in new
+            ])
+
+    def closeEvent(self, event):
+        self.stall_watchdog.stop()
+        super().closeEvent(event)
+
     def insert_log(self, records):
         """Передать список записей в консольный виджет."""
         self.console_panel.insert_log(records)
@@ -1,5 +1,9 @@
+import json
+
 from PyQt6.QtCore import QSettings
 
+from settings_store import SettingsStore, default_store
+
 
 class SettingsManager:
     ORG  = "MyCompany"
@@ -7,50 +11,133 @@ class SettingsManager:
 
     # ключи
     DEVICE_KEY   = "audio/device"
+    EXTRA_DEVICE_KEY = "audio/extra_device"
     FOLDER_KEY   = "audio/folder"
     TXT_FOLDER_KEY = "transcript/folder"
     LANGUAGE_KEY = "ui/default_language"
     RECORDS_KEY  = "records/list"
+    TWO_PASS_KEY = "transcript/two_pass"
+    SKIP_SILENCE_KEY = "audio/skip_silence"
+    SOURCE_MODE_KEY = "audio/source_mode"
+    ARCHIVE_DAYS_KEY = "archive/days"
+    ARCHIVE_BUDGET_KEY = "archive/budget_gb"
+
+    # типы ключей для переноса из QSettings
+    _TYPES = {
+        DEVICE_KEY: str,
+        EXTRA_DEVICE_KEY: str,
+        FOLDER_KEY: str,
+        TXT_FOLDER_KEY: str,
+        LANGUAGE_KEY: str,
+        TWO_PASS_KEY: bool,
+        SKIP_SILENCE_KEY: bool,
+        SOURCE_MODE_KEY: str,
+        ARCHIVE_DAYS_KEY: int,
+        ARCHIVE_BUDGET_KEY: int,
+    }
+
+    def __init__(self, store: SettingsStore | None = None):
+        # Все окна делят один SettingsStore: чтения из памяти, запись отложенная
+        self._store = store or default_store()
+        self._store.import_legacy(self._legacy_values)
+
+    def _legacy_values(self) -> dict:
+        """Settings saved by older versions in QSettings (imported once)."""
+        s = QSettings(SettingsManager.ORG, SettingsManager.APP)
+        values = {key: s.value(key, None, typ) for key, typ in self._TYPES.items() if s.contains(key)}
+        if s.contains(SettingsManager.RECORDS_KEY):
+            try:
+                values[SettingsManager.RECORDS_KEY] = json.loads(s.value(SettingsManager.RECORDS_KEY, "[]", str))
+            except ValueError:
+                pass
+        return values
 
-    def __init__(self):
-        self._s = QSettings(SettingsManager.ORG, SettingsManager.APP)
+    # --- уведомления ---
+    def on_change(self, key: str, callback):
+        """Call ``callback(value)`` whenever *key* changes; returns a handle for ``disconnect``."""
+        def listener(changed_key, value):
+            if changed_key == key:
+                callback(value)
+        return self._store.subscribe(listener)
+
+    def disconnect(self, handle):
+        self._store.unsubscribe(handle)
+
+    def flush(self):
+        """Write pending changes to disk now (on shutdown)."""
+        self._store.flush()
 
     # --- геттеры ---
     def device(self, default="") -> str:
-        return self._s.value(SettingsManager.DEVICE_KEY, default, str)
+        return self._store.get(SettingsManager.DEVICE_KEY, default)
+
+    def extra_device(self, default="") -> str:
+        """Second capture device mixed into the recording ("" – none)."""
+        return self._store.get(SettingsManager.EXTRA_DEVICE_KEY, default)
 
     def folder(self, default="") -> str:
-        return self._s.value(SettingsManager.FOLDER_KEY, default, str)
+        return self._store.get(SettingsManager.FOLDER_KEY, default)
 
     def transcript_folder(self, default="") -> str:
-        return self._s.value(SettingsManager.TXT_FOLDER_KEY, default, str)
+        return self._store.get(SettingsManager.TXT_FOLDER_KEY, default)
 
     def language(self, default="") -> str:
-        return self._s.value(SettingsManager.LANGUAGE_KEY, default, str)
+        return self._store.get(SettingsManager.LANGUAGE_KEY, default)
+
+    def two_pass(self, default=False) -> bool:
+        return bool(self._store.get(SettingsManager.TWO_PASS_KEY, default))
+
+    def skip_silence(self, default=False) -> bool:
+        return bool(self._store.get(SettingsManager.SKIP_SILENCE_KEY, default))
+
+    def source_mode(self, default="mix") -> str:
+        """How two capture devices are recorded: "mix", "channels" or "tracks"."""
+        return self._store.get(SettingsManager.SOURCE_MODE_KEY, default)
+
+    def archive_days(self, default=0) -> int:
+        """Archive recordings older than this many days (0 – never)."""
+        return int(self._store.get(SettingsManager.ARCHIVE_DAYS_KEY, default))
+
+    def archive_budget_gb(self, default=0) -> int:
+        """Disk budget for recordings in GB (0 – unlimited)."""
+        return int(self._store.get(SettingsManager.ARCHIVE_BUDGET_KEY, default))
 
     def records(self) -> list[str]:
         """Return list of previously recorded file paths."""
-        data = self._s.value(SettingsManager.RECORDS_KEY, "[]", str)
-        try:
-            import json
-            return json.loads(data)
-        except Exception:
-            return []
+        # копия: вызывающие меняют список и передают его в set_records
+        return list(self._store.get(SettingsManager.RECORDS_KEY, []))
 
     # --- сеттеры ---
     def set_device(self, text: str):
-        self._s.setValue(SettingsManager.DEVICE_KEY, text)
+        self._store.set(SettingsManager.DEVICE_KEY, text)
+
+    def set_extra_device(self, text: str):
+        self._store.set(SettingsManager.EXTRA_DEVICE_KEY, text)
 
     def set_folder(self, path: str):
-        self._s.setValue(SettingsManager.FOLDER_KEY, path)
+        self._store.set(SettingsManager.FOLDER_KEY, path)
 
     def set_transcript_folder(self, path: str):
-        self._s.setValue(SettingsManager.TXT_FOLDER_KEY, path)
+        self._store.set(SettingsManager.TXT_FOLDER_KEY, path)
 
     def set_language(self, code: str):
-        self._s.setValue(SettingsManager.LANGUAGE_KEY, code)
+        self._store.set(SettingsManager.LANGUAGE_KEY, code)
+
+    def set_two_pass(self, enabled: bool):
+        self._store.set(SettingsManager.TWO_PASS_KEY, bool(enabled))
+
+    def set_skip_silence(self, enabled: bool):
+        self._store.set(SettingsManager.SKIP_SILENCE_KEY, bool(enabled))
+
+    def set_source_mode(self, mode: str):
+        self._store.set(SettingsManager.SOURCE_MODE_KEY, mode)
+
+    def set_archive_days(self, days: int):
+        self._store.set(SettingsManager.ARCHIVE_DAYS_KEY, int(days))
+
+    def set_archive_budget_gb(self, gb: int):
+        self._store.set(SettingsManager.ARCHIVE_BUDGET_KEY, int(gb))
 
     def set_records(self, paths: list[str]):
         """Persist list of recorded files."""
-        import json
-        self._s.setValue(SettingsManager.RECORDS_KEY, json.dumps(paths))
+        self._store.set(SettingsManager.RECORDS_KEY, list(paths))
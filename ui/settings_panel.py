@@ -5,16 +5,26 @@ from PyQt6.QtWidgets import (
     QLineEdit,
     QPushButton,
     QComboBox,
+    QCheckBox,
+    QSpinBox,
     QFileDialog,
     QHBoxLayout,
     QFrame,
 )
-from ffmpeg_core import get_audio_lines
+from ffmpeg_core import SOURCE_MODES, get_audio_lines
 from PyQt6.QtCore import Qt
 from style import *
 from ui.settings_manager import SettingsManager
 import os
 
+NO_EXTRA_DEVICE = "—"
+# Подписи режимов записи двух источников (ffmpeg_core.SOURCE_MODES)
+SOURCE_MODE_LABELS = {
+    "mix": "Свести в одну дорожку",
+    "channels": "Раздельные каналы",
+    "tracks": "Раздельные дорожки (.mka)",
+}
+
 class SettingsPanel(QWidget):
     """Виджет с настройками приложения."""
     def __init__(self, back_callback, settings: SettingsManager):
@@ -68,6 +78,28 @@ class SettingsPanel(QWidget):
         self.device_frame = InputFrame("Устройство записи:", self.device_combo)
         vbox.addWidget(self.device_frame)
 
+        # --- Второй источник (например, «Stereo Mix»), сводится с первым ---
+        self.extra_device_combo = QComboBox()
+        self.extra_device_combo.setStyleSheet(self.device_combo.styleSheet())
+        self.extra_device_combo.setFixedWidth(260)
+        self.extra_device_combo.addItem(NO_EXTRA_DEVICE)
+        self.extra_device_combo.addItems(devices)
+        idx = self.extra_device_combo.findText(self._settings.extra_device(""))
+        if idx > 0:
+            self.extra_device_combo.setCurrentIndex(idx)
+        vbox.addWidget(InputFrame("Второй источник:", self.extra_device_combo))
+
+        # --- Как писать два источника: сведение, каналы или дорожки ---
+        self.source_mode_combo = QComboBox()
+        self.source_mode_combo.setStyleSheet(self.device_combo.styleSheet())
+        self.source_mode_combo.setFixedWidth(260)
+        for mode in SOURCE_MODES:
+            self.source_mode_combo.addItem(SOURCE_MODE_LABELS[mode], mode)
+        idx = self.source_mode_combo.findData(self._settings.source_mode())
+        if idx >= 0:
+            self.source_mode_combo.setCurrentIndex(idx)
+        vbox.addWidget(InputFrame("Два источника:", self.source_mode_combo))
+
         # --- Прямоугольная панель для выбора папки ---
         initial_folder = self._settings.folder(os.path.expanduser("~/Documents"))
         self.folder_frame = FolderSelectFrame(
@@ -86,6 +118,33 @@ class SettingsPanel(QWidget):
         self.trans_folder_frame.set_on_click(self.choose_transcript_folder)
         vbox.addWidget(self.trans_folder_frame)
 
+        # --- Быстрый черновик маленькой моделью, затем уточнение ---
+        self.two_pass_check = QCheckBox("Черновик + уточнение")
+        self.two_pass_check.setStyleSheet("color: #AAB8CC; font-size: 15px;")
+        self.two_pass_check.setChecked(self._settings.two_pass())
+        vbox.addWidget(InputFrame("Транскрибация:", self.two_pass_check))
+
+        # --- Сжимать длинные паузы при записи ---
+        self.skip_silence_check = QCheckBox("Пропускать тишину")
+        self.skip_silence_check.setStyleSheet("color: #AAB8CC; font-size: 15px;")
+        self.skip_silence_check.setChecked(self._settings.skip_silence())
+        vbox.addWidget(InputFrame("Запись:", self.skip_silence_check))
+
+        # --- Архивация старых записей в Opus ---
+        self.archive_days_spin = QSpinBox()
+        self.archive_days_spin.setRange(0, 3650)
+        self.archive_days_spin.setSpecialValueText("выкл.")
+        self.archive_days_spin.setSuffix(" дн.")
+        self.archive_days_spin.setValue(self._settings.archive_days())
+        self.archive_days_spin.setStyleSheet("color: #AAB8CC; font-size: 15px;")
+        vbox.addWidget(InputFrame("Архивировать через:", self.archive_days_spin))
+        self.archive_budget_spin = QSpinBox()
+        self.archive_budget_spin.setRange(0, 100000)
+        self.archive_budget_spin.setSpecialValueText("без лимита")
+        self.archive_budget_spin.setSuffix(" ГБ")
+        self.archive_budget_spin.setValue(self._settings.archive_budget_gb())
+        self.archive_budget_spin.setStyleSheet("color: #AAB8CC; font-size: 15px;")
+        vbox.addWidget(InputFrame("Лимит записей:", self.archive_budget_spin))
 
         f2_lbl = QLabel("Язык по умолчанию:")
         f2_lbl.setStyleSheet(f"color: {LABEL_TEXT}; font-size: 15px; margin-left:36px;")
@@ -100,6 +159,15 @@ class SettingsPanel(QWidget):
         """Вернуть выбранное пользователем устройство."""
         return self.device_combo.currentText()
     
+    def extra_device(self) -> str:
+        """Второе устройство или пустая строка, если не выбрано."""
+        text = self.extra_device_combo.currentText()
+        return "" if text == NO_EXTRA_DEVICE else text
+
+    def source_mode(self) -> str:
+        """Режим записи двух источников (см. ``ffmpeg_core.SOURCE_MODES``)."""
+        return self.source_mode_combo.currentData()
+
     def choose_save_folder(self):
         # Выбор каталога для сохранения аудиофайлов
         folder = QFileDialog.getExistingDirectory(
@@ -118,8 +186,14 @@ class SettingsPanel(QWidget):
     def save_settings(self):
         """Сохранить текущие настройки через SettingsManager."""
         self._settings.set_device(self.selected_device())
+        self._settings.set_extra_device(self.extra_device())
+        self._settings.set_source_mode(self.source_mode())
         self._settings.set_folder(self.save_folder())
         self._settings.set_transcript_folder(self.transcript_folder())
+        self._settings.set_two_pass(self.two_pass_check.isChecked())
+        self._settings.set_skip_silence(self.skip_silence_check.isChecked())
+        self._settings.set_archive_days(self.archive_days_spin.value())
+        self._settings.set_archive_budget_gb(self.archive_budget_spin.value())
 
 
     def save_folder(self) -> str:
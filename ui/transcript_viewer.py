@@ -0,0 +1,147 @@
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+from PyQt6.QtWidgets import (
+    QDialog,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QListView,
+    QPushButton,
+    QVBoxLayout,
+)
+
+from style import *
+from transcript_index import TranscriptIndex, parse_timestamp
+
+
+class TranscriptModel(QAbstractListModel):
+    """Строки транскрипта по запросу вида: декодируются только видимые."""
+
+    def __init__(self, index: TranscriptIndex, parent=None):
+        super().__init__(parent)
+        self._index = index
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._index)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self._index.line(index.row())
+        return None
+
+    def refresh(self):
+        """Перечитать индекс, если файл дописали (идёт транскрибация)."""
+        rows = len(self._index)
+        generation = self._index.generation
+        if not self._index.refresh():
+            return
+        if self._index.generation != generation:
+            # файл заменён (os.replace) или переписан – строки другие
+            self.beginResetModel()
+            self.endResetModel()
+            return
+        if len(self._index) > rows:
+            self.beginInsertRows(QModelIndex(), rows, len(self._index) - 1)
+            self.endInsertRows()
+        if rows:
+            # последняя строка могла быть дописана
+            last = self.index(rows - 1)
+            self.dataChanged.emit(last, last)
+
+
+class TranscriptViewer(QDialog):
+    """Окно просмотра транскрипта с переходом к моменту записи."""
+
+    def __init__(self, path: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(path)
+        self.resize(820, 600)
+        self.setStyleSheet(
+            f"""
+            QDialog {{ background: {BG_RIGHT}; }}
+            QListView {{
+                background: {CONSOLE_BG};
+                color: {CONSOLE_TEXT};
+                border: none;
+                font-family: Consolas, monospace;
+                font-size: 14px;
+            }}
+            QLabel {{ color: {LABEL_TEXT}; }}
+            QLineEdit {{
+                background: #323B4A;
+                color: {LABEL_TEXT};
+                border-radius: 6px;
+                padding: 4px 8px;
+            }}
+            QPushButton {{
+                background: #323B4A;
+                color: {LABEL_TEXT};
+                border: none;
+                border-radius: 6px;
+                padding: 4px 12px;
+            }}
+            QPushButton:hover {{ background: #48516B; }}
+            """
+        )
+        self.index = TranscriptIndex(path)
+        self.model = TranscriptModel(self.index, self)
+
+        vbox = QVBoxLayout(self)
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel("Перейти к:"))
+        self.time_edit = QLineEdit()
+        self.time_edit.setPlaceholderText("чч:мм:сс")
+        self.time_edit.returnPressed.connect(self._jump)
+        bar.addWidget(self.time_edit)
+        go_btn = QPushButton("→")
+        go_btn.clicked.connect(self._jump)
+        bar.addWidget(go_btn)
+        bar.addStretch(1)
+        self.lines_lbl = QLabel()
+        bar.addWidget(self.lines_lbl)
+        vbox.addLayout(bar)
+
+        self.view = QListView()
+        # Одинаковая высота строк: вид не измеряет весь файл, а
+        # запрашивает у модели только видимое окно.
+        self.view.setUniformItemSizes(True)
+        self.view.setWordWrap(False)
+        self.view.setModel(self.model)
+        vbox.addWidget(self.view)
+        self._update_lines_label()
+
+        # Транскрипт может ещё дописываться – подхватываем новые строки.
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(1000)
+        self.finished.connect(self._release)
+
+    def jump_to(self, seconds: float):
+        if not len(self.index):
+            return
+        row = self.index.find_time(seconds)
+        target = self.model.index(row)
+        self.view.setCurrentIndex(target)
+        self.view.scrollTo(target, QListView.ScrollHint.PositionAtTop)
+
+    def _jump(self):
+        try:
+            seconds = parse_timestamp(self.time_edit.text())
+        except ValueError:
+            self.time_edit.selectAll()
+            return
+        self.jump_to(seconds)
+
+    def refresh(self):
+        try:
+            self.model.refresh()
+        except OSError:
+            # файла сейчас нет (удалён или подменяется) – показываем то, что есть
+            return
+        self._update_lines_label()
+
+    def _update_lines_label(self):
+        self.lines_lbl.setText(f"строк: {len(self.index)}")
+
+    def _release(self):
+        self.refresh_timer.stop()
+        self.index.close()
@@ -0,0 +1,46 @@
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtWidgets import QWidget
+
+from style import COLOR_ACCENT
+from waveform import WaveformPeaks
+
+
+class WaveformView(QWidget):
+    """Миниатюра волны записи по готовому файлу пиков."""
+
+    # Индексатор работает в своём потоке – данные передаём через сигнал.
+    peaks_ready = pyqtSignal(object)
+
+    def __init__(self, peaks: WaveformPeaks | None = None, parent=None):
+        super().__init__(parent)
+        self._peaks = peaks
+        self._cache = None            # (ширина, mins, maxs)
+        self.setFixedHeight(28)
+        self.setMinimumWidth(80)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.peaks_ready.connect(self.set_peaks)
+
+    def has_peaks(self) -> bool:
+        return self._peaks is not None
+
+    def set_peaks(self, peaks: WaveformPeaks | None):
+        self._peaks = peaks
+        self._cache = None
+        self.update()
+
+    def paintEvent(self, event):
+        if not self._peaks or not self._peaks.levels:
+            return
+        width, height = self.width(), self.height()
+        if not self._cache or self._cache[0] != width:
+            mins, maxs = self._peaks.for_width(width)
+            self._cache = (width, mins, maxs)
+        _, mins, maxs = self._cache
+        mid = height / 2
+        scale = mid / 128.0
+        painter = QPainter(self)
+        painter.setPen(QColor(COLOR_ACCENT))
+        for x, (lo, hi) in enumerate(zip(mins.tolist(), maxs.tolist())):
+            painter.drawLine(x, int(mid - hi * scale), x, int(mid - lo * scale))
+        painter.end()
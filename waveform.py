@@ -0,0 +1,280 @@
+"""
+ waveform.py – обзорные волновые формы записей.
+
+ Для каждой записи один раз считается пирамида пиков min/max: нижний
+ уровень – по блоку из *block* отсчётов 8 кГц (~31 блок в секунду), каждый
+ следующий вдвое грубее.  Пирамида хранится рядом с записью в
+ ``<audio>.peaks.npz`` (int8, ~100 КБ на час), так что список записей и
+ любой предпросмотр рисуют волну мгновенно, не декодируя файл.
+
+ Фоновый :class:`WaveformIndexer` строит недостающие файлы по очереди с
+ пониженным приоритетом и ставит декодер на паузу, пока идёт запись.
+
+ Использование::
+
+     peaks = build_sidecar("20240101_120000.mp3")
+     mins, maxs = peaks.for_width(400)
+
+ или из CLI::
+
+     python waveform.py *.mp3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional, Union
+
+import numpy as np
+
+from resource_scheduler import RECORDING, default_scheduler
+from streaming import open_pcm_stream
+
+__all__ = ["WaveformPeaks", "compute_peaks", "build_sidecar", "WaveformIndexer"]
+
+SUFFIX = ".peaks.npz"
+SAMPLE_RATE = 8000
+
+
+class WaveformPeaks:
+    """Min/max peak pyramid; ``levels[0]`` is the finest.
+
+    Each level is a pair of int8 arrays ``(mins, maxs)`` with sample values
+    scaled to −128…127.
+    """
+
+    def __init__(self, levels: list, *, sample_rate: int = SAMPLE_RATE, block: int = 256) -> None:
+        self.levels = levels
+        self.sample_rate = sample_rate
+        self.block = block
+
+    @property
+    def duration(self) -> float:
+        return len(self.levels[0][0]) * self.block / self.sample_rate if self.levels else 0.0
+
+    def for_width(self, width: int, start: float = 0.0, end: Optional[float] = None) -> tuple:
+        """Return ``(mins, maxs)`` with *width* buckets covering ``[start, end]`` seconds.
+
+        Uses the coarsest level that still has at least one block per
+        bucket, then folds it down to exactly *width* columns.
+        """
+        if not self.levels or width <= 0:
+            empty = np.zeros(0, dtype=np.int8)
+            return empty, empty
+        end = self.duration if end is None else min(end, self.duration)
+        for i in range(len(self.levels) - 1, -1, -1):
+            seconds_per_block = self.block * (1 << i) / self.sample_rate
+            if (end - start) / seconds_per_block >= width or i == 0:
+                break
+        mins, maxs = self.levels[i]
+        lo = int(start / seconds_per_block)
+        hi = max(lo + 1, int(np.ceil(end / seconds_per_block)))
+        mins, maxs = mins[lo:hi], maxs[lo:hi]
+        edges = np.linspace(0, len(mins), width + 1).astype(np.intp)
+        edges = np.minimum(edges, len(mins) - 1)
+        # reduceat по границам столбцов – без цикла Python.
+        return np.minimum.reduceat(mins, edges[:-1]), np.maximum.reduceat(maxs, edges[:-1])
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def sidecar_path(audio_path: Union[str, Path]) -> Path:
+        return Path(str(audio_path) + SUFFIX)
+
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        arrays = {}
+        for i, (mins, maxs) in enumerate(self.levels):
+            arrays[f"min{i}"] = mins
+            arrays[f"max{i}"] = maxs
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fp:
+            np.savez_compressed(
+                fp, sample_rate=self.sample_rate, block=self.block, nlevels=len(self.levels), **arrays
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "WaveformPeaks":
+        with np.load(path) as data:
+            levels = [(data[f"min{i}"], data[f"max{i}"]) for i in range(int(data["nlevels"]))]
+            return cls(levels, sample_rate=int(data["sample_rate"]), block=int(data["block"]))
+
+    @classmethod
+    def for_audio(cls, audio_path: Union[str, Path]) -> Optional["WaveformPeaks"]:
+        """Load the sidecar of *audio_path* if it exists and is up to date."""
+        path = cls.sidecar_path(audio_path)
+        try:
+            if path.stat().st_mtime < Path(audio_path).stat().st_mtime:
+                return None
+            return cls.load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def compute_peaks(
+    source: BinaryIO,
+    *,
+    block: int = 256,
+    chunk_blocks: int = 1024,
+    min_level_size: int = 64,
+    pause: Optional[Callable[[], None]] = None,
+) -> WaveformPeaks:
+    """Build a :class:`WaveformPeaks` from s16le mono PCM read from *source*.
+
+    PCM is read ``chunk_blocks`` blocks at a time into one reusable buffer
+    and reduced with ``min``/``max`` along the block axis.  *pause* is called
+    between chunks; the background indexer blocks there while recording.
+    """
+    raw = np.empty(block * chunk_blocks, dtype=np.int16)
+    view = memoryview(raw).cast("B")
+    mins, maxs = [], []
+    while True:
+        if pause:
+            pause()
+        filled = 0
+        while filled < len(view):
+            n = source.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+        samples = filled // 2
+        if samples:
+            whole = samples - samples % block
+            if whole:
+                blocks = raw[:whole].reshape(-1, block)
+                mins.append(blocks.min(axis=1))
+                maxs.append(blocks.max(axis=1))
+            if samples > whole:
+                mins.append(raw[whole:samples].min(keepdims=True))
+                maxs.append(raw[whole:samples].max(keepdims=True))
+        if filled < len(view):
+            break
+
+    if not mins:
+        return WaveformPeaks([], block=block)
+    # int16 → int8: для картинки хватает, файл вдвое меньше.
+    lo = (np.concatenate(mins) >> 8).astype(np.int8)
+    hi = (np.concatenate(maxs) >> 8).astype(np.int8)
+    levels = [(lo, hi)]
+    while len(lo) > min_level_size:
+        if len(lo) % 2:
+            lo, hi = np.append(lo, lo[-1]), np.append(hi, hi[-1])
+        lo = np.minimum(lo[0::2], lo[1::2])
+        hi = np.maximum(hi[0::2], hi[1::2])
+        levels.append((lo, hi))
+    return WaveformPeaks(levels, block=block)
+
+
+def build_sidecar(
+    audio_path: Union[str, Path],
+    *,
+    force: bool = False,
+    low_priority: bool = False,
+    pause: Optional[Callable[[], None]] = None,
+) -> WaveformPeaks:
+    """Compute and store the sidecar of *audio_path* unless it is up to date."""
+    audio_path = Path(audio_path).expanduser().resolve()
+    if not force:
+        peaks = WaveformPeaks.for_audio(audio_path)
+        if peaks is not None:
+            return peaks
+    proc = open_pcm_stream(audio_path, sample_rate=SAMPLE_RATE, low_priority=low_priority)
+    try:
+        peaks = compute_peaks(proc.stdout, pause=pause)
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+    peaks.save(WaveformPeaks.sidecar_path(audio_path))
+    return peaks
+
+
+class WaveformIndexer:
+    """Background thread that builds missing sidecars one file at a time.
+
+    The decoder runs at below-normal priority, and reading stops while
+    the scheduler reports an active recording.  ffmpeg then blocks on its
+    full pipe, so the indexer uses no CPU during capture.
+
+    Parameters
+    ----------
+    on_done : Callable[[Path, WaveformPeaks], None] | None
+        Called from the indexer thread after each file.
+    scheduler : ResourceScheduler | None
+        Source of the recording state; :func:`default_scheduler` by default.
+    builder : Callable
+        Sidecar builder with the signature of :func:`build_sidecar`.
+    """
+
+    def __init__(self, on_done=None, *, scheduler=None, builder: Callable = build_sidecar) -> None:
+        self.on_done = on_done
+        self.scheduler = scheduler or default_scheduler()
+        self.builder = builder
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, audio_path: Union[str, Path]) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="waveform-indexer", daemon=True)
+            self._thread.start()
+        self._queue.put(Path(audio_path))
+
+    def join(self) -> None:
+        """Wait until the queue is processed (tests, CLI)."""
+        self._queue.join()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._queue.put(None)
+
+    def _wait_idle(self) -> None:
+        while self.scheduler.active(RECORDING) and not self._stop.is_set():
+            time.sleep(0.5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            path = self._queue.get()
+            try:
+                if path is None or not path.exists():
+                    continue
+                self._wait_idle()
+                try:
+                    peaks = self.builder(path, low_priority=True, pause=self._wait_idle)
+                except Exception as exc:  # битый файл не должен останавливать очередь
+                    print(f"Не удалось построить волну для {path.name}: {exc}")
+                    continue
+                if self.on_done:
+                    self.on_done(path, peaks)
+            finally:
+                self._queue.task_done()
+
+
+# ---------------------------------------------------------------------------
+# CLI wrapper
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:  # pragma: no cover – CLI only
+    p = argparse.ArgumentParser(prog="waveform", description="Build waveform peak sidecars")
+    p.add_argument("inputs", nargs="+", help="Audio files")
+    p.add_argument("--force", action="store_true", help="Rebuild existing sidecars")
+    args = p.parse_args()
+    for path in args.inputs:
+        started = time.perf_counter()
+        peaks = build_sidecar(path, force=args.force)
+        size = WaveformPeaks.sidecar_path(Path(path).resolve()).stat().st_size
+        print(f"{path}: {peaks.duration:.0f} s, {size // 1024} KB, {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()